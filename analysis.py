@@ -0,0 +1,250 @@
+# --- 분석 핵심 로직 ---
+# Vision / Gemini 호출과 응답 해석을 Streamlit 없이 사용할 수 있도록 모아둔 모듈입니다.
+# main_app.py는 여기에 캐시(st.cache_data), 게이트웨이(api_gateway.py), 화면 오류 표시를 덧씌워 사용하고,
+# 벤치마크/배치 실행은 이 함수들을 그대로 가져다 씁니다. 오류는 삼키지 않고 호출한 쪽으로 올려보냅니다.
+import os
+import json
+import re
+import time
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+
+from partial_json import StreamingJsonParser
+from hint_compaction import SCORES_KEY, compact_hints, estimate_tokens
+from telemetry import get_telemetry
+
+GEMINI_TIMEOUT_SECONDS = 120
+GEMINI_MODEL = "gemini-1.5-pro-latest"
+
+
+def create_vision_client():
+    """Vision API 클라이언트를 만듭니다. Google 라이브러리는 무거우므로 이 함수가 호출될 때 임포트합니다."""
+    import google.auth
+    from google.cloud import vision
+    credentials, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-vision'])
+    return vision.ImageAnnotatorClient(credentials=credentials)
+
+
+def create_gemini_model(api_key: Optional[str] = None):
+    """Gemini 모델을 만듭니다. api_key가 없으면 GEMINI_API_KEY 환경 변수를 사용합니다."""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+def content_key(*parts: Any) -> str:
+    """bytes/문자열/JSON으로 바꿀 수 있는 값들로 요청 키(SHA-256)를 만듭니다. 같은 요청을 합치는 데 사용합니다."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray)):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+# Vision 결과에서 제품/브랜드를 가리키는 신호의 우선순위 (app.py와 동일: 로고 > 최고의 추측 > 웹 엔티티 > 라벨)
+SIGNAL_PRIORITY = ["logos", "best_guess", "web_entities", "labels"]
+VISION_META_KEY = "_vision"     # 결과 dict 안에 어떤 단계(tier)가 답했는지 기록하는 키. 프롬프트에는 넣지 않음
+
+# all: 네 가지 기능을 항상 한 번에 요청(기존 동작) / cascade: 싼 기능부터 요청하고 확신이 서면 중단
+VISION_MODE = os.getenv("STOCKLENS_VISION_MODE", "all")
+VISION_LOGO_SCORE = float(os.getenv("STOCKLENS_VISION_LOGO_SCORE", "0.7"))   # 이 점수 이상의 로고가 있으면 1단계에서 중단
+VISION_WEB_SCORE = float(os.getenv("STOCKLENS_VISION_WEB_SCORE", "0.8"))     # 최고의 추측 + 이 점수 이상의 웹 엔티티가 있으면 2단계에서 중단
+# 기능별 단가 (USD / 1,000건, 월 1,001~5,000,000건 구간 공시가). 요청한 기능 수만큼 과금됨
+VISION_FEATURE_PRICES = {"LOGO_DETECTION": 1.5, "LABEL_DETECTION": 1.5, "WEB_DETECTION": 3.5, "TEXT_DETECTION": 1.5}
+ALL_FEATURES = ["LOGO_DETECTION", "WEB_DETECTION", "LABEL_DETECTION", "TEXT_DETECTION"]
+# cascade 단계: (단계 이름, 이번 단계에서 추가로 요청할 기능)
+VISION_TIERS = [
+    ("logo", ["LOGO_DETECTION", "LABEL_DETECTION"]),
+    ("web", ["WEB_DETECTION"]),
+    ("ocr", ["TEXT_DETECTION"]),
+]
+
+
+def vision_cost(features: List[str]) -> float:
+    """요청한 기능 목록의 이미지 1장당 예상 비용(USD)."""
+    return sum(VISION_FEATURE_PRICES[name] for name in features) / 1000
+
+
+def vision_hints(vision_results: Dict) -> Dict[str, List[str]]:
+    """메타데이터(VISION_META_KEY 등 '_'로 시작하는 키)를 뺀 힌트만 반환합니다."""
+    return {key: value for key, value in vision_results.items() if not key.startswith("_")}
+
+
+def top_signal(vision_results: Dict) -> Optional[str]:
+    """우선순위가 가장 높은 신호 하나 (예: 첫 번째 로고). 없으면 None."""
+    for key in SIGNAL_PRIORITY:
+        if vision_results.get(key):
+            return vision_results[key][0]
+    return None
+
+
+def _annotate(vision_client, image_bytes: bytes, feature_names: List[str], tier: str):
+    from google.cloud import vision
+    image = vision.Image(content=image_bytes)
+    # Vision API에서 받아야 할 정보를 지정(아래 정보 외 얼굴,랜드마크, 유해콘텐츠 등 다양한 정보 를 받아올 수 있음)
+    features = [vision.Feature(type_=getattr(vision.Feature.Type, name)) for name in feature_names]
+    # 요청하는 것을 vision API에 전달
+    request = vision.AnnotateImageRequest(image=image, features=features)
+    with get_telemetry().span(f"vision.{tier}", features="+".join(feature_names), request_bytes=len(image_bytes)):
+        return vision_client.annotate_image(request=request)
+
+
+def _collect(response, results: Dict) -> None:
+    # 응답에 들어 있는 기능의 설명 문자열만 추려서 results에 추가. 점수가 있는 종류는 SCORES_KEY에 같은 순서로 보관 (힌트 압축 순위용)
+    scores = results.setdefault(SCORES_KEY, {})
+    if response.logo_annotations:
+        results['logos'] = [logo.description for logo in response.logo_annotations]
+        scores['logos'] = [logo.score for logo in response.logo_annotations]
+    if response.web_detection and response.web_detection.best_guess_labels: results['best_guess'] = [label.label for label in response.web_detection.best_guess_labels]
+    if response.web_detection and response.web_detection.web_entities:
+        entities = [entity for entity in response.web_detection.web_entities if entity.description]
+        results['web_entities'] = [entity.description for entity in entities]
+        scores['web_entities'] = [entity.score for entity in entities]
+    if response.label_annotations:
+        results['labels'] = [label.description for label in response.label_annotations]
+        scores['labels'] = [label.score for label in response.label_annotations]
+    if response.text_annotations: results['ocr_text'] = [text.description for text in response.text_annotations]
+
+
+def _confident(tier: str, response) -> bool:
+    # 이번 단계의 응답만으로 제품/브랜드를 특정할 수 있는지 판단
+    if tier == "logo":
+        return any(logo.score >= VISION_LOGO_SCORE for logo in response.logo_annotations)
+    if tier == "web":
+        web = response.web_detection
+        return bool(web and web.best_guess_labels and any(e.score >= VISION_WEB_SCORE for e in web.web_entities))
+    return True
+
+
+def request_vision_annotations(vision_client, image_bytes: bytes, mode: Optional[str] = None) -> Dict:
+    """Vision API 결과에서 설명 문자열만 추려서 반환합니다.
+
+    mode가 "all"이면 로고/웹/라벨/텍스트 탐지를 한 번에 요청하고, "cascade"이면 VISION_TIERS 순서로 요청하다가
+    확신할 수 있는 신호가 나오면 중단합니다. 어느 단계에서 끝났는지와 요청한 기능, 예상 비용은
+    결과의 VISION_META_KEY 항목에 기록됩니다.
+    """
+    mode = mode or VISION_MODE
+    results: Dict = {}
+    if mode == "all":
+        _collect(_annotate(vision_client, image_bytes, ALL_FEATURES, "all"), results)
+        tier, requested, calls = "all", list(ALL_FEATURES), 1
+    elif mode == "cascade":
+        requested, calls = [], 0
+        for tier, features in VISION_TIERS:
+            response = _annotate(vision_client, image_bytes, features, tier)
+            requested += features
+            calls += 1
+            _collect(response, results)
+            if _confident(tier, response):
+                break
+    else:
+        raise ValueError(f"알 수 없는 Vision 모드입니다: {mode}")
+    results[VISION_META_KEY] = {"mode": mode, "tier": tier, "features": requested, "calls": calls,
+                                "cost_usd": vision_cost(requested)}
+    return results
+
+
+def build_profile_prompt(vision_results: Dict, token_budget: Optional[int] = None) -> str:
+    """Vision 힌트를 토큰 예산 안으로 압축(hint_compaction.py)해 넣고, Gemini에게 보낼 프로필 분석 프롬프트를 만듭니다."""
+    # --- [수정] 프롬프트에 '모회사'를 찾으라는 지시 추가 ---
+    prompt = f"""
+    당신은 세계 최고의 IT 기업 및 글로벌 소비재 기업 분석 전문가입니다. 당신의 임무는 주어진 이미지와 텍스트 힌트를 종합하여, 해당 제품과 제조사에 대한 상세한 프로필을 작성하는 것입니다.
+
+    [분석 대상 정보]
+    - 이미지: (첨부됨)
+    - 텍스트 힌트: {json.dumps(compact_hints(vision_results, token_budget), ensure_ascii=False)}   # 
+
+    [매우 중요한 지시사항]
+    - 만약 해당 브랜드가 특정 국가의 자회사(예: 한국 P&G, CJ LION)를 통해 유통되더라도, 주식 시장에 상장된 '글로벌 모회사(Parent Company)'를 기준으로 '제조사'와 '종목코드'를 찾아야 합니다.
+    - '종목코드'는 FinanceDataReader 라이브러리가 지원하는 시장(KRX, NASDAQ, NYSE, AMEX, TSE, HKEX, SSE, SZSE) 중에서 찾아야 합니다.
+    - 비상장 기업이거나 지원하지 않는 시장에 상장된 경우, '종목코드' 값은 "정보 없음"으로 설정해주세요.
+
+    [최종 요청사항]
+    위 모든 정보를 바탕으로, 아래 JSON 형식에 맞춰 답변을 생성해주세요. 추가적인 설명 없이 JSON 객체만 반환해야 합니다.
+    ```json
+    {{
+      "제조사": "Lion Corporation",
+      "제품명": "아이깨끗해 (Kirei Kirei) Hand Soap",
+      "제조사_국가": "일본 (JPN)",
+      "종목코드": "4912",
+      "company_description": "라이언 주식회사(Lion Corporation)는 일본의 대표적인 생활용품 및 화학제품 제조 기업입니다. 세제, 치약, 비누 등 다양한 위생용품을 생산하며, 도쿄증권거래소에 '4912'라는 티커로 상장되어 있습니다.",
+      "main_products": [
+        {{"category": "생활용품", "description": "'아이깨끗해(キレイキレイ)' 손 세정제, 'CHARMY Magica' 주방 세제 등이 유명합니다."}},
+        {{"category": "구강용품", "description": "'시스테마(Systema)', '크리니카(Clinica)' 등 다양한 치약 및 칫솔 브랜드를 보유하고 있습니다."}}
+      ]
+    }}
+    ```
+    """
+    return prompt
+
+
+def parse_profile_response(text: str) -> Dict:
+    """Gemini 응답 텍스트에서 JSON 프로필을 꺼냅니다. ```json 코드 블록이 있으면 그 안만 사용합니다."""
+    # JSON 응답에서 필요한 정보를 추출. 불필요한 말이나 상자 등의 기호가 오면 에러가 발생하므로 정리
+    match = re.search(r"```json\s*(\{.*?\})\s*```", text, re.DOTALL)
+    if match: return json.loads(match.group(1))
+    else: return json.loads(text)
+
+
+def gemini_contents(image_bytes: bytes, vision_results: Dict, mime_type: str, token_budget: Optional[int] = None) -> list:
+    """generate_content에 넘길 [프롬프트, 이미지] 목록."""
+    # 전처리된 bytes를 그대로 전달 (PIL 이미지로 넘기면 SDK가 다시 인코딩함)
+    return [build_profile_prompt(vision_results, token_budget), {"mime_type": mime_type, "data": image_bytes}]
+
+
+def _usage(response) -> Dict[str, Optional[int]]:
+    # SDK가 알려주는 실제 토큰 수 (버전/응답에 따라 없을 수 있음)
+    usage = getattr(response, "usage_metadata", None)
+    return {"prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "response_tokens": getattr(usage, "candidates_token_count", None)}
+
+
+def request_gemini_profile(gemini_model, image_bytes: bytes, vision_results: Dict, mime_type: str = "image/jpeg") -> Dict:
+    """Gemini를 호출하여 제품 및 제조사 프로필, 그리고 '글로벌 모회사'의 종목 코드까지 분석하여 JSON으로 반환합니다."""
+    telemetry = get_telemetry()
+    contents = gemini_contents(image_bytes, vision_results, mime_type)
+    with telemetry.span("gemini", stream=False, prompt_chars=len(contents[0]), prompt_tokens_est=estimate_tokens(contents[0]),
+                        image_bytes=len(image_bytes)) as span:
+        response = gemini_model.generate_content(contents, request_options={"timeout": GEMINI_TIMEOUT_SECONDS})
+        text = response.text
+        span.update(response_chars=len(text), **_usage(response))
+    with telemetry.span("parse", stream=False, response_chars=len(text)):
+        return parse_profile_response(text)
+
+
+def stream_gemini_profile(gemini_model, image_bytes: bytes, vision_results: Dict, mime_type: str = "image/jpeg",
+                          on_field: Optional[Callable[[str, Any], None]] = None) -> Optional[Dict]:
+    """request_gemini_profile의 스트리밍 버전. 응답 조각을 받는 동안 최상위 필드가 완성될 때마다 on_field(키, 값)을 호출합니다.
+
+    응답이 JSON 객체를 끝까지 닫지 못하고 끊기면 request_gemini_profile과 같이 json.JSONDecodeError를 올립니다.
+    """
+    telemetry = get_telemetry()
+    parser = StreamingJsonParser()
+    contents = gemini_contents(image_bytes, vision_results, mime_type)
+    parse_seconds = 0.0
+    with telemetry.span("gemini", stream=True, prompt_chars=len(contents[0]), prompt_tokens_est=estimate_tokens(contents[0]),
+                        image_bytes=len(image_bytes)) as span:
+        start = time.perf_counter()
+        response = gemini_model.generate_content(contents, stream=True, request_options={"timeout": GEMINI_TIMEOUT_SECONDS})
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:      # 텍스트가 없는 조각(종료 신호 등)
+                continue
+            span.setdefault("first_chunk_ms", round((time.perf_counter() - start) * 1000, 2))
+            parse_start = time.perf_counter()
+            completed = parser.feed(text)
+            parse_seconds += time.perf_counter() - parse_start
+            for key, value in completed:
+                if on_field: on_field(key, value)
+        span.update(response_chars=len(parser.buffer), fields=len(parser.fields), **_usage(response))
+    # 스트리밍에서는 파싱이 응답 조각마다 나뉘어 일어나므로 합계를 따로 기록
+    telemetry.observe("parse", parse_seconds, stream=True, response_chars=len(parser.buffer))
+    if not parser.done:
+        # 응답이 중간에 끊김 (길이 제한, 안전 차단, 일부 출력 후 시간 초과 등). 완성된 일부 필드만으로 성공 처리하면
+        # 결과 캐시에 불완전한 프로필이 저장되므로, 비스트리밍 경로처럼 전체 텍스트를 해석해 실패하면 오류를 올림
+        return parse_profile_response(parser.buffer)
+    return parser.result()
@@ -0,0 +1,141 @@
+# --- 외부 API 게이트웨이 (Vision / Gemini) ---
+# 여러 세션이 같은 이미지를 동시에 분석할 때 생기는 중복 호출과 쿼터 초과를 막기 위한 공용 계층입니다.
+# - single-flight: 같은 키의 요청이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 기다림
+# - 속도/동시성 제한: 백엔드별 토큰 버킷(초당 요청 수) + 세마포어(동시 호출 수)
+# - 재시도: 쿼터 초과/일시 장애 오류는 지터(jitter)를 섞은 지수 백오프로 재시도
+# - 통계: 대기열 길이, 대기 시간, 합쳐진(coalesced) 요청 수 등을 stats()로 노출
+# Streamlit에 의존하지 않으므로 가짜 클라이언트(함수)로 그대로 테스트할 수 있습니다.
+import os
+import time
+import random
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from rate_limit import TokenBucket
+
+# 재시도할 오류 (google.api_core.exceptions 의 클래스 이름 기준. 라이브러리를 직접 임포트하지 않기 위해 이름으로 비교)
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "GatewayTimeout", "TimeoutError", "ConnectionError",
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+class BackendGateway:
+    """백엔드 하나(예: Vision)에 대한 요청 합치기 + 속도/동시성 제한 + 재시도."""
+
+    def __init__(self, name: str, rate: float, max_concurrency: int, burst: Optional[float] = None,
+                 max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 retryable: Callable[[BaseException], bool] = is_retryable):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self._bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._stats = {"calls": 0, "coalesced": 0, "attempts": 0, "retries": 0, "failures": 0,
+                       "queued": 0, "running": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+    def call(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """key가 같은 요청이 진행 중이면 그 결과를 공유하고, 아니면 제한을 지키며 func(*args, **kwargs)를 실행합니다."""
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._run(func, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                with self._lock:
+                    self._stats["attempts"] += 1
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.retryable(e):
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise
+            finally:
+                self._release()
+            attempt += 1
+            with self._lock:
+                self._stats["retries"] += 1
+            # full jitter: 0 ~ min(max_delay, base * 2^attempt) 사이에서 무작위로 쉬어 동시에 재시도가 몰리지 않게 함
+            time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def _acquire(self) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            self._stats["queued"] += 1
+        self._bucket.acquire()
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._stats["queued"] -= 1
+            self._stats["running"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._lock:
+            self._stats["running"] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 대기열 길이(queued), 실행 중(running), 진행 중인 고유 요청(in_flight)과 누적 통계."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._in_flight)
+        stats["wait_avg"] = stats["wait_total"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
+
+
+class ApiGateway:
+    """백엔드 이름별 BackendGateway 모음."""
+
+    def __init__(self, backends: Dict[str, BackendGateway]):
+        self.backends = backends
+
+    def call(self, backend: str, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return self.backends[backend].call(key, func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: gateway.stats() for name, gateway in self.backends.items()}
+
+
+def create_default_gateway() -> ApiGateway:
+    """환경 변수로 백엔드별 한도를 정한 기본 게이트웨이. (한도는 프로세스 단위이므로 복제본 수로 나눠 설정)"""
+    def backend(name: str, rate: str, concurrency: str) -> BackendGateway:
+        prefix = f"STOCKLENS_{name.upper()}"
+        return BackendGateway(
+            name,
+            rate=float(os.getenv(f"{prefix}_RATE", rate)),
+            max_concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", concurrency)),
+            max_retries=int(os.getenv(f"{prefix}_RETRIES", "3")),
+        )
+    return ApiGateway({"vision": backend("vision", "10", "8"), "gemini": backend("gemini", "2", "4")})
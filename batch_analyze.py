@@ -0,0 +1,304 @@
+# --- 배치 분석 (Streamlit 없이) ---
+# 폴더나 목록 파일(manifest)의 제품 사진을 한꺼번에 분석해 결과를 JSONL로 저장합니다. (카탈로그 백필용)
+# - 전처리(디코딩/축소): CPU 작업이므로 프로세스 풀에서 실행
+# - Vision / Gemini 호출: I/O 대기이므로 스레드 풀에서 실행. 초당 요청 수/동시 호출 수는 앱과 같은 게이트웨이(api_gateway.py)가 제한
+# - 저장: 한 장이 끝날 때마다 한 줄씩 바로 기록. 중간에 멈춰도 같은 명령을 다시 실행하면 이미 성공한 사진은 건너뜀
+# - 결과 캐시(result_cache.py)를 앱과 공유하므로, 백필한 사진은 앱에서도 API 호출 없이 바로 결과가 나옴
+# 사진 한 장을 제품 하나로 분석합니다. (객체 탐지로 여러 제품을 나누지 않음)
+#
+# 사용법: python batch_analyze.py image --output results.jsonl [--api-workers 8] [--decode-workers 4]
+#         python batch_analyze.py --manifest photos.txt --output results.jsonl
+#   manifest: 한 줄에 사진 경로 하나, 또는 {"id": ..., "path": ...} JSON. 상대 경로는 manifest 위치 기준
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from analysis import (VISION_META_KEY, VISION_MODE, content_key, create_gemini_model, create_vision_client,
+                      request_gemini_profile, request_vision_annotations)
+from api_gateway import ApiGateway, create_default_gateway
+from image_preprocess import PreparedImage, prepare_image
+from result_cache import ResultCache
+from telemetry import get_telemetry, new_trace_id
+from ticker_index import TickerIndex, get_ticker_index
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def iter_directory(directory: str, recursive: bool = False) -> Iterator[Tuple[str, str]]:
+    """폴더의 사진을 (id, 경로) 형태로 하나씩 내보냅니다. id는 폴더 기준 상대 경로입니다."""
+    if recursive:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, directory), path
+        return
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            yield name, os.path.join(directory, name)
+
+
+def iter_manifest(manifest: str) -> Iterator[Tuple[str, str]]:
+    """manifest 파일을 한 줄씩 읽어 (id, 경로)를 내보냅니다. 빈 줄과 #으로 시작하는 줄은 건너뜁니다."""
+    base = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                path = entry["path"]
+                item_id = str(entry.get("id", path))
+            else:
+                path = item_id = line
+            yield item_id, path if os.path.isabs(path) else os.path.join(base, path)
+
+
+def load_checkpoint(output: str, retry_failed: bool = True) -> Set[str]:
+    """이미 기록된 결과에서 다시 처리하지 않을 id 목록을 읽습니다.
+
+    중단되면서 반쯤 써진 마지막 줄이 있으면 잘라내어, 이어서 쓰는 결과가 깨지지 않게 합니다.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output):
+        return done
+    valid_length = 0
+    with open(output, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                break
+            valid_length += len(raw)
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(record["id"])
+    if valid_length != os.path.getsize(output):
+        with open(output, "r+b") as f:
+            f.truncate(valid_length)
+    return done
+
+
+def _ignore_interrupt() -> None:
+    # Ctrl+C는 부모 프로세스만 처리하고, 전처리 프로세스는 부모가 종료시킴
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def prepare_file(path: str) -> Tuple[PreparedImage, float]:
+    """(프로세스 풀에서 실행) 사진 파일을 읽어 전처리하고 소요 시간과 함께 반환합니다."""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        prepared = prepare_image(f.read())
+    return prepared, time.perf_counter() - start
+
+
+class BatchAnalyzer:
+    """main_app.analyze_product와 같은 순서(결과 캐시 → Vision → Gemini → 종목코드 검증)로 사진 한 장을 분석합니다."""
+
+    def __init__(self, vision_client, gemini_model, gateway: ApiGateway, result_cache: Optional[ResultCache],
+                 ticker_index: TickerIndex, vision_mode: str = VISION_MODE):
+        self.vision_client = vision_client
+        self.gemini_model = gemini_model
+        self.gateway = gateway
+        self.result_cache = result_cache
+        self.ticker_index = ticker_index
+        self.vision_mode = vision_mode
+
+    def analyze(self, item_id: str, path: str, prepared: PreparedImage, preprocess_seconds: float) -> Dict:
+        """결과 한 줄(dict)을 반환합니다. 오류도 예외 대신 status="error" 결과로 돌려줍니다."""
+        new_trace_id()
+        telemetry = get_telemetry()
+        record = {"id": item_id, "path": path, "status": "error", "cached": False, "timings": {"preprocess": preprocess_seconds}}
+        stage = "cache"
+        started = time.perf_counter()
+        try:
+            cached = self.result_cache.get_by_hash(prepared.phash) if self.result_cache else None
+            telemetry.incr("cache_total", cache="result", result="hit" if cached else "miss")
+            if cached:
+                profile_info, vision_results = cached.get("profile_info"), cached.get("vision_results", {})
+                record["cached"] = True
+            else:
+                stage = "vision"
+                start = time.perf_counter()
+                vision_results = self.gateway.call(
+                    "vision", content_key(prepared.vision_bytes, self.vision_mode),
+                    request_vision_annotations, self.vision_client, prepared.vision_bytes, self.vision_mode)
+                record["timings"]["vision"] = time.perf_counter() - start
+                stage = "gemini"
+                start = time.perf_counter()
+                profile_info = self.gateway.call(
+                    "gemini", content_key(prepared.gemini_bytes, vision_results, prepared.mime_type),
+                    request_gemini_profile, self.gemini_model, prepared.gemini_bytes, vision_results, prepared.mime_type)
+                record["timings"]["gemini"] = time.perf_counter() - start
+                if self.result_cache and profile_info:
+                    self.result_cache.put_by_hash(prepared.phash, {"vision_results": vision_results, "profile_info": profile_info})
+            stage = "validate"
+            record["profile_info"] = self.ticker_index.validate_profile(profile_info)
+            record["vision"] = vision_results.get(VISION_META_KEY)
+            record["status"] = "ok" if profile_info else "error"
+            if not profile_info:
+                record.update(error="빈 응답", error_stage="gemini")
+        except Exception as e:
+            record.update(error=f"{type(e).__name__}: {e}", error_stage=stage)
+        telemetry.observe("analyze", time.perf_counter() - started, cached=record["cached"], ok=record["status"] == "ok")
+        return record
+
+
+@dataclass
+class BatchSummary:
+    ok: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    interrupted: bool = False
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def processed(self) -> int:
+        return self.ok + self.failed
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+def run_batch(inputs: Iterator[Tuple[str, str]], output: str, analyzer: BatchAnalyzer, decode_workers: int = 2,
+              api_workers: int = 8, max_pending: Optional[int] = None, retry_failed: bool = True,
+              limit: Optional[int] = None, progress_seconds: float = 10.0) -> BatchSummary:
+    """inputs의 사진을 분석해 output(JSONL)에 한 줄씩 추가합니다. 이미 성공한 id는 건너뜁니다.
+
+    메모리를 일정하게 유지하기 위해 전처리/분석 중인 사진 수를 max_pending개로 제한하며,
+    입력은 필요한 만큼만 읽습니다. (수천 장짜리 manifest도 한꺼번에 읽지 않음)
+    """
+    done = load_checkpoint(output, retry_failed)
+    max_pending = max_pending or (2 * api_workers + decode_workers)
+    summary = BatchSummary()
+    telemetry = get_telemetry()
+    decode_pool = ProcessPoolExecutor(max_workers=decode_workers, initializer=_ignore_interrupt)
+    api_pool = ThreadPoolExecutor(max_workers=api_workers, thread_name_prefix="batch-api")
+    decoding: Dict[Future, Tuple[str, str]] = {}
+    analyzing: Dict[Future, Tuple[str, str]] = {}
+    submitted = 0
+    exhausted = False
+    start = last_progress = time.perf_counter()
+
+    def write(out, record: Dict) -> None:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()             # 한 줄씩 바로 기록해야 중단 후 이어서 실행할 수 있음
+        if record["status"] == "ok":
+            summary.ok += 1
+        else:
+            summary.failed += 1
+            stage = record.get("error_stage", "?")
+            summary.errors[stage] = summary.errors.get(stage, 0) + 1
+
+    with open(output, "a", encoding="utf-8") as out:
+        try:
+            while True:
+                while not exhausted and len(decoding) + len(analyzing) < max_pending:
+                    item = next(inputs, None)
+                    if item is None or (limit is not None and submitted >= limit):
+                        exhausted = True
+                        break
+                    if item[0] in done:
+                        summary.skipped += 1
+                        continue
+                    done.add(item[0])       # 같은 실행 안에서 중복된 id도 한 번만 처리
+                    decoding[decode_pool.submit(prepare_file, item[1])] = item
+                    submitted += 1
+                if not decoding and not analyzing:
+                    break
+                finished, _ = wait([*decoding, *analyzing], timeout=progress_seconds, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in decoding:
+                        item_id, path = decoding.pop(future)
+                        try:
+                            prepared, seconds = future.result()
+                        except Exception as e:
+                            write(out, {"id": item_id, "path": path, "status": "error",
+                                        "error": f"{type(e).__name__}: {e}", "error_stage": "preprocess"})
+                            continue
+                        telemetry.observe("preprocess", seconds, original_bytes=prepared.original_bytes)
+                        analyzing[api_pool.submit(analyzer.analyze, item_id, path, prepared, seconds)] = (item_id, path)
+                    else:
+                        analyzing.pop(future)
+                        write(out, future.result())
+                now = time.perf_counter()
+                if progress_seconds and now - last_progress >= progress_seconds:
+                    last_progress = now
+                    print(f"[batch] 완료 {summary.processed} (실패 {summary.failed}, 건너뜀 {summary.skipped}), "
+                          f"진행 중 {len(decoding) + len(analyzing)}, {summary.processed / (now - start):.2f}장/초", file=sys.stderr)
+        except KeyboardInterrupt:
+            # 대기 중인 사진은 취소하고, 이미 호출 중인 API 결과는 쿼터가 아까우니 끝까지 기다려 기록
+            # 같은 명령을 다시 실행하면 남은 사진부터 이어서 처리
+            summary.interrupted = True
+            print("[batch] 중단 요청 - 진행 중인 API 호출만 마무리합니다.", file=sys.stderr)
+            for future in [*decoding, *analyzing]:
+                future.cancel()
+            for future in analyzing:
+                if not future.cancelled():
+                    write(out, future.result())
+        finally:
+            decode_pool.shutdown(wait=True, cancel_futures=True)
+            api_pool.shutdown(wait=True, cancel_futures=True)
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def _create_clients(fake: bool):
+    if fake:
+        # 가짜 백엔드(benchmarks/fake_backends.py)로 API 쿼터 없이 배치 흐름과 처리량을 확인
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+        from fake_backends import FakeGeminiModel, FakeVisionClient, LatencyProfile
+        return FakeVisionClient(LatencyProfile(300)), FakeGeminiModel(LatencyProfile(2500))
+    from dotenv import load_dotenv
+    load_dotenv()
+    return create_vision_client(), create_gemini_model()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="폴더/manifest의 제품 사진을 Streamlit 없이 일괄 분석해 JSONL로 저장")
+    parser.add_argument("directory", nargs="?", help="사진 폴더 (예: image)")
+    parser.add_argument("--manifest", help="사진 경로 목록 파일 (폴더 대신 사용)")
+    parser.add_argument("--recursive", action="store_true", help="하위 폴더까지 포함")
+    parser.add_argument("--output", default="batch_results.jsonl", help="결과 JSONL (체크포인트로도 사용)")
+    parser.add_argument("--decode-workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)), help="전처리 프로세스 수")
+    parser.add_argument("--api-workers", type=int, default=8, help="API 호출 스레드 수")
+    parser.add_argument("--max-pending", type=int, help="동시에 메모리에 올려둘 최대 사진 수 (기본: 2 x api-workers + decode-workers)")
+    parser.add_argument("--limit", type=int, help="이번 실행에서 처리할 최대 사진 수")
+    parser.add_argument("--vision-mode", default=VISION_MODE, choices=["all", "cascade"])
+    parser.add_argument("--skip-failed", action="store_true", help="이전 실행에서 실패한 사진도 다시 처리하지 않음")
+    parser.add_argument("--no-cache", action="store_true", help="결과 캐시를 읽거나 쓰지 않음")
+    parser.add_argument("--fake", action="store_true", help="가짜 Vision/Gemini로 실행 (API 호출 없음, 결과 캐시 사용 안 함)")
+    parser.add_argument("--progress", type=float, default=10.0, help="진행 상황 출력 간격(초)")
+    args = parser.parse_args()
+    if bool(args.directory) == bool(args.manifest):
+        parser.error("사진 폴더 또는 --manifest 중 하나를 지정하세요.")
+
+    vision_client, gemini_model = _create_clients(args.fake)
+    analyzer = BatchAnalyzer(vision_client, gemini_model, create_default_gateway(),
+                             None if (args.no_cache or args.fake) else ResultCache(), get_ticker_index(), args.vision_mode)
+    inputs = iter_manifest(args.manifest) if args.manifest else iter_directory(args.directory, args.recursive)
+    summary = run_batch(inputs, args.output, analyzer, args.decode_workers, args.api_workers, args.max_pending,
+                        retry_failed=not args.skip_failed, limit=args.limit, progress_seconds=args.progress)
+
+    print(f"{'중단됨 - ' if summary.interrupted else ''}완료 {summary.processed}장 (성공 {summary.ok}, 실패 {summary.failed}, "
+          f"건너뜀 {summary.skipped}) / {summary.elapsed:.1f}초, {summary.throughput:.2f}장/초 → {args.output}")
+    if summary.errors:
+        print(f"단계별 실패: {summary.errors}")
+    stages = get_telemetry().snapshot()["stages"]
+    for stage in sorted(stages):
+        s = stages[stage]
+        print(f"  {stage:<14} {s['count']:>6}회  p50 {s['p50_ms']:>8.1f}ms  p95 {s['p95_ms']:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# --- 차트 생성 벤치마크 ---
+# 기간(1M/1Y/5Y/max)별로 단일 종목 차트와 비교 차트를 만들 때 걸리는 시간과, 브라우저로 보내는 JSON 크기를 측정합니다.
+# 주가는 fake_backends.FakeDataReader의 가짜 일봉(2000년부터)을 사용하므로 네트워크를 쓰지 않습니다.
+#   - 생성 : charts.build_price_chart / build_comparison_chart (캐시 miss 때 한 번 드는 비용)
+#   - 직렬화 : st.plotly_chart와 같은 방식(to_dict → plotly.io.to_json)으로 JSON을 만드는 시간 (캐시 hit, rerun마다 드는 비용)
+#   - 크기 : 직렬화한 JSON 바이트 수. 다운샘플 덕분에 기간이 길어져도 거의 일정해야 함
+#
+# 사용법: python benchmarks/bench_charts.py [--repeat 5] [--tickers AAPL 005930 ^KS11] [--width 720] [--json]
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import plotly.io as pio
+
+from charts import CHART_WIDTH_PX, MA_LOOKBACK_BARS, build_comparison_chart, build_price_chart
+from price_store import RANGES, lookback_start, range_start
+
+from fake_backends import FakeDataReader, LatencyProfile
+
+
+def _median_ms(func, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def _serialize(fig) -> str:
+    return pio.to_json(fig.to_dict(), validate=False)
+
+
+def bench_range(reader: FakeDataReader, tickers: List[str], range_key: str, repeat: int, width: int) -> Dict:
+    start = range_start(range_key)
+    prices = {ticker: reader(ticker, start) for ticker in tickers}
+    # 단일 차트는 앱과 같이 이동평균 계산용 앞부분을 함께 받음
+    history = reader(tickers[0], lookback_start(start, MA_LOOKBACK_BARS))
+    single_ms, single = _median_ms(lambda: build_price_chart(history, tickers[0], range_key, width), repeat)
+    compare_ms, compare = _median_ms(lambda: build_comparison_chart(prices, range_key, width), repeat)
+    single_json_ms, single_json = _median_ms(lambda: _serialize(single), repeat)
+    compare_json_ms, compare_json = _median_ms(lambda: _serialize(compare), repeat)
+    return {
+        "range": range_key,
+        "rows": len(prices[tickers[0]]),
+        "single": {"build_ms": single_ms, "serialize_ms": single_json_ms, "bytes": len(single_json),
+                   "traces": [type(trace).__name__ for trace in single.data]},
+        "comparison": {"build_ms": compare_ms, "serialize_ms": compare_json_ms, "bytes": len(compare_json),
+                       "traces": [type(trace).__name__ for trace in compare.data]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="기간별 차트 생성 시간과 JSON 크기 측정 (가짜 주가 사용)")
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--tickers", nargs="+", default=["AAPL", "005930", "^KS11"], help="비교 차트 종목 (첫 종목이 단일 차트)")
+    parser.add_argument("--width", type=int, default=CHART_WIDTH_PX, help="차트 폭(px) 예산")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    reader = FakeDataReader(LatencyProfile(0, sigma=0))
+    report = [bench_range(reader, args.tickers, range_key, args.repeat, args.width) for range_key in RANGES]
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"차트 폭 {args.width}px, 반복 {args.repeat}회 중앙값")
+    print(f"{'기간':<6}{'일봉':>7}  {'차트':<6}{'생성':>10}{'직렬화':>10}{'JSON':>10}  트레이스")
+    for row in report:
+        for name, label in (("single", "단일"), ("comparison", "비교")):
+            item = row[name]
+            print(f"{row['range']:<6}{row['rows']:>7}  {label:<6}{item['build_ms']:>8.1f}ms{item['serialize_ms']:>8.1f}ms"
+                  f"{item['bytes'] / 1024:>8.1f}KB  {', '.join(item['traces'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# --- Vision 힌트 압축 벤치마크 ---
+# 같은 Vision 결과로 '압축 없이 전체 힌트(기존)' 와 '토큰 예산 안으로 압축한 힌트' 프롬프트를 비교합니다.
+# - 힌트 크기: 추정 토큰 수, 항목 수, 압축에 걸린 시간 (API 호출 없음)
+# - --gemini: 두 프롬프트로 실제 Gemini를 호출해 응답 시간과 실제 프롬프트 토큰 수(usage_metadata)를 비교 (GEMINI_API_KEY 필요)
+# Vision 결과는 --image-dir 의 사진으로 실제 Vision API(all 모드)를 호출해 얻거나(GCP 인증 필요),
+# --hints-file 로 미리 저장해둔 결과 목록(JSON, [{"image": 파일 이름, "vision_results": {...}}, ...])을 읽습니다.
+#
+# 사용법: python benchmarks/bench_hint_compaction.py [--image-dir image | --hints-file hints.json] [--budget 300]
+#                                                    [--gemini] [--repeat 3] [--save-hints hints.json] [--json]
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import gemini_contents, request_vision_annotations
+from hint_compaction import compaction_stats
+from image_preprocess import prepare_image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def load_samples(args) -> List[Dict]:
+    if args.hints_file:
+        with open(args.hints_file, encoding="utf-8") as f:
+            samples = json.load(f)
+        # Gemini에는 이미지도 함께 보내므로, --image-dir 에 같은 이름의 사진이 있으면 전처리해서 붙여둠
+        for sample in samples:
+            path = os.path.join(args.image_dir, sample["image"])
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    prepared = prepare_image(f.read())
+                sample.update(gemini_bytes=prepared.gemini_bytes, mime_type=prepared.mime_type)
+        return samples
+    import google.auth
+    from google.cloud import vision
+    credentials, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-vision'])
+    vision_client = vision.ImageAnnotatorClient(credentials=credentials)
+    samples = []
+    for name in sorted(os.listdir(args.image_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        with open(os.path.join(args.image_dir, name), "rb") as f:
+            prepared = prepare_image(f.read())
+        samples.append({"image": name, "vision_results": request_vision_annotations(vision_client, prepared.vision_bytes, "all"),
+                        "gemini_bytes": prepared.gemini_bytes, "mime_type": prepared.mime_type})
+    return samples
+
+
+def time_gemini(gemini_model, sample: Dict, budget: int, repeat: int) -> Dict:
+    contents = gemini_contents(sample["gemini_bytes"], sample["vision_results"], sample["mime_type"], budget)
+    times, prompt_tokens = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = gemini_model.generate_content(contents)
+        times.append(time.perf_counter() - start)
+        prompt_tokens = response.usage_metadata.prompt_token_count
+    return {"latency_ms": statistics.median(times) * 1000, "prompt_tokens": prompt_tokens}
+
+
+def bench_sample(sample: Dict, budget: int, gemini_model=None, repeat: int = 1) -> Dict:
+    start = time.perf_counter()
+    stats = compaction_stats(sample["vision_results"], budget)
+    row = {"image": sample["image"], **stats, "compact_ms": (time.perf_counter() - start) * 1000}
+    if gemini_model is not None and "gemini_bytes" in sample:
+        before = time_gemini(gemini_model, sample, 0, repeat)       # 예산 0 = 압축하지 않음
+        after = time_gemini(gemini_model, sample, budget, repeat)
+        row.update(gemini_ms_before=before["latency_ms"], gemini_ms_after=after["latency_ms"],
+                   prompt_tokens_before=before["prompt_tokens"], prompt_tokens_after=after["prompt_tokens"])
+    return row
+
+
+def _median(rows: List[Dict], key: str) -> Optional[float]:
+    values = [row[key] for row in rows if key in row]
+    return statistics.median(values) if values else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vision 힌트 압축 전/후 프롬프트 크기와 Gemini 응답 시간 비교")
+    parser.add_argument("--image-dir", default="image")
+    parser.add_argument("--hints-file", help="저장해둔 Vision 결과 목록 JSON (지정하면 Vision API를 호출하지 않음)")
+    parser.add_argument("--save-hints", help="Vision 결과를 이 파일에 저장 (다음 실행에서 --hints-file로 재사용)")
+    parser.add_argument("--budget", type=int, default=300, help="힌트 토큰 예산")
+    parser.add_argument("--gemini", action="store_true", help="실제 Gemini를 호출해 응답 시간 비교")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    samples = load_samples(args)
+    if args.save_hints:
+        with open(args.save_hints, "w", encoding="utf-8") as f:
+            json.dump([{"image": s["image"], "vision_results": s["vision_results"]} for s in samples], f, ensure_ascii=False, indent=2)
+    gemini_model = None
+    if args.gemini:
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+        load_dotenv()
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        gemini_model = genai.GenerativeModel('gemini-1.5-pro-latest')     # main_app.py와 같은 모델
+    rows = [bench_sample(sample, args.budget, gemini_model, args.repeat) for sample in samples]
+    summary = {
+        "samples": len(rows),
+        "budget": args.budget,
+        "tokens_before_total": sum(row["tokens_before"] for row in rows),
+        "tokens_after_total": sum(row["tokens_after"] for row in rows),
+        "tokens_before_max": max((row["tokens_before"] for row in rows), default=0),
+        "tokens_after_max": max((row["tokens_after"] for row in rows), default=0),
+        "compact_ms_median": _median(rows, "compact_ms"),
+        "gemini_ms_median_before": _median(rows, "gemini_ms_before"),
+        "gemini_ms_median_after": _median(rows, "gemini_ms_after"),
+    }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "samples": rows}, ensure_ascii=False, indent=2))
+        return
+    print(f"{'image':<24}{'tokens':>16}{'items':>12}{'compact(ms)':>13}{'gemini(ms)':>18}")
+    for row in rows:
+        gemini = f"{row['gemini_ms_before']:.0f} -> {row['gemini_ms_after']:.0f}" if "gemini_ms_before" in row else "-"
+        print(f"{row['image']:<24}{row['tokens_before']:>7} -> {row['tokens_after']:<5}{row['items_before']:>5} -> {row['items_after']:<4}"
+              f"{row['compact_ms']:>11.1f}{gemini:>18}")
+    print(f"\n힌트 토큰 합계(추정): {summary['tokens_before_total']} -> {summary['tokens_after_total']} "
+          f"(최대 {summary['tokens_before_max']} -> {summary['tokens_after_max']}, 예산 {args.budget})")
+    if summary["gemini_ms_median_before"] is not None:
+        print(f"Gemini 응답 시간 중앙값: {summary['gemini_ms_median_before']:.0f}ms -> {summary['gemini_ms_median_after']:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
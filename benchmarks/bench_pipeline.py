@@ -0,0 +1,216 @@
+# --- 오프라인 파이프라인 벤치마크 ---
+# image/ 폴더의 사진으로 '전처리 → Vision → Gemini → 주가 조회 → 차트 생성' 전체 흐름을 Streamlit 없이 실행합니다.
+# Vision / Gemini / fdr.DataReader는 fake_backends.py의 가짜 백엔드를 사용하므로 API 쿼터를 쓰지 않으며,
+# 게이트웨이(api_gateway.py), 힌트 압축, 주가 저장소, 단계별 추적(telemetry.py)은 실제 코드를 그대로 사용합니다.
+# 동시 실행 수별로 처리량, 지연 시간 백분위, 메모리 최대치, 단계별 소요 시간을 측정하고 JSON으로 저장할 수 있습니다.
+#
+# 사용법: python benchmarks/bench_pipeline.py [--concurrency 1 4 8] [--iterations 3] [--vision-ms 300] [--gemini-ms 2500]
+#                                             [--failure-rate 0.02] [--output result.json] [--compare previous.json]
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analysis import content_key, request_gemini_profile, request_vision_annotations, stream_gemini_profile
+from api_gateway import ApiGateway, BackendGateway
+from charts import MA_LOOKBACK_BARS, build_price_chart
+from image_preprocess import prepare_image
+from price_store import PriceStore
+from telemetry import get_telemetry, new_trace_id
+from ticker_index import NO_TICKER
+
+from fake_backends import FakeDataReader, FakeGeminiModel, FakeVisionClient, LatencyProfile
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1000,
+            "mean_ms": statistics.mean(values) * 1000}
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:     # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if platform.system() == "Darwin" else rss / 1024     # macOS는 bytes, Linux는 KB
+
+
+class Pipeline:
+    """가짜 백엔드와 실제 게이트웨이/주가 저장소로 구성한 main_app.py 분석 흐름."""
+
+    def __init__(self, args, data_dir: str):
+        self.args = args
+        self.vision_client = FakeVisionClient(LatencyProfile(args.vision_ms, args.sigma, args.failure_rate), args.seed,
+                                              web_entities=args.web_entities, ocr_words=args.ocr_words)
+        self.gemini_model = FakeGeminiModel(LatencyProfile(args.gemini_ms, args.sigma, args.failure_rate), args.seed,
+                                            response_chars=args.response_chars)
+        self.reader = FakeDataReader(LatencyProfile(args.price_ms, args.sigma, args.failure_rate), args.seed)
+        self.price_store = PriceStore(os.path.join(data_dir, "prices.sqlite3"), reader=self.reader)
+        # 재시도 대기는 실제보다 짧게 (벤치마크 시간 단축). 한도는 create_default_gateway와 같은 기본값
+        self.gateway = ApiGateway({
+            "vision": BackendGateway("vision", rate=args.vision_rate, max_concurrency=8, base_delay=0.05),
+            "gemini": BackendGateway("gemini", rate=args.gemini_rate, max_concurrency=4, base_delay=0.05),
+        })
+
+    def run(self, job: Tuple[str, bytes, int]) -> Dict:
+        name, image_bytes, iteration = job
+        telemetry = get_telemetry()
+        new_trace_id()
+        # 같은 사진을 반복해도 게이트웨이에서 합쳐지지 않도록 반복 번호를 키에 넣음 (--coalesce 이면 합쳐짐)
+        salt = None if self.args.coalesce else iteration
+        start = time.perf_counter()
+        result = {"image": name, "iteration": iteration, "ok": False}
+        try:
+            with telemetry.span("preprocess", original_bytes=len(image_bytes)):
+                prepared = prepare_image(image_bytes)
+            vision_results = self.gateway.call(
+                "vision", content_key(prepared.vision_bytes, self.args.vision_mode, salt),
+                request_vision_annotations, self.vision_client, prepared.vision_bytes, self.args.vision_mode)
+            gemini = stream_gemini_profile if self.args.stream else request_gemini_profile
+            profile = self.gateway.call(
+                "gemini", content_key(prepared.gemini_bytes, vision_results, prepared.mime_type, salt),
+                gemini, self.gemini_model, prepared.gemini_bytes, vision_results, prepared.mime_type)
+            ticker = (profile or {}).get("종목코드")
+            if ticker and ticker != NO_TICKER:
+                with telemetry.span("price_history", ticker=ticker, range=self.args.range):
+                    df_stock = self.price_store.get_history(ticker, self.args.range, MA_LOOKBACK_BARS)
+                if not df_stock.empty:
+                    build_price_chart(df_stock, ticker, self.args.range)
+            result["ok"] = bool(profile)
+        except Exception as e:
+            result["error"] = type(e).__name__
+        result["seconds"] = time.perf_counter() - start
+        telemetry.observe("analyze", result["seconds"], ok=result["ok"])
+        return result
+
+
+def run_level(args, images: List[Tuple[str, bytes]], concurrency: int) -> Dict:
+    telemetry = get_telemetry()
+    telemetry.reset()
+    jobs = [(name, data, i) for i in range(args.iterations) for name, data in images]
+    with tempfile.TemporaryDirectory() as data_dir:
+        pipeline = Pipeline(args, data_dir)
+        if args.tracemalloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(pipeline.run, jobs))
+        wall = time.perf_counter() - start
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if args.tracemalloc else None
+        if args.tracemalloc:
+            tracemalloc.stop()
+        backend_calls = {"vision": pipeline.vision_client.calls, "gemini": pipeline.gemini_model.calls, "price": pipeline.reader.calls}
+        gateway_stats = pipeline.gateway.stats()
+    errors: Dict[str, int] = {}
+    for r in results:
+        if "error" in r:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "jobs": len(jobs),
+        "ok": sum(r["ok"] for r in results),
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_per_s": len(jobs) / wall if wall else 0.0,
+        "latency": _percentiles([r["seconds"] for r in results]),
+        "stages": telemetry.snapshot()["stages"],
+        "counters": telemetry.snapshot()["counters"],
+        "backend_calls": backend_calls,
+        "gateway": {name: {k: s[k] for k in ("attempts", "retries", "failures", "coalesced", "wait_avg", "wait_max")}
+                    for name, s in gateway_stats.items()},
+        "memory": {"tracemalloc_peak_mb": traced_peak, "max_rss_mb": _max_rss_mb()},
+    }
+
+
+def print_report(runs: List[Dict], previous: Optional[Dict]) -> None:
+    before = {run["concurrency"]: run for run in (previous or {}).get("runs", [])}
+    print(f"{'conc':>5}{'jobs':>6}{'ok':>5}{'thru/s':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'rss(MB)':>9}")
+    for run in runs:
+        lat = run["latency"]
+        rss = run["memory"]["max_rss_mb"]
+        print(f"{run['concurrency']:>5}{run['jobs']:>6}{run['ok']:>5}{run['throughput_per_s']:>9.2f}"
+              f"{lat.get('p50_ms', 0):>10.0f}{lat.get('p95_ms', 0):>10.0f}{lat.get('p99_ms', 0):>10.0f}"
+              f"{rss if rss is not None else float('nan'):>9.0f}")
+        old = before.get(run["concurrency"])
+        if old:
+            delta = lambda new, prev: f"{100 * (new - prev) / prev:+.1f}%" if prev else "-"
+            print(f"{'':>5}  이전 대비: 처리량 {delta(run['throughput_per_s'], old['throughput_per_s'])}, "
+                  f"p95 {delta(lat.get('p95_ms', 0), old['latency'].get('p95_ms', 0))}")
+    last = runs[-1]
+    print(f"\n단계별 소요 시간 (동시 실행 {last['concurrency']})")
+    print(f"{'stage':<18}{'count':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for stage, s in sorted(last["stages"].items()):
+        print(f"{stage:<18}{s['count']:>7}{s['mean_ms']:>9.1f}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+    for name, g in last["gateway"].items():
+        print(f"게이트웨이 {name}: 시도 {g['attempts']}, 재시도 {g['retries']}, 실패 {g['failures']}, "
+              f"평균 대기 {g['wait_avg'] * 1000:.0f}ms (최대 {g['wait_max'] * 1000:.0f}ms)")
+    if last["errors"]:
+        print(f"실패: {last['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="가짜 백엔드로 파이프라인 전체 처리량/지연 시간 측정")
+    parser.add_argument("--image-dir", default="image")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="동시 실행 수 (여러 개 지정 가능)")
+    parser.add_argument("--iterations", type=int, default=3, help="사진별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vision-ms", type=float, default=300, help="Vision 호출 지연 중앙값")
+    parser.add_argument("--gemini-ms", type=float, default=2500, help="Gemini 호출 지연 중앙값")
+    parser.add_argument("--price-ms", type=float, default=400, help="주가 조회 지연 중앙값")
+    parser.add_argument("--sigma", type=float, default=0.4, help="지연 시간 로그정규 분산")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="호출별 일시 장애 확률")
+    parser.add_argument("--web-entities", type=int, default=15, help="Vision 웹 엔티티 수 평균")
+    parser.add_argument("--ocr-words", type=int, default=60, help="Vision OCR 단어 수 평균")
+    parser.add_argument("--response-chars", type=int, default=1200, help="Gemini 응답 길이 평균")
+    parser.add_argument("--vision-rate", type=float, default=10, help="게이트웨이 Vision 초당 요청 수")
+    parser.add_argument("--gemini-rate", type=float, default=2, help="게이트웨이 Gemini 초당 요청 수")
+    parser.add_argument("--vision-mode", default="all", choices=["all", "cascade"])
+    parser.add_argument("--stream", action="store_true", help="Gemini 스트리밍 경로 사용")
+    parser.add_argument("--coalesce", action="store_true", help="같은 사진의 반복 요청을 게이트웨이에서 합치도록 허용")
+    parser.add_argument("--range", default="1Y", help="주가 조회 기간")
+    parser.add_argument("--tracemalloc", action="store_true", help="파이썬 메모리 할당 최대치 측정 (느려짐)")
+    parser.add_argument("--output", help="결과 JSON을 저장할 경로")
+    parser.add_argument("--compare", help="이전 결과 JSON과 처리량/p95 비교")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    images = []
+    for name in sorted(os.listdir(args.image_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(args.image_dir, name), "rb") as f:
+                images.append((name, f.read()))
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "json")}
+    report = {"config": config, "python": platform.python_version(),
+              "runs": [run_level(args, images, concurrency) for concurrency in args.concurrency]}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(report["runs"], previous)
+
+
+if __name__ == "__main__":
+    main()
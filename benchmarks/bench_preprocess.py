@@ -0,0 +1,98 @@
+# --- 이미지 전처리 벤치마크 ---
+# image/ 폴더의 사진으로 '원본 그대로 두 번 전송(기존)' 과 '한 번 디코딩 후 축소 전송(전처리)'을 비교합니다.
+# 실제 API를 호출하지 않으므로 업로드 시간은 지정한 업링크 대역폭으로 추정합니다.
+#
+# 사용법: python benchmarks/bench_preprocess.py [--image-dir image] [--uplink-mbps 10] [--repeat 5] [--json]
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from image_preprocess import prepare_image
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def _baseline(image_bytes: bytes) -> None:
+    # 기존 main_app.py: Vision에는 원본 bytes를 그대로, Gemini에는 원본을 다시 디코딩한 이미지를 전달
+    Image.open(io.BytesIO(image_bytes)).load()
+
+
+def bench_image(path: str, repeat: int, uplink_mbps: float) -> Dict:
+    with open(path, "rb") as f:
+        image_bytes = f.read()
+    baseline_times: List[float] = []
+    prepare_times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _baseline(image_bytes)
+        baseline_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        prepared = prepare_image(image_bytes)
+        prepare_times.append(time.perf_counter() - start)
+
+    bytes_per_second = uplink_mbps * 1_000_000 / 8
+    baseline_upload = 2 * len(image_bytes)
+    prepared_upload = len(prepared.vision_bytes) + len(prepared.gemini_bytes)
+    baseline_ms = (statistics.median(baseline_times) + baseline_upload / bytes_per_second) * 1000
+    prepared_ms = (statistics.median(prepare_times) + prepared_upload / bytes_per_second) * 1000
+    return {
+        "image": os.path.basename(path),
+        "original_size": list(prepared.original_size),
+        "baseline_upload_bytes": baseline_upload,
+        "prepared_upload_bytes": prepared_upload,
+        "vision_bytes": len(prepared.vision_bytes),
+        "gemini_bytes": len(prepared.gemini_bytes),
+        "prepare_ms": statistics.median(prepare_times) * 1000,
+        "baseline_est_ms": baseline_ms,
+        "prepared_est_ms": prepared_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="이미지 전처리 크기/지연 시간 벤치마크")
+    parser.add_argument("--image-dir", default="image")
+    parser.add_argument("--uplink-mbps", type=float, default=10.0, help="업로드 시간 추정에 쓸 업링크 대역폭")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.image_dir, name) for name in os.listdir(args.image_dir)
+                   if name.lower().endswith(IMAGE_EXTENSIONS))
+    rows = [bench_image(path, args.repeat, args.uplink_mbps) for path in paths]
+    total_before = sum(row["baseline_upload_bytes"] for row in rows)
+    total_after = sum(row["prepared_upload_bytes"] for row in rows)
+    summary = {
+        "images": len(rows),
+        "uplink_mbps": args.uplink_mbps,
+        "upload_bytes_before": total_before,
+        "upload_bytes_after": total_after,
+        "upload_reduction_pct": 100 * (1 - total_after / total_before) if total_before else 0.0,
+        "est_ms_before": sum(row["baseline_est_ms"] for row in rows),
+        "est_ms_after": sum(row["prepared_est_ms"] for row in rows),
+    }
+
+    if args.json:
+        print(json.dumps({"summary": summary, "images": rows}, ensure_ascii=False, indent=2))
+        return
+    print(f"{'image':<28}{'size':>12}{'before(KB)':>12}{'after(KB)':>11}{'prep(ms)':>10}{'est before':>12}{'est after':>11}")
+    for row in rows:
+        size = "x".join(str(v) for v in row["original_size"])
+        print(f"{row['image']:<28}{size:>12}{row['baseline_upload_bytes'] / 1024:>12.1f}"
+              f"{row['prepared_upload_bytes'] / 1024:>11.1f}{row['prepare_ms']:>10.1f}"
+              f"{row['baseline_est_ms']:>11.0f}ms{row['prepared_est_ms']:>9.0f}ms")
+    print(f"\n업로드 합계: {total_before / 1024:.1f}KB -> {total_after / 1024:.1f}KB "
+          f"({summary['upload_reduction_pct']:.1f}% 감소, 업링크 {args.uplink_mbps}Mbps 기준 "
+          f"{summary['est_ms_before']:.0f}ms -> {summary['est_ms_after']:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# --- 콜드 스타트 벤치마크 ---
+# 새 컨테이너가 뜬 직후 사용자가 겪는 시간을 새 파이썬 프로세스에서 측정합니다. (매 측정마다 프로세스를 새로 띄워 캐시 영향 없음)
+#   1) 임포트 시간 : 주요 라이브러리와 앱 모듈별 임포트 시간 (중앙값)
+#   2) 첫 화면 : Streamlit AppTest로 main_app.py의 첫 실행(업로드 화면)이 끝날 때까지 걸린 시간
+#   3) rerun 비용 : 같은 세션에서 스크립트를 다시 실행할 때마다 드는 시간 (상호작용마다 발생)
+#   4) 워밍업 : warmup.py의 작업별 초기화 시간 (자격 증명/모델이 없으면 실패로 표시되며 시간은 그대로 측정)
+# 실제 API는 호출하지 않습니다. 변경 전후 비교는 --script로 이전 버전의 main_app.py를 저장소 폴더에 두고 실행합니다.
+#
+# 사용법: python benchmarks/bench_startup.py [--script main_app.py] [--repeat 3] [--reruns 10] [--no-warmup] [--json]
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 무거운 라이브러리 → 앱 모듈 순서
+MODULES = [
+    "streamlit", "pandas", "plotly.express", "google.generativeai", "google.cloud.vision",
+    "FinanceDataReader", "ultralytics",
+    "telemetry", "warmup", "analysis", "price_store", "charts", "results_view",
+]
+
+_IMPORT_CODE = """
+import time, importlib
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+_APP_CODE = """
+import sys, json, time, statistics
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter() - start
+at = AppTest.from_file({script!r}, default_timeout=120)
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+reruns = []
+for _ in range({reruns}):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({{"streamlit_import": imported, "first_render": first, "reruns": reruns,
+                  "exception": [str(e.value) for e in at.exception], "elements": len(at.main.children)}}))
+"""
+
+_WARMUP_CODE = """
+import json, time
+start = time.perf_counter()
+from warmup import get_warmup
+warmup = get_warmup().start()
+while any(s["state"] in ("pending", "running") for s in warmup.status()):
+    time.sleep(0.02)
+print(json.dumps({{"total": time.perf_counter() - start, "tasks": warmup.status()}}))
+"""
+
+
+def _python(code: str, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+
+
+def bench_imports(repeat: int) -> List[Dict]:
+    results = []
+    for module in MODULES:
+        times = []
+        for _ in range(repeat):
+            proc = _python(_IMPORT_CODE.format(module=module))
+            if proc.returncode != 0:
+                break
+            times.append(float(proc.stdout.strip().splitlines()[-1]))
+        results.append({"module": module, "ms": statistics.median(times) * 1000 if times else None,
+                        "error": None if times else proc.stderr.strip().splitlines()[-1]})
+    return results
+
+
+def bench_app(script: str, repeat: int, reruns: int, warmup: bool) -> Dict:
+    # 첫 화면 측정은 프로세스마다 한 번씩만 가능하므로 repeat번 새로 띄워 중앙값을 사용
+    runs = []
+    env = {"STOCKLENS_WARMUP": "1" if warmup else "0"}
+    for _ in range(repeat):
+        proc = _python(_APP_CODE.format(script=script, reruns=reruns), env)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip())
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    rerun_times = [t for run in runs for t in run["reruns"]]
+    return {
+        "script": script,
+        "warmup": warmup,
+        "streamlit_import_ms": statistics.median(r["streamlit_import"] for r in runs) * 1000,
+        "first_render_ms": statistics.median(r["first_render"] for r in runs) * 1000,
+        "rerun_p50_ms": statistics.median(rerun_times) * 1000 if rerun_times else None,
+        "rerun_max_ms": max(rerun_times) * 1000 if rerun_times else None,
+        "elements": runs[-1]["elements"],
+        "exceptions": runs[-1]["exception"],
+    }
+
+
+def bench_warmup() -> Dict:
+    proc = _python(_WARMUP_CODE.format())
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="임포트 시간, 첫 화면까지 걸리는 시간, rerun 비용, 워밍업 시간 측정")
+    parser.add_argument("--script", default="main_app.py", help="측정할 Streamlit 스크립트 (저장소 폴더 기준)")
+    parser.add_argument("--repeat", type=int, default=3, help="새 프로세스로 반복 측정할 횟수")
+    parser.add_argument("--reruns", type=int, default=10, help="첫 화면 이후 다시 실행할 횟수")
+    parser.add_argument("--no-warmup", action="store_true", help="백그라운드 워밍업 없이 측정 (STOCKLENS_WARMUP=0)")
+    parser.add_argument("--skip-imports", action="store_true", help="모듈별 임포트 시간 측정 생략")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    report = {
+        "imports": [] if args.skip_imports else bench_imports(args.repeat),
+        "app": bench_app(args.script, args.repeat, args.reruns, not args.no_warmup),
+        "warmup": bench_warmup(),
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    if report["imports"]:
+        print("임포트 시간 (새 프로세스, 중앙값)")
+        for row in report["imports"]:
+            print(f"  {row['module']:<22} " + (f"{row['ms']:>8.1f}ms" if row["ms"] is not None else f"  (실패: {row['error']})"))
+    app = report["app"]
+    print(f"\n{app['script']} (워밍업 {'켜짐' if app['warmup'] else '꺼짐'})")
+    print(f"  streamlit 임포트     {app['streamlit_import_ms']:>8.1f}ms")
+    print(f"  첫 화면(업로드)      {app['first_render_ms']:>8.1f}ms   (화면 요소 {app['elements']}개)")
+    if app["rerun_p50_ms"] is not None:
+        print(f"  rerun 1회            {app['rerun_p50_ms']:>8.1f}ms   (최대 {app['rerun_max_ms']:.1f}ms)")
+    if app["exceptions"]:
+        print(f"  ⚠️ 스크립트 예외: {app['exceptions']}")
+    warmup = report["warmup"]
+    print(f"\n워밍업 (백그라운드, 전체 {warmup['total'] * 1000:.0f}ms)")
+    for task in warmup["tasks"]:
+        status = "완료" if task["state"] == "ready" else f"실패 - {task['error']}"
+        print(f"  {task['task']:<14} {task['seconds'] * 1000:>8.1f}ms  {status}")
+
+
+if __name__ == "__main__":
+    main()
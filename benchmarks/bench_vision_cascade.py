@@ -0,0 +1,108 @@
+# --- Vision 기능 cascade 벤치마크 ---
+# 정답 브랜드가 표시된 이미지 세트로 'all(네 기능 한 번에, 기존)' 과 'cascade(싼 기능부터 단계적으로)' 를 비교합니다.
+# 실제 Vision API를 호출하므로 GCP 인증(google.auth.default)이 필요하고, 호출 수만큼 과금됩니다.
+# - 지연 시간: 이미지별 annotate 호출 전체 시간의 중앙값
+# - 비용: 요청한 기능 수 기준 예상 비용 (analysis.VISION_FEATURE_PRICES)
+# - 정확도: 최우선 신호(로고 > 최고의 추측 > 웹 엔티티 > 라벨)에 정답 키워드가 있는지(top1), 힌트 어디든 있는지(any)
+#
+# 사용법: python benchmarks/bench_vision_cascade.py [--image-dir image] [--labels benchmarks/vision_labels.json]
+#                                                   [--modes all cascade] [--repeat 1] [--json]
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from collections import Counter
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import VISION_META_KEY, request_vision_annotations, top_signal, vision_hints
+from image_preprocess import prepare_image
+
+
+def _matches(text: str, keywords: List[str]) -> bool:
+    text = text.lower()
+    return any(keyword.lower() in text for keyword in keywords)
+
+
+def bench_image(vision_client, path: str, keywords: List[str], mode: str, repeat: int) -> Dict:
+    with open(path, "rb") as f:
+        prepared = prepare_image(f.read())
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = request_vision_annotations(vision_client, prepared.vision_bytes, mode)
+        times.append(time.perf_counter() - start)
+    meta = results[VISION_META_KEY]
+    hints = vision_hints(results)
+    return {
+        "image": os.path.basename(path),
+        "mode": mode,
+        "tier": meta["tier"],
+        "calls": meta["calls"],
+        "features": meta["features"],
+        "cost_usd": meta["cost_usd"],
+        "latency_ms": statistics.median(times) * 1000,
+        "top_signal": top_signal(results),
+        "top1_hit": _matches(top_signal(results) or "", keywords),
+        "any_hit": _matches(json.dumps(hints, ensure_ascii=False), keywords),
+    }
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    latencies = sorted(row["latency_ms"] for row in rows)
+    return {
+        "images": len(rows),
+        "latency_ms_median": statistics.median(latencies),
+        "latency_ms_max": latencies[-1],
+        "cost_usd_total": sum(row["cost_usd"] for row in rows),
+        "cost_usd_per_1000": 1000 * sum(row["cost_usd"] for row in rows) / len(rows),
+        "top1_accuracy": sum(row["top1_hit"] for row in rows) / len(rows),
+        "any_accuracy": sum(row["any_hit"] for row in rows) / len(rows),
+        "tiers": dict(Counter(row["tier"] for row in rows)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vision all / cascade 모드의 지연 시간·비용·정확도 비교")
+    parser.add_argument("--image-dir", default="image")
+    parser.add_argument("--labels", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "vision_labels.json"),
+                        help="이미지 파일 이름 → 정답 키워드 목록 JSON")
+    parser.add_argument("--modes", nargs="+", default=["all", "cascade"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    import google.auth
+    from google.cloud import vision
+    credentials, _ = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-vision'])
+    vision_client = vision.ImageAnnotatorClient(credentials=credentials)
+
+    with open(args.labels, encoding="utf-8") as f:
+        labels = json.load(f)
+    rows = {mode: [bench_image(vision_client, os.path.join(args.image_dir, name), keywords, mode, args.repeat)
+                   for name, keywords in labels.items()]
+            for mode in args.modes}
+    summary = {mode: summarize(mode_rows) for mode, mode_rows in rows.items()}
+
+    if args.json:
+        print(json.dumps({"summary": summary, "images": rows}, ensure_ascii=False, indent=2))
+        return
+    print(f"{'image':<24}" + "".join(f"{mode + ' tier':>14}{'ms':>8}{'top1':>6}" for mode in args.modes))
+    for i, name in enumerate(labels):
+        line = f"{name:<24}"
+        for mode in args.modes:
+            row = rows[mode][i]
+            line += f"{row['tier']:>14}{row['latency_ms']:>8.0f}{'O' if row['top1_hit'] else 'X':>6}"
+        print(line)
+    print()
+    for mode, s in summary.items():
+        print(f"[{mode}] 지연 중앙값 {s['latency_ms_median']:.0f}ms (최대 {s['latency_ms_max']:.0f}ms), "
+              f"1,000장당 ${s['cost_usd_per_1000']:.2f}, top1 정확도 {s['top1_accuracy']:.0%}, "
+              f"힌트 포함 {s['any_accuracy']:.0%}, 단계 분포 {s['tiers']}")
+
+
+if __name__ == "__main__":
+    main()
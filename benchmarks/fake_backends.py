@@ -0,0 +1,196 @@
+# --- 벤치마크용 가짜 백엔드 ---
+# 실제 API 쿼터를 쓰지 않고 파이프라인 전체를 돌려보기 위한 Vision 클라이언트 / Gemini 모델 / fdr.DataReader 대역입니다.
+# - 지연 시간: 중앙값(ms)과 로그정규 분산(sigma)으로 뽑고, failure_rate 확률로 ServiceUnavailable 오류를 냄
+#   (api_gateway.py가 실제 503 오류처럼 재시도하도록 클래스 이름을 맞춤)
+# - 응답 크기: 웹 엔티티 수, OCR 단어 수, Gemini 응답 길이 등을 평균값 주변에서 뽑음
+# - 결정성: 난수는 (seed, 백엔드, 입력 내용, 같은 입력의 호출 횟수)로 정해지므로 스레드 실행 순서와 관계없이 재현됨
+import math
+import time
+import json
+import random
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import date
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# (로고/브랜드, 제조사, 종목코드) - 번들 이미지에 등장하는 제품들
+BRANDS: List[Tuple[str, str, str]] = [
+    ("Logitech", "Logitech International", "LOGI"),
+    ("Samsung", "Samsung Electronics", "005930"),
+    ("Apple", "Apple Inc.", "AAPL"),
+    ("Lion", "Lion Corporation", "4912"),
+    ("Tesla", "Tesla, Inc.", "TSLA"),
+    ("Genesis", "Hyundai Motor Company", "005380"),
+    ("Soft Blue Soap", "Soft Blue Soap", "정보 없음"),
+]
+_WORDS = ["premium", "series", "edition", "wireless", "pro", "max", "care", "fresh", "original", "new", "model", "plus"]
+
+
+class ServiceUnavailable(Exception):
+    """가짜 백엔드가 일부러 내는 일시 장애 오류 (google.api_core.exceptions.ServiceUnavailable과 같은 이름)."""
+
+
+@dataclass
+class LatencyProfile:
+    median_ms: float
+    sigma: float = 0.4              # 로그정규 분포의 표준편차 (0이면 항상 median_ms)
+    failure_rate: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median_ms / 1000 * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median_ms / 1000
+
+
+def _vary(rng: random.Random, mean: float, spread: float = 0.3) -> int:
+    # 평균 주변 ±spread 비율에서 정수 하나
+    return max(0, int(round(mean * rng.uniform(1 - spread, 1 + spread))))
+
+
+class _Seeded:
+    """입력 내용별 호출 횟수를 세어 (seed, 이름, 내용, 횟수)로 난수 생성기를 만드는 공통 부분."""
+
+    def __init__(self, name: str, latency: LatencyProfile, seed: int):
+        self.name = name
+        self.latency = latency
+        self.seed = seed
+        self.calls = 0
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, content: bytes) -> Tuple[random.Random, str]:
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            self.calls += 1
+            count = self._counts.get(digest, 0)
+            self._counts[digest] = count + 1
+        return random.Random(f"{self.seed}:{self.name}:{digest}:{count}"), digest
+
+    def _wait_or_fail(self, rng: random.Random, fraction: float = 1.0) -> None:
+        time.sleep(self.latency.sample(rng) * fraction)
+        if rng.random() < self.latency.failure_rate:
+            raise ServiceUnavailable(f"{self.name}: 가짜 일시 장애")
+
+
+def brand_for(content: bytes) -> Tuple[str, str, str]:
+    """내용(이미지 bytes 등)으로 결정되는 브랜드 하나."""
+    return BRANDS[int(hashlib.sha256(content).hexdigest(), 16) % len(BRANDS)]
+
+
+class FakeVisionClient(_Seeded):
+    """vision.ImageAnnotatorClient 대역. annotate_image(request=...)에서 요청한 기능의 결과만 채워 돌려줍니다."""
+
+    def __init__(self, latency: LatencyProfile, seed: int = 0, web_entities: int = 15, labels: int = 10, ocr_words: int = 60):
+        super().__init__("vision", latency, seed)
+        self.web_entities = web_entities
+        self.labels = labels
+        self.ocr_words = ocr_words
+
+    def annotate_image(self, request):
+        content = request.image.content
+        rng, _ = self._rng(content)
+        features = {getattr(f.type_, "name", str(f.type_)) for f in request.features}
+        # 기능 수에 비례해 느려지도록 (웹 탐지가 가장 무거움)
+        weight = 0.3 * len(features & {"LOGO_DETECTION", "LABEL_DETECTION", "TEXT_DETECTION"}) + (0.7 if "WEB_DETECTION" in features else 0)
+        self._wait_or_fail(rng, max(0.3, weight))
+        brand, company, _ = brand_for(content)
+        response = SimpleNamespace(logo_annotations=[], web_detection=None, label_annotations=[], text_annotations=[])
+        if "LOGO_DETECTION" in features and rng.random() < 0.7:
+            response.logo_annotations = [SimpleNamespace(description=brand, score=rng.uniform(0.4, 0.98))]
+        if "WEB_DETECTION" in features:
+            entities = [SimpleNamespace(description=company, score=rng.uniform(0.6, 1.4))]
+            entities += [SimpleNamespace(description=f"{brand} {rng.choice(_WORDS)}", score=rng.uniform(0.1, 0.8))
+                         for _ in range(_vary(rng, self.web_entities) - 1)]
+            response.web_detection = SimpleNamespace(web_entities=entities,
+                                                     best_guess_labels=[SimpleNamespace(label=f"{brand.lower()} {rng.choice(_WORDS)}")])
+        if "LABEL_DETECTION" in features:
+            response.label_annotations = [SimpleNamespace(description=rng.choice(_WORDS).title(), score=rng.uniform(0.5, 0.99))
+                                          for _ in range(_vary(rng, self.labels))]
+        if "TEXT_DETECTION" in features:
+            words = [brand] + [rng.choice(_WORDS) for _ in range(_vary(rng, self.ocr_words))]
+            # 실제 응답처럼 첫 항목은 전체 텍스트, 나머지는 단어별 항목
+            response.text_annotations = [SimpleNamespace(description=" ".join(words))] + [SimpleNamespace(description=w) for w in words]
+        return response
+
+
+class _FakeStream:
+    def __init__(self, chunks: Iterator, usage):
+        self._chunks = chunks
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+
+class FakeGeminiModel(_Seeded):
+    """genai.GenerativeModel 대역. 프롬프트의 Vision 힌트에 들어 있는 브랜드로 프로필 JSON을 만들어 돌려줍니다."""
+
+    def __init__(self, latency: LatencyProfile, seed: int = 0, response_chars: int = 1200, chunks: int = 12):
+        super().__init__("gemini", latency, seed)
+        self.response_chars = response_chars
+        self.chunks = chunks
+
+    def _profile_text(self, rng: random.Random, prompt: str, image_bytes: bytes) -> str:
+        hints = prompt.split("텍스트 힌트:", 1)[-1].split("[매우 중요한 지시사항]", 1)[0].lower()
+        brand, company, ticker = next((b for b in BRANDS if b[0].lower() in hints), brand_for(image_bytes))
+        profile = {"제조사": company, "제품명": f"{brand} {rng.choice(_WORDS)}", "제조사_국가": "-", "종목코드": ticker,
+                   "company_description": "", "main_products": [{"category": "제품", "description": f"{brand}의 대표 제품군"}]}
+        padding = _vary(rng, self.response_chars) - len(json.dumps(profile, ensure_ascii=False))
+        profile["company_description"] = (f"{company}는 " + " ".join(rng.choice(_WORDS) for _ in range(max(0, padding) // 6)))[:max(10, padding)]
+        return "```json\n" + json.dumps(profile, ensure_ascii=False, indent=2) + "\n```"
+
+    def generate_content(self, contents, stream: bool = False, request_options=None):
+        prompt, image = contents[0], contents[1]["data"]
+        rng, _ = self._rng(prompt.encode("utf-8") + image)
+        latency = self.latency.sample(rng)
+        failed = rng.random() < self.latency.failure_rate
+        text = self._profile_text(rng, prompt, image)
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 3 + 258, candidates_token_count=len(text) // 3)
+        if not stream:
+            time.sleep(latency)
+            if failed:
+                raise ServiceUnavailable("gemini: 가짜 일시 장애")
+            return SimpleNamespace(text=text, usage_metadata=usage)
+
+        def chunks():
+            # 첫 조각까지 전체 지연의 30%, 나머지는 조각마다 고르게 나눠 도착
+            time.sleep(latency * 0.3)
+            if failed:
+                raise ServiceUnavailable("gemini: 가짜 일시 장애")
+            size = math.ceil(len(text) / self.chunks)
+            for i in range(0, len(text), size):
+                if i:
+                    time.sleep(latency * 0.7 / self.chunks)
+                yield SimpleNamespace(text=text[i:i + size])
+        return _FakeStream(chunks(), usage)
+
+
+class FakeDataReader(_Seeded):
+    """fdr.DataReader(ticker, start, end) 대역. 종목별로 항상 같은 무작위 보행 일봉을 돌려줍니다."""
+
+    EPOCH = date(2000, 1, 3)
+
+    def __init__(self, latency: LatencyProfile, seed: int = 0):
+        super().__init__("price", latency, seed)
+
+    def __call__(self, ticker: str, start, end=None) -> pd.DataFrame:
+        rng, _ = self._rng(f"{ticker}:{start}:{end}".encode("utf-8"))
+        self._wait_or_fail(rng)
+        end = pd.Timestamp(end or date.today())
+        days = pd.bdate_range(self.EPOCH, end)
+        # 같은 종목은 기간과 관계없이 같은 가격을 갖도록 시작일을 고정해서 만든 뒤 잘라냄
+        walk = np.random.default_rng(int(hashlib.sha256(f"{self.seed}:{ticker}".encode()).hexdigest()[:8], 16))
+        close = 100 * np.exp(np.cumsum(walk.normal(0, 0.015, len(days))))
+        spread = np.abs(walk.normal(0, 0.01, len(days))) * close
+        df = pd.DataFrame({
+            "Open": close + walk.normal(0, 0.3, len(days)) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": walk.integers(1_000, 1_000_000, len(days)),
+        }, index=days)
+        df.index.name = "Date"
+        return df.loc[pd.Timestamp(start):end]
@@ -0,0 +1,114 @@
+# --- 업로드 원본 디스크 저장소 ---
+# 세션에는 업로드 원본 대신 다이제스트(SHA-256)와 화면 표시용 썸네일만 두고, 원본은 로컬 디스크에 내려둡니다.
+# 원본은 분석 첫 단계(전처리)에서만 다시 읽으므로 디스크에 있어도 느려지지 않습니다.
+# - 저장: STOCKLENS_DATA_DIR/uploads/<다이제스트 앞 2자리>/<다이제스트>. 같은 사진은 한 번만 저장됨
+# - 정리: 마지막 사용 후 STOCKLENS_UPLOAD_TTL이 지났거나 전체 크기가 STOCKLENS_UPLOAD_MAX_MB를 넘으면 오래 쓰지 않은 파일부터 삭제
+#   (파일 수정 시각을 마지막 사용 시각으로 사용하며, 정리는 저장할 때 최대 1분에 한 번 수행)
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from result_cache import DATA_DIR
+
+UPLOAD_DIR = os.getenv("STOCKLENS_UPLOAD_DIR", os.path.join(DATA_DIR, "uploads"))
+UPLOAD_MAX_BYTES = int(os.getenv("STOCKLENS_UPLOAD_MAX_MB", "1024")) * 1024 * 1024
+UPLOAD_TTL_SECONDS = int(os.getenv("STOCKLENS_UPLOAD_TTL", str(24 * 3600)))      # 기본 1일
+EVICT_INTERVAL_SECONDS = 60
+
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """다이제스트로 찾는 파일 저장소."""
+
+    def __init__(self, root: str = UPLOAD_DIR, max_bytes: int = UPLOAD_MAX_BYTES, ttl_seconds: int = UPLOAD_TTL_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        """원본을 저장하고 다이제스트를 반환합니다."""
+        digest = digest_of(data)
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 임시 파일에 쓴 뒤 이름을 바꿔, 다른 세션이 반쯤 써진 파일을 읽지 않게 함
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._maybe_evict()
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """원본을 반환합니다. 정리되어 없으면 None을 반환합니다."""
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def _files(self):
+        for sub in os.scandir(self.root):
+            if sub.is_dir():
+                for entry in os.scandir(sub.path):
+                    if entry.is_file() and not entry.name.startswith("tmp"):
+                        yield entry
+
+    def _maybe_evict(self) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_evict < EVICT_INTERVAL_SECONDS:
+                return
+            self._last_evict = now
+        files = []
+        for entry in self._files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if now - mtime <= self.ttl_seconds and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        """저장된 파일 수와 전체 크기(bytes)."""
+        sizes = [entry.stat().st_size for entry in self._files()]
+        return {"files": len(sizes), "bytes": sum(sizes)}
+
+
+_default_store: Optional[BlobStore] = None
+_default_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """프로세스 전체에서 공유하는 기본 저장소."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = BlobStore()
+        return _default_store
@@ -0,0 +1,153 @@
+# --- 주가 차트 생성 ---
+# 주가 DataFrame으로 plotly 차트를 만드는 부분만 모아둔 모듈입니다. (Streamlit 없이 벤치마크에서도 그대로 사용)
+# 데이터 조회는 price_store.py, 화면 표시와 캐시는 results_view.py가 담당합니다.
+# 만든 Figure는 (종목, 기간)별로 memory_cache에 그대로 보관하므로, rerun 때는 다시 만들지 않고 직렬화만 합니다.
+# - 단일 종목: 캔들스틱 + 거래량 subplot. 이동평균선은 다운샘플 전 전체 일봉으로 계산 (pandas rolling, 벡터 연산)
+#   기간 시작부터 선이 이어지도록 기간 앞의 MA_LOOKBACK_BARS개 일봉을 함께 받아 계산한 뒤 기간만 잘라서 그림
+# - 다운샘플: 차트 폭(px) 예산에 맞춰 캔들은 OHLC를 보존하며 묶고 (시가=첫날, 고가=최고, 저가=최저, 종가=마지막 날, 거래량=합),
+#   비교 차트의 선은 LTTB로 모양(극값)을 유지하며 줄임 → 기간이 길어져도 브라우저로 보내는 데이터 크기가 일정함
+# - WebGL: 다운샘플 전 원본 일봉이 WEBGL_POINTS개를 넘는 긴 기간의 선은 Scattergl로 그림
+import os
+import math
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from price_store import normalize_closes, range_start
+from telemetry import get_telemetry
+
+RANGE_LABELS = {"1M": "지난 1개월간", "1Y": "지난 1년간", "5Y": "지난 5년간", "max": "전체 기간"}
+
+CHART_WIDTH_PX = int(os.getenv("STOCKLENS_CHART_WIDTH_PX", "720"))        # centered 레이아웃의 차트 폭
+CANDLE_PX = 4                   # 캔들 하나에 필요한 최소 폭(px). 최대 캔들 수 = 차트 폭 / 4
+WEBGL_POINTS = int(os.getenv("STOCKLENS_CHART_WEBGL_POINTS", "2000"))
+MOVING_AVERAGES = (20, 60, 120)
+MA_LOOKBACK_BARS = max(MOVING_AVERAGES)    # 이동평균 계산을 위해 기간 앞에 더 받아올 거래일 수 (PriceStore.get_history의 lookback_bars)
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+UP_COLOR, DOWN_COLOR = "#e0383e", "#2f6fd6"        # 국내 관례: 상승 빨강, 하락 파랑
+
+
+def moving_averages(close: pd.Series, windows=MOVING_AVERAGES) -> pd.DataFrame:
+    """종가의 단순 이동평균 (열 이름: MA20, MA60, ...). 기간보다 데이터가 짧은 구간은 NaN입니다."""
+    return pd.DataFrame({f"MA{w}": close.rolling(w, min_periods=w).mean() for w in windows}, index=close.index)
+
+
+def downsample_ohlc(df: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """일봉을 연속된 k일씩 묶어 max_bars개 이하로 줄입니다. 고가/저가의 극값과 거래량 합계는 그대로 보존됩니다.
+
+    OHLC/Volume 외의 열(이동평균 등)은 각 묶음의 마지막 날 값을 사용하고, 날짜는 묶음의 첫 날입니다.
+    """
+    n = len(df)
+    if n <= max_bars:
+        return df
+    k = math.ceil(n / max_bars)
+    starts = np.arange(0, n, k)
+    ends = np.minimum(starts + k, n) - 1
+    result = {
+        "Open": df["Open"].to_numpy(float)[starts],
+        "High": np.fmax.reduceat(df["High"].to_numpy(float), starts),    # fmax/fmin : NaN은 무시
+        "Low": np.fmin.reduceat(df["Low"].to_numpy(float), starts),
+        "Close": df["Close"].to_numpy(float)[ends],
+    }
+    if "Volume" in df.columns:
+        result["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(float)), starts)
+    for column in df.columns.difference(list(result)):
+        result[column] = df[column].to_numpy()[ends]
+    return pd.DataFrame(result, index=df.index[starts])[list(df.columns)]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets : 선 모양을 가장 잘 유지하는 점 threshold개의 위치를 고릅니다. (첫/마지막 점 포함)"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        # 다음 묶음의 평균점 (마지막 묶음이면 마지막 점)
+        next_start, next_end = (end, min(int((i + 2) * every) + 1, n)) if i < threshold - 3 else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # 직전에 고른 점 a, 후보 점, 다음 묶음 평균점으로 만든 삼각형 넓이가 가장 큰 후보를 선택
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _line_trace(x, y, points: int, **kwargs):
+    # points : 다운샘플 전 원본 점 개수. 긴 기간(예: 5년 이상 일봉)의 선은 WebGL(Scattergl)로 그려 브라우저의 SVG 렌더링 부담을 줄임
+    return (go.Scattergl if points > WEBGL_POINTS else go.Scatter)(x=x, y=y, mode="lines", **kwargs)
+
+
+def _line_chart(df_stock: pd.DataFrame, title: str, width_px: int):
+    # OHLC가 없는 데이터(일부 지수 등)는 종가 선으로 대신 그림
+    close = df_stock["Close"].dropna()
+    keep = lttb_indices(close.index.asi8.astype(float), close.to_numpy(float), width_px)
+    fig = go.Figure(_line_trace(close.index[keep], close.to_numpy()[keep], len(close), name="종가"))
+    fig.update_layout(title=title, xaxis_title="날짜", yaxis_title="가격")
+    return fig
+
+
+def build_price_chart(df_stock: pd.DataFrame, ticker: str, range_key: str, width_px: int = CHART_WIDTH_PX):
+    """일봉 DataFrame으로 캔들스틱 + 이동평균선 + 거래량 차트를 만듭니다. 캔들 수는 차트 폭에 맞춰 줄입니다.
+
+    df_stock에 기간 시작일 이전 일봉(get_history의 lookback_bars)이 있으면 이동평균 계산에만 쓰고 차트에서는 잘라냅니다.
+    """
+    title = f"{ticker} {RANGE_LABELS[range_key]} 주가"
+    in_range = df_stock.index >= pd.Timestamp(range_start(range_key))
+    with get_telemetry().span("chart", kind="single", points=int(in_range.sum())) as span:
+        if not set(OHLC_COLUMNS).issubset(df_stock.columns):
+            fig = _line_chart(df_stock[in_range], title, width_px)
+            span["plotted"] = len(fig.data[0].x)
+            return fig
+        columns = OHLC_COLUMNS + (["Volume"] if "Volume" in df_stock.columns else [])
+        data = df_stock[columns].join(moving_averages(df_stock["Close"]))[in_range]
+        bars = downsample_ohlc(data, max(1, width_px // CANDLE_PX))
+        span["plotted"] = len(bars)
+        has_volume = "Volume" in bars.columns
+        fig = make_subplots(rows=2 if has_volume else 1, cols=1, shared_xaxes=True, vertical_spacing=0.03,
+                            row_heights=[0.75, 0.25] if has_volume else None)
+        fig.add_trace(go.Candlestick(
+            x=bars.index, open=bars["Open"], high=bars["High"], low=bars["Low"], close=bars["Close"], name=ticker,
+            increasing=dict(line=dict(color=UP_COLOR), fillcolor=UP_COLOR),
+            decreasing=dict(line=dict(color=DOWN_COLOR), fillcolor=DOWN_COLOR),
+        ), row=1, col=1)
+        for window in MOVING_AVERAGES:
+            ma = bars[f"MA{window}"]
+            if ma.notna().any():
+                fig.add_trace(_line_trace(bars.index, ma, len(data), name=f"{window}일 이동평균", line=dict(width=1.2)), row=1, col=1)
+        if has_volume:
+            colors = np.where(bars["Close"].to_numpy() >= bars["Open"].to_numpy(), UP_COLOR, DOWN_COLOR)
+            fig.add_trace(go.Bar(x=bars.index, y=bars["Volume"], marker_color=colors, name="거래량", showlegend=False), row=2, col=1)
+            fig.update_yaxes(title_text="거래량", row=2, col=1)
+        fig.update_yaxes(title_text="가격", row=1, col=1)
+        fig.update_layout(title=title, height=520 if has_volume else 420, hovermode="x unified", xaxis_rangeslider_visible=False,
+                          margin=dict(l=10, r=10, t=60, b=10), legend=dict(orientation="h", yanchor="bottom", y=1.0, x=0))
+        if len(bars) == len(data):
+            # 일봉 그대로일 때만 주말 공백을 없앰 (묶은 캔들은 이미 공백이 없음)
+            fig.update_xaxes(rangebreaks=[dict(bounds=["sat", "mon"])])
+    return fig
+
+
+def build_comparison_chart(prices: Dict[str, pd.DataFrame], range_key: str, width_px: int = CHART_WIDTH_PX):
+    """종목별 일봉으로 시작일=100 기준 비교 차트를 만듭니다. 종목별 선은 LTTB로 차트 폭만큼의 점으로 줄입니다."""
+    with get_telemetry().span("chart", kind="comparison", series=len(prices)) as span:
+        normalized = normalize_closes(prices)
+        fig = go.Figure()
+        plotted = 0
+        for ticker in normalized.columns:
+            series = normalized[ticker].dropna()
+            keep = lttb_indices(series.index.asi8.astype(float), series.to_numpy(float), width_px)
+            fig.add_trace(_line_trace(series.index[keep], series.to_numpy()[keep], len(series), name=ticker))
+            plotted += len(keep)
+        span["plotted"] = plotted
+        fig.update_layout(title=f"{RANGE_LABELS[range_key]} 주가 비교 (시작일 = 100)", xaxis_title="날짜", yaxis_title="상대 가격",
+                          legend_title="종목", hovermode="x unified")
+    return fig
+
@@ -0,0 +1,123 @@
+# --- Vision 힌트 압축 ---
+# Vision 결과를 Gemini 프롬프트에 넣기 전에 토큰 예산 안으로 줄입니다.
+# - OCR: text_annotations의 첫 항목(전체 텍스트)만 남기고, 단어별로 반복되는 나머지 항목은 버림
+# - 중복 제거: 대소문자/공백만 다른 항목과 thefuzz 점수가 높은(예: "Kirei Kirei" / "Kirei-Kirei") 항목을 하나로 합침
+# - 순위: 종류별 첫 항목을 우선순위(로고 > 최고의 추측 > 웹 엔티티 > OCR > 라벨)대로 먼저 넣고,
+#   나머지는 종류별 가중치 × Vision 점수 순서로 예산이 찰 때까지 채움
+# 결과 형식은 기존 Vision 결과와 같은 {종류: [문자열, ...]} 이므로 프롬프트 모양은 그대로 유지됩니다.
+import os
+import re
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+
+from thefuzz import fuzz
+
+HINT_TOKEN_BUDGET = int(os.getenv("STOCKLENS_HINT_TOKEN_BUDGET", "300"))   # 0 이하이면 압축하지 않음
+MERGE_THRESHOLD = int(os.getenv("STOCKLENS_HINT_MERGE_SCORE", "90"))        # 이 점수 이상이면 같은 항목으로 보고 합침
+SCORES_KEY = "_scores"      # Vision 결과 안에 종류별 점수 목록을 보관하는 키 (analysis.py에서 채움)
+
+# 신호 종류별 가중치. 점수가 없는 종류(최고의 추측, OCR)는 1.0으로 보고 가중치만 적용
+SIGNAL_WEIGHTS = {"logos": 1.0, "best_guess": 0.95, "web_entities": 0.8, "ocr_text": 0.7, "labels": 0.5}
+HINT_ORDER = ["logos", "best_guess", "web_entities", "labels", "ocr_text"]     # 결과 dict의 키 순서
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 토큰 수 추정치. 영문/숫자는 약 4자당 1토큰, 한글/한자 등은 약 1.5자당 1토큰으로 계산합니다."""
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+def hint_tokens(hints: Dict) -> int:
+    """프롬프트에 들어가는 형태(json.dumps) 그대로의 토큰 수 추정치."""
+    return estimate_tokens(json.dumps(hints, ensure_ascii=False))
+
+
+def _candidates(vision_results: Dict) -> List[Tuple[str, str]]:
+    # (종류, 문자열) 목록. 각 종류의 첫 항목을 우선순위(로고 > 최고의 추측 > 웹 엔티티 > OCR > 라벨)대로 먼저 두고,
+    # 나머지는 가중치 × Vision 점수 순서로 정렬
+    scores = vision_results.get(SCORES_KEY, {})
+    leaders, followers = [], []
+    for kind, weight in SIGNAL_WEIGHTS.items():
+        values = vision_results.get(kind) or []
+        if kind == "ocr_text":
+            values = values[:1]     # 첫 항목이 전체 텍스트, 나머지는 단어별 반복
+        kind_scores = scores.get(kind, [])
+        texts = [_WHITESPACE.sub(" ", str(value)).strip() for value in values]
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            score = min(1.0, kind_scores[i]) if i < len(kind_scores) else 1.0     # 웹 엔티티 점수는 1을 넘을 수 있음
+            if i == 0:
+                leaders.append((kind, text))
+            else:
+                followers.append((weight * score, kind, text))
+    followers.sort(key=lambda c: c[0], reverse=True)
+    return leaders + [(kind, text) for _, kind, text in followers]
+
+
+def _is_duplicate(text: str, kept: List[str]) -> bool:
+    lowered = text.lower()
+    for other in kept:
+        if lowered == other.lower():
+            return True
+        # 단어 순서/기호만 다른 항목을 합침. (부분 일치로 합치면 "Lion" 로고가 긴 추측 문장에 묻혀 사라짐)
+        # 긴 OCR 문장은 비교 대상에서 제외
+        if len(text) <= 60 and len(other) <= 60 and fuzz.token_sort_ratio(lowered, other.lower()) >= MERGE_THRESHOLD:
+            return True
+    return False
+
+
+def compact_hints(vision_results: Dict, token_budget: Optional[int] = None) -> Dict[str, List[str]]:
+    """Vision 결과를 중복 제거·순위화하고 token_budget(추정 토큰 수) 안에 들어가도록 줄인 힌트를 반환합니다."""
+    budget = HINT_TOKEN_BUDGET if token_budget is None else token_budget
+    if budget <= 0:
+        return {key: value for key, value in vision_results.items() if not key.startswith("_")}
+    kept: List[str] = []
+    selected: Dict[str, List[str]] = {}
+    for kind, text in _candidates(vision_results):
+        if _is_duplicate(text, kept):
+            continue
+        trial = dict(selected)
+        trial[kind] = selected.get(kind, []) + [text]
+        used = hint_tokens(_ordered(trial))
+        if used > budget:
+            if kind != "ocr_text":
+                continue            # 더 짧은 다음 항목은 들어갈 수 있으므로 계속 확인
+            # OCR 전체 텍스트는 남은 예산만큼 잘라서라도 넣음 (포장지 문구에 브랜드명이 있는 경우가 많음)
+            text = _truncate(text, budget - hint_tokens(_ordered(selected)))
+            if not text:
+                continue
+            trial[kind] = [text]
+        kept.append(text)
+        selected = trial
+    return _ordered(selected)
+
+
+def _ordered(hints: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {kind: hints[kind] for kind in HINT_ORDER if hints.get(kind)}
+
+
+def _truncate(text: str, tokens: int) -> str:
+    # 따옴표/키 이름 등 JSON 표기 몫을 빼고, 추정 토큰 수가 맞을 때까지 뒤에서부터 줄임
+    tokens -= estimate_tokens('"ocr_text": [""], ')
+    if tokens <= 0:
+        return ""
+    end = min(len(text), tokens * 4)
+    while end > 0 and estimate_tokens(text[:end]) > tokens:
+        end = int(end * 0.9)
+    return text[:end].rstrip()
+
+
+def compaction_stats(vision_results: Dict, token_budget: Optional[int] = None) -> Dict[str, int]:
+    """압축 전/후 힌트의 추정 토큰 수와 항목 수."""
+    before = {key: value for key, value in vision_results.items() if not key.startswith("_")}
+    after = compact_hints(vision_results, token_budget)
+    return {
+        "tokens_before": hint_tokens(before),
+        "tokens_after": hint_tokens(after),
+        "items_before": sum(len(v) for v in before.values()),
+        "items_after": sum(len(v) for v in after.values()),
+    }
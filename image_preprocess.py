@@ -0,0 +1,115 @@
+# --- 이미지 정규화(전처리) 단계 ---
+# 업로드된 원본 사진을 한 번만 디코딩하고, EXIF 회전을 적용한 뒤
+# Vision API(로고/OCR)와 Gemini(멀티모달) 각각에 알맞은 크기로 줄여 작은 JPEG/WebP로 다시 인코딩합니다.
+# 두 API 모두 이 결과물을 그대로 받으므로 같은 원본을 두 번 디코딩하거나 원본 해상도로 두 번 업로드하지 않습니다.
+import os
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from result_cache import phash_from_image
+
+# Vision 문서 권장: LABEL 640x480, TEXT/LOGO 1024x768 이상이면 충분
+VISION_MAX_EDGE = int(os.getenv("STOCKLENS_VISION_MAX_EDGE", "1024"))
+# Gemini는 이미지를 768px 타일 단위로 처리하므로 그 이상은 토큰/전송량만 늘어남
+GEMINI_MAX_EDGE = int(os.getenv("STOCKLENS_GEMINI_MAX_EDGE", "768"))
+IMAGE_FORMAT = os.getenv("STOCKLENS_IMAGE_FORMAT", "JPEG").upper()      # JPEG 또는 WEBP
+IMAGE_QUALITY = int(os.getenv("STOCKLENS_IMAGE_QUALITY", "85"))
+# 세션에 보관하는 화면 표시용 썸네일 (결과 페이지 이미지는 centered 레이아웃 폭 약 700px)
+THUMBNAIL_MAX_EDGE = int(os.getenv("STOCKLENS_THUMBNAIL_MAX_EDGE", "720"))
+BACKGROUND_COLOR = (255, 255, 255)      # 투명 PNG를 합성할 배경색
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """전처리가 끝난 이미지. st.cache_data에 그대로 저장할 수 있도록 bytes와 숫자만 담습니다."""
+    vision_bytes: bytes             # Vision API로 보낼 이미지
+    gemini_bytes: bytes             # Gemini로 보낼 이미지
+    mime_type: str
+    phash: int                      # 결과 캐시 키 (result_cache.py)
+    original_size: Tuple[int, int]  # EXIF 회전 적용 후 (가로, 세로)
+    original_bytes: int
+
+
+def _resize_to_max_edge(img: Image.Image, max_edge: int) -> Image.Image:
+    if max(img.size) <= max_edge:
+        return img
+    scale = max_edge / max(img.size)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+
+def encode_image(img: Image.Image, image_format: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY) -> bytes:
+    """이미지를 JPEG/WebP bytes로 인코딩합니다."""
+    buffer = io.BytesIO()
+    img.save(buffer, format=image_format, quality=quality, optimize=(image_format == "JPEG"))
+    return buffer.getvalue()
+
+
+def _encode_smaller(img: Image.Image, original: Optional[bytes], image_format: str, quality: int) -> bytes:
+    encoded = encode_image(img, image_format, quality)
+    return original if original is not None and len(original) <= len(encoded) else encoded
+
+
+def decode_image(image_bytes: bytes, max_edge: int = 0) -> Image.Image:
+    """원본 bytes를 디코딩하고 EXIF 회전을 적용한 RGB 이미지를 반환합니다.
+
+    max_edge를 주면 JPEG는 디코더 단계(draft)에서 미리 1/2, 1/4, 1/8로 줄여 읽어 디코딩 시간을 아낍니다.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    if max_edge and img.format == "JPEG":
+        # draft는 요청 크기 이상을 보장하므로 화질 손실 없이 이후 리사이즈만 가벼워짐.
+        # EXIF 회전 전이라 가로/세로가 바뀌어 있을 수 있어 정사각형 기준으로 요청
+        img.draft("RGB", (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)
+    if img.has_transparency_data:
+        # RGBA/LA/투명색 팔레트 PNG는 convert("RGB")만 하면 투명 부분이 숨어 있던 색(대개 검정)으로 드러나므로
+        # 흰 배경에 합성한 뒤 RGB로 바꿈 (화면에 보이는 모습과 같은 이미지를 API에 보냄)
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, BACKGROUND_COLOR)
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+def prepare_image(image_bytes: bytes, vision_max_edge: int = VISION_MAX_EDGE, gemini_max_edge: int = GEMINI_MAX_EDGE,
+                  image_format: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY) -> PreparedImage:
+    """원본을 한 번 디코딩해서 Vision/Gemini용 이미지를 모두 만들어 반환합니다."""
+    if image_format not in MIME_TYPES:
+        raise ValueError(f"지원하지 않는 이미지 형식입니다: {image_format}")
+    with Image.open(io.BytesIO(image_bytes)) as probe:
+        # 헤더만 읽어 원본 크기를 구함. EXIF Orientation 5~8은 90도 회전이므로 가로/세로를 바꿈
+        width, height = probe.size
+        orientation = probe.getexif().get(0x0112, 1)
+        original_size = (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+        # 이미 작고 회전도 필요 없는 같은 형식의 사진은 다시 인코딩하면 오히려 커질 수 있으므로 원본도 후보로 둠
+        passthrough = probe.format == image_format and orientation == 1 and probe.mode == "RGB"
+    img = decode_image(image_bytes, max(vision_max_edge, gemini_max_edge))
+    vision_img = _resize_to_max_edge(img, vision_max_edge)
+    # Gemini용은 이미 줄인 Vision용 이미지에서 다시 줄이면 리사이즈 비용이 더 작음
+    gemini_img = _resize_to_max_edge(vision_img if vision_max_edge >= gemini_max_edge else img, gemini_max_edge)
+    vision_bytes = _encode_smaller(vision_img, image_bytes if passthrough and vision_img is img else None, image_format, quality)
+    if gemini_img is vision_img:
+        gemini_bytes = vision_bytes
+    else:
+        gemini_bytes = _encode_smaller(gemini_img, image_bytes if passthrough and gemini_img is img else None, image_format, quality)
+    return PreparedImage(
+        vision_bytes=vision_bytes,
+        gemini_bytes=gemini_bytes,
+        mime_type=MIME_TYPES[image_format],
+        phash=phash_from_image(vision_img),
+        original_size=original_size,
+        original_bytes=len(image_bytes),
+    )
+
+
+def make_thumbnail(image_bytes: bytes, max_edge: int = THUMBNAIL_MAX_EDGE) -> bytes:
+    """화면 표시용 작은 JPEG를 만듭니다. 원본 대신 세션에 보관합니다. (원본이 이미 작으면 원본을 그대로 반환)"""
+    img = decode_image(image_bytes, max_edge)
+    thumbnail = _resize_to_max_edge(img, max_edge)
+    return _encode_smaller(thumbnail, image_bytes if thumbnail is img else None, "JPEG", 80)
@@ -1,148 +1,49 @@
 # --- 1. 필요한 라이브러리 임포트 ---
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-# --- 1, 2번 (라이브러리 임포트, 클라이언트 초기화)는 기존과 동일 ---
+# Streamlit은 상호작용마다 이 스크립트를 처음부터 다시 실행합니다. 그래서 여기에는 업로드 화면에 필요한 가벼운 모듈만 두고,
+# 무거운 라이브러리(pandas, plotly, Google 클라이언트, torch)와 분석/차트 함수는 results_view.py로 옮겨
+# 결과 페이지에 처음 들어갈 때 한 번만 임포트합니다.
+# 클라이언트/모델은 서버가 뜬 직후 warmup.py가 백그라운드에서 미리 만들어 두므로, 사진을 고르는 동안 준비가 끝납니다.
+import time
 import streamlit as st
-import os
-import io
-import json
-import re
-import pandas as pd
 from dotenv import load_dotenv
-from PIL import Image
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
 
-from google.cloud import vision
-import google.auth
-import google.generativeai as genai
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-import FinanceDataReader as fdr
-import plotly.express as px
+from memory_cache import get_session_meter
+from telemetry import METRICS_PORT, get_telemetry, start_metrics_server
+from warmup import WARMUP_ENABLED, get_warmup
 
+rerun_started = time.perf_counter()
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-@st.cache_resource                      # 함수를 App이 켜질 때 딱 한번만 수행하고 결과물은 계속 재사용하도록 캐싱
-def initialize_vision_client():         # GCP의 Vision API 클라이언트 초기화 함수
-    try:
-        credentials, project_id = google.auth.default(scopes=['https://www.googleapis.com/auth/cloud-vision'])
-        vision_client = vision.ImageAnnotatorClient(credentials=credentials)
-        return vision_client
-    except Exception as e:
-        st.error(f"Vision 클라이언트 초기화 오류: {e}")
-        return None
 
 @st.cache_resource
-def initialize_gemini_model():      # Gemini 모델 초기화 함수
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-1.5-pro-latest')
-        return model
-    except Exception as e:
-        st.error(f"Gemini 모델 초기화 오류: {e}")
-        return None
-
-# 실제로 vision API와 Gemini 모델을 초기화
-# 이 부분은 App이 시작될 때 한번만 실행되며, 이후에는 캐시된 결과를 사용합니다.
-vision_client = initialize_vision_client()
-gemini_model = initialize_gemini_model()
-
-
-# --- 3. 핵심 기능 함수 (프롬프트 최종 강화) ---
-@st.cache_data
-def analyze_image_with_vision_api(_vision_client, image_bytes: bytes) -> Dict[str, List[str]]:
-    # ... (기존과 동일) ...
-    if not _vision_client: return {}
-    image = vision.Image(content=image_bytes)
-    # Vision API에서 받아야 할 정보를 지정(아래 정보 외 얼굴,랜드마크, 유해콘텐츠 등 다양한 정보 를 받아올 수 있음)
-    features = [
-        vision.Feature(type_=vision.Feature.Type.LOGO_DETECTION),
-        vision.Feature(type_=vision.Feature.Type.WEB_DETECTION),
-        vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION),
-        vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION),
-    ]
-    # 요청하는 것을 vision API에 전달
-    request = vision.AnnotateImageRequest(image=image, features=features)
-    response = _vision_client.annotate_image(request=request)
-    results = {}
-    if response.logo_annotations: results['logos'] = [logo.description for logo in response.logo_annotations]
-    if response.web_detection and response.web_detection.web_entities: results['web_entities'] = [entity.description for entity in response.web_detection.web_entities]
-    if response.label_annotations: results['labels'] = [label.description for label in response.label_annotations]
-    if response.text_annotations: results['ocr_text'] = [text.description for text in response.text_annotations]
-    return results
-
-@st.cache_data
-def get_company_profile_with_gemini(_gemini_model, image_bytes: bytes, vision_results: Dict) -> Optional[Dict]:
-    """Gemini를 호출하여 제품 및 제조사 프로필, 그리고 '글로벌 모회사'의 종목 코드까지 분석하여 JSON으로 반환합니다."""
-    if not _gemini_model: return None
-    
-    # --- [수정] 프롬프트에 '모회사'를 찾으라는 지시 추가 ---
-    prompt = f"""
-    당신은 세계 최고의 IT 기업 및 글로벌 소비재 기업 분석 전문가입니다. 당신의 임무는 주어진 이미지와 텍스트 힌트를 종합하여, 해당 제품과 제조사에 대한 상세한 프로필을 작성하는 것입니다.
-
-    [분석 대상 정보]
-    - 이미지: (첨부됨)
-    - 텍스트 힌트: {json.dumps(vision_results, ensure_ascii=False)}   # 
-
-    [매우 중요한 지시사항]
-    - 만약 해당 브랜드가 특정 국가의 자회사(예: 한국 P&G, CJ LION)를 통해 유통되더라도, 주식 시장에 상장된 '글로벌 모회사(Parent Company)'를 기준으로 '제조사'와 '종목코드'를 찾아야 합니다.
-    - '종목코드'는 FinanceDataReader 라이브러리가 지원하는 시장(KRX, NASDAQ, NYSE, AMEX, TSE, HKEX, SSE, SZSE) 중에서 찾아야 합니다.
-    - 비상장 기업이거나 지원하지 않는 시장에 상장된 경우, '종목코드' 값은 "정보 없음"으로 설정해주세요.
-
-    [최종 요청사항]
-    위 모든 정보를 바탕으로, 아래 JSON 형식에 맞춰 답변을 생성해주세요. 추가적인 설명 없이 JSON 객체만 반환해야 합니다.
-    ```json
-    {{
-      "제조사": "Lion Corporation",
-      "제품명": "아이깨끗해 (Kirei Kirei) Hand Soap",
-      "제조사_국가": "일본 (JPN)",
-      "종목코드": "4912",
-      "company_description": "라이언 주식회사(Lion Corporation)는 일본의 대표적인 생활용품 및 화학제품 제조 기업입니다. 세제, 치약, 비누 등 다양한 위생용품을 생산하며, 도쿄증권거래소에 '4912'라는 티커로 상장되어 있습니다.",
-      "main_products": [
-        {{"category": "생활용품", "description": "'아이깨끗해(キレイキレイ)' 손 세정제, 'CHARMY Magica' 주방 세제 등이 유명합니다."}},
-        {{"category": "구강용품", "description": "'시스테마(Systema)', '크리니카(Clinica)' 등 다양한 치약 및 칫솔 브랜드를 보유하고 있습니다."}}
-      ]
-    }}
-    ```
-    """
+def initialize_telemetry():         # 단계별 지연 시간/카운터 수집기 (관리자 페이지 pages/1_Metrics.py). 포트가 지정되면 /metrics 엔드포인트도 시작
     try:
-        image_part = Image.open(io.BytesIO(image_bytes))
-        response = _gemini_model.generate_content([prompt, image_part], request_options={"timeout": 120})
-        # JSON 응답에서 필요한 정보를 추출. 불필요한 말이나 상자 등의 기호가 오면 에러가 발생하므로 정리
-        match = re.search(r"```json\s*(\{.*?\})\s*```", response.text, re.DOTALL)
-        if match: return json.loads(match.group(1))
-        else: return json.loads(response.text)
-    except Exception as e:
-        st.error(f"🔮 Gemini 프로필 분석 중 오류: {e}")
-        return None
+        start_metrics_server(METRICS_PORT)
+    except OSError as e:
+        st.warning(f"지표 엔드포인트(포트 {METRICS_PORT})를 열지 못했습니다: {e}")
+    return get_telemetry()
 
-@st.cache_data
-def plot_stock_chart(ticker: str) -> Optional[object]:
-    # ... (기존과 동일) ...
-    try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        df_stock = fdr.DataReader(ticker, start_date, end_date)
-        if df_stock.empty: return None
-        fig = px.line(df_stock, y="Close", title=f"{ticker} 지난 1년간 종가(Close) 추세")
-        fig.update_layout(xaxis_title="날짜", yaxis_title="가격")
-        return fig
-    except Exception as e:
-        st.warning(f"📈 주가 정보를 불러오는 중 오류 발생: {e}")
-        return None
+@st.cache_resource
+def start_warmup():                 # 서버 프로세스당 한 번, 클라이언트/모델 초기화를 백그라운드 스레드에서 시작 (STOCKLENS_WARMUP=0이면 처음 쓸 때 초기화)
+    warmup = get_warmup()
+    return warmup.start() if WARMUP_ENABLED else warmup
 
 # --- 4. Streamlit 웹 애플리케이션 UI 구성 (UI 수정) ---
 st.set_page_config(page_title="AI 기업/제품 분석기", layout="centered")
+telemetry = initialize_telemetry()
+start_warmup()
 
 # streamlit 세션 상태 초기
 # st.session_state는 Streamlit 앱의 '단기 기억 장치'입니다. 
 # if 'page' not 사용자가 탭을 처음 열었을 때 딱 한 번만 실행. 사용자의 첫 page를 'upload'로 설정
 if 'page' not in st.session_state: st.session_state.page = 'upload'
-# 이미지 소스와 프로필 정보도 세션 상태에 저장
-if 'image_source' not in st.session_state: st.session_state.image_source = None
-if 'profile_info' not in st.session_state: st.session_state.profile_info = None
+# 이미지는 다이제스트와 화면 표시용 썸네일만 세션에 저장 (원본은 blob_store.py의 디스크 저장소에 두고 다이제스트로 찾음)
+if 'image_digest' not in st.session_state: st.session_state.image_digest = None
+if 'thumbnail' not in st.session_state: st.session_state.thumbnail = None
+# products : 탐지된 제품별 분석 결과 목록 [{"label", "crop"(썸네일), "profile_info", "cached", "timings"}, ...]
+if 'products' not in st.session_state: st.session_state.products = None
+if 'timings' not in st.session_state: st.session_state.timings = None
 
 # --- 업로드 페이지 ---
 if st.session_state.page == 'upload':
@@ -152,73 +53,28 @@ if st.session_state.page == 'upload':
     st.subheader("알고 싶은 제품의 사진을 올려보세요")
     uploaded_file = st.file_uploader("이미지 파일 업로드", type=["jpg", "jpeg", "png"])
     camera_photo = st.camera_input("카메라로 직접 찍기")
-    if uploaded_file:
-        st.session_state.image_source = uploaded_file.getvalue()
-        st.session_state.page = 'results'
-        st.rerun()
-    elif camera_photo:
-        st.session_state.image_source = camera_photo.getvalue()
-        st.session_state.page = 'results'
-        st.rerun()
+    photo = uploaded_file or camera_photo
+    if photo:
+        # PIL은 사진이 올라온 뒤에만 필요하므로 여기서 임포트 (업로드 화면 첫 표시를 가볍게 유지)
+        from blob_store import get_blob_store
+        from image_preprocess import make_thumbnail
+        image_bytes = photo.getvalue()
+        try:
+            st.session_state.thumbnail = make_thumbnail(image_bytes)
+        except Exception as e:
+            st.error(f"이미지를 읽을 수 없습니다: {e}")
+        else:
+            st.session_state.image_digest = get_blob_store().put(image_bytes)
+            st.session_state.page = 'results'
+            st.rerun()
 
 # --- 결과 페이지 (UI 수정) ---
 elif st.session_state.page == 'results':
-    if st.button("⬅️ 다른 이미지 분석하기"):
-        st.session_state.page = 'upload'
-        st.session_state.image_source = None
-        st.session_state.profile_info = None
-        st.rerun()
-
-    st.title("🧠 AI 종합 분석 결과")
-    st.markdown("---")
-    st.image(st.session_state.image_source, use_container_width=True)
-    st.markdown("---")
-
-    if st.session_state.profile_info is None:
-        # spinner : 사용자가 기다리는 동안 로딩 중임을 표시
-        with st.spinner('AI가 기업 프로필을 분석 중입니다...'):
-            # analyze_image_with_vision_api : Logo,label, OCR 등 Vision API 결과를 받아오기
-            vision_results = analyze_image_with_vision_api(vision_client, st.session_state.image_source)
-            # get_company_profile_with_gemini : Gemini 모델을 통해 기업 프로필 생성
-            st.session_state.profile_info = get_company_profile_with_gemini(gemini_model, st.session_state.image_source, vision_results)
-
-    profile_info = st.session_state.profile_info
-    if profile_info:
-        manufacturer = profile_info.get("제조사", "정보 없음")
-        product_name = profile_info.get("제품명", "정보 없음")
-        country = profile_info.get("제조사_국가", "정보 없음") # <-- [수정] 국가 변수 다시 추출
-        ticker = profile_info.get("종목코드", "정보 없음")
-        description = profile_info.get("company_description", "")
-        main_products = profile_info.get("main_products", [])
-        
-        # --- [수정] UI에 국가 정보 표시 복원 ---
-        st.subheader("📋 기업 및 제품 정보")
-        info_df = pd.DataFrame({
-            "항목": ["제조사 / 브랜드", "제품명", "제조사 국가", "종목코드 (Ticker)"],
-            "내용": [manufacturer, product_name, country, ticker]
-        })
-        st.table(info_df.set_index("항목"))
-
-        st.markdown("---")
-        st.subheader("📝 기업 소개")
-        st.markdown(description)
-        
-        st.markdown("---")
-        st.subheader("주요 생산 제품:")
-        for product in main_products:
-            st.markdown(f"**{product.get('category')}:** {product.get('description')}")
-        
-        st.markdown("---")
-        st.subheader("💹 관련 주식 정보")
-        if ticker and ticker != "정보 없음":
-            with st.spinner(f"'{ticker}'의 주가 데이터를 불러오는 중..."):
-                stock_chart_fig = plot_stock_chart(ticker)
-            
-            if stock_chart_fig:
-                st.plotly_chart(stock_chart_fig, use_container_width=True)
-            else:
-                st.warning(f"'{ticker}'의 주가 차트를 불러오는 데 실패했습니다.")
-        else:
-            st.info("분석된 기업의 상장 정보를 찾을 수 없거나, 지원하지 않는 시장의 종목입니다.")
-    else:
-        st.error("이미지에서 기업 및 제품 프로필을 생성하는 데 실패했습니다.")
\ No newline at end of file
+    import results_view     # 첫 결과 페이지에서만 임포트 (이후에는 이미 불러온 모듈을 그대로 사용)
+    results_view.render_results_page()
+
+# 세션별 메모리 사용량 기록 (관리자 페이지의 세션 표)
+ctx = get_script_run_ctx()
+if ctx: get_session_meter().record(ctx.session_id, st.session_state.to_dict())
+# 스크립트 1회 실행 비용 (예외로 중단된 st.rerun() 실행은 제외)
+telemetry.observe("rerun", time.perf_counter() - rerun_started, page=st.session_state.page)
@@ -0,0 +1,217 @@
+# --- 메모리 예산 캐시 ---
+# 프로세스 메모리에 두는 캐시(전처리 이미지, 제품 crop, Vision/Gemini 응답, 주가 차트)를 하나의 바이트 예산 안에서 관리합니다.
+# st.cache_data는 항목 수/크기 제한 없이 쌓이고 인자로 받은 이미지 bytes 전체를 키로 해시하므로, 트래픽이 이어지면 RSS가 계속 늘어납니다.
+# - 키: 인자들의 SHA-256 다이제스트 (bytes는 내용으로, 나머지는 JSON으로). 이름이 _로 시작하는 인자는 st.cache_data처럼 키에서 제외
+# - 크기: estimate_size()로 추정한 바이트 수. 전체 합이 예산을 넘으면 모든 캐시를 통틀어 가장 오래 쓰지 않은 항목부터 제거
+# - 계정: 캐시(namespace)별 항목 수/바이트/hit/miss/제거 횟수와 세션별 session_state 크기를 관리자 페이지(pages/1_Metrics.py)에 보여줌
+# st.cache_data와 달리 값을 복사하지 않고 같은 객체를 돌려주므로, 캐시된 값을 고치지 말고 새 객체를 만들어 써야 합니다.
+import os
+import sys
+import time
+import inspect
+import threading
+import functools
+import dataclasses
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from analysis import content_key
+from telemetry import get_telemetry
+
+MEMORY_BUDGET_BYTES = int(os.getenv("STOCKLENS_MEMORY_CACHE_MB", "256")) * 1024 * 1024
+MAX_ENTRY_RATIO = 0.25          # 예산의 1/4을 넘는 값 하나는 저장하지 않음 (다른 항목을 모두 밀어내지 않도록)
+SESSION_IDLE_SECONDS = int(os.getenv("STOCKLENS_SESSION_IDLE", "3600"))   # 이 시간 동안 실행이 없던 세션은 계정에서 제외
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """값이 차지하는 메모리(bytes)를 추정합니다. 같은 객체를 여러 번 참조하면 한 번만 셉니다."""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (bytes, bytearray, str, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):         # pandas DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes") and hasattr(value, "dtype"):                 # numpy 배열, pandas Series
+        return int(value.nbytes)
+    if hasattr(value, "getbuffer"):                                          # BytesIO (Streamlit UploadedFile 등)
+        return sys.getsizeof(value) + value.getbuffer().nbytes
+    if hasattr(value, "to_plotly_json"):                                     # plotly Figure
+        return estimate_size(value.to_plotly_json(), seen)
+    size = sys.getsizeof(value)
+    if isinstance(value, Mapping):
+        return size + sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, seen) for item in value)
+    if dataclasses.is_dataclass(value):
+        return size + sum(estimate_size(getattr(value, f.name), seen) for f in dataclasses.fields(value))
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), seen)
+    return size
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float               # 0이면 만료 없음
+
+
+class MemoryCache:
+    """여러 캐시(namespace)가 하나의 바이트 예산을 나눠 쓰는 LRU 캐시. 스레드 안전합니다."""
+
+    def __init__(self, max_bytes: int = MEMORY_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()     # 오래 안 쓴 항목이 앞쪽
+        self._bytes = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _ns(self, namespace: str) -> Dict[str, int]:
+        return self._stats.setdefault(namespace, {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0})
+
+    def _remove(self, entry_key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(entry_key)
+        self._bytes -= entry.size
+        stats = self._ns(entry_key[0])
+        stats["entries"] -= 1
+        stats["bytes"] -= entry.size
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """저장된 값을 반환합니다. 없거나 만료되었으면 default를 반환합니다."""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None and entry.expires_at and entry.expires_at < time.time():
+                self._remove((namespace, key))
+                entry = None
+            stats = self._ns(namespace)
+            if entry is None:
+                stats["misses"] += 1
+            else:
+                stats["hits"] += 1
+                self._entries.move_to_end((namespace, key))
+        get_telemetry().incr("cache_total", cache=namespace, result="miss" if entry is None else "hit")
+        return default if entry is None else entry.value
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """값을 저장하고 예산을 넘으면 오래 쓰지 않은 항목부터 제거합니다. 너무 커서 저장하지 않았으면 False를 반환합니다."""
+        size = estimate_size(value)
+        if size > self.max_bytes * MAX_ENTRY_RATIO:
+            return False
+        with self._lock:
+            if (namespace, key) in self._entries:
+                self._remove((namespace, key))
+            self._entries[(namespace, key)] = _Entry(value, size, time.time() + ttl if ttl else 0)
+            self._bytes += size
+            stats = self._ns(namespace)
+            stats["entries"] += 1
+            stats["bytes"] += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._ns(oldest[0])["evictions"] += 1
+        return True
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            for entry_key in [k for k in self._entries if namespace is None or k[0] == namespace]:
+                self._remove(entry_key)
+
+    def memoize(self, namespace: str, ttl: Optional[float] = None, cache_none: bool = True) -> Callable:
+        """st.cache_data 대신 쓰는 데코레이터. 이름이 _로 시작하는 인자(클라이언트 등)는 키에서 제외합니다.
+
+        cache_none=False이면 None 결과(오류 등)는 저장하지 않아 다음 호출에서 다시 시도합니다.
+        """
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                parts = [func.__qualname__]
+                for name, value in bound.arguments.items():
+                    if not name.startswith("_"):
+                        parts += [name, value]      # bytes는 내용 그대로, 나머지는 JSON으로 해시됨 (analysis.content_key)
+                key = content_key(*parts)
+                value = self.get(namespace, key, _MISSING)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    if value is not None or cache_none:
+                        self.put(namespace, key, value, ttl)
+                return value
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """전체 예산/사용량과 캐시별 항목 수, 바이트, hit/miss/제거 횟수."""
+        with self._lock:
+            return {"max_bytes": self.max_bytes, "bytes": self._bytes,
+                    "namespaces": {name: dict(stats) for name, stats in sorted(self._stats.items())}}
+
+
+class SessionMeter:
+    """세션별 session_state 크기를 기록합니다. (세션 종료는 알 수 없으므로 오래 실행이 없던 세션은 목록에서 뺌)"""
+
+    def __init__(self, idle_seconds: int = SESSION_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, session_id: str, state: Mapping[str, Any]) -> int:
+        """스크립트 실행이 끝날 때 호출합니다. 키별 크기를 계산해 저장하고 전체 크기를 반환합니다."""
+        sizes = {str(key): estimate_size(value) for key, value in state.items()}
+        with self._lock:
+            self._sessions[session_id] = {"bytes": sum(sizes.values()), "keys": sizes, "last_seen": time.time()}
+        return sum(sizes.values())
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """활성 세션별 크기. 큰 세션부터 정렬합니다."""
+        now = time.time()
+        with self._lock:
+            for session_id in [s for s, info in self._sessions.items() if now - info["last_seen"] > self.idle_seconds]:
+                del self._sessions[session_id]
+            rows = [{"session": session_id, "bytes": info["bytes"], "idle_seconds": now - info["last_seen"], "keys": dict(info["keys"])}
+                    for session_id, info in self._sessions.items()]
+        return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+
+def process_rss_bytes() -> Optional[int]:
+    """현재 프로세스의 RSS(bytes). 리눅스 외에는 최대 RSS로 대신합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+        except ImportError:
+            return None
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+_default_cache: Optional[MemoryCache] = None
+_default_meter: Optional[SessionMeter] = None
+_default_lock = threading.Lock()
+
+
+def get_memory_cache() -> MemoryCache:
+    """프로세스 전체에서 공유하는 기본 메모리 캐시."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = MemoryCache()
+        return _default_cache
+
+
+def get_session_meter() -> SessionMeter:
+    """프로세스 전체에서 공유하는 세션 크기 기록."""
+    global _default_meter
+    with _default_lock:
+        if _default_meter is None:
+            _default_meter = SessionMeter()
+        return _default_meter
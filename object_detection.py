@@ -0,0 +1,128 @@
+# --- 다중 객체(제품) 탐지 단계 ---
+# 전처리된 이미지에서 YOLOv8로 제품 후보를 찾고, 겹치거나 거의 같은 영역을 정리한 뒤
+# 제품별 잘라낸 이미지(crop)를 돌려줍니다. 잘라낸 이미지는 각각 Vision + Gemini로 분석됩니다.
+# 모델은 프로세스당 하나를 모든 세션이 공유하며, ultralytics 예측기는 스레드 안전하지 않으므로 predict는 한 번에 하나씩 실행합니다.
+import os
+import threading
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from PIL import Image
+
+from image_preprocess import decode_image, encode_image
+from result_cache import hamming_distance, phash_from_image
+
+# CPU에서도 빠른 nano 모델을 기본으로 사용 (최초 실행 시 ultralytics가 가중치를 내려받음)
+YOLO_MODEL = os.getenv("STOCKLENS_YOLO_MODEL", "yolov8n.pt")
+YOLO_IMAGE_SIZE = int(os.getenv("STOCKLENS_YOLO_IMGSZ", "640"))
+MIN_CONFIDENCE = float(os.getenv("STOCKLENS_YOLO_CONF", "0.35"))
+MAX_PRODUCTS = int(os.getenv("STOCKLENS_MAX_PRODUCTS", "6"))
+MIN_AREA_RATIO = 0.01          # 전체 이미지의 1% 미만 영역은 분석해도 정보가 거의 없음
+IOU_THRESHOLD = 0.5            # 이 이상 겹치면 같은 제품
+CONTAINMENT_THRESHOLD = 0.85   # 작은 박스가 큰 박스 안에 이만큼 들어가 있으면 같은 제품(뚜껑/라벨 등 부분 탐지)
+CROP_HASH_DISTANCE = 6         # 잘라낸 이미지의 dHash가 이 이하로 차이나면 같은 제품으로 간주
+CROP_PADDING = 0.05            # 박스 주변 여백(박스 크기 대비 비율). 로고가 가장자리에서 잘리는 것을 방지
+
+_predict_lock = threading.Lock()   # 공유 모델의 predict 직렬화 (동시에 호출하면 예측기 내부 상태가 섞임)
+
+# COCO 클래스 중 '제품'으로 보기 어려운 것들
+IGNORED_CLASSES = {
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench",
+    "bird", "cat", "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe",
+    "dining table", "bed", "couch", "chair", "potted plant", "toilet",
+}
+
+
+@dataclass(frozen=True)
+class Detection:
+    box: Tuple[int, int, int, int]  # (x1, y1, x2, y2) 전처리 이미지 기준 픽셀 좌표
+    label: str                      # YOLO 클래스 이름
+    confidence: float
+
+
+@dataclass(frozen=True)
+class ProductCrop:
+    image_bytes: bytes
+    label: str
+    confidence: float
+    box: Tuple[int, int, int, int]
+    whole_image: bool = False       # 탐지된 제품이 없어 전처리 이미지 전체를 그대로 쓴 경우 (다시 전처리할 필요 없음)
+
+
+def load_detector(model_name: str = YOLO_MODEL):
+    """YOLOv8 모델을 불러옵니다. ultralytics/torch는 무거우므로 이 함수가 호출될 때 임포트합니다."""
+    from ultralytics import YOLO
+    return YOLO(model_name)
+
+
+def _area(box: Tuple[int, int, int, int]) -> int:
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def _intersection(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> int:
+    return _area((max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])))
+
+
+def _is_duplicate_box(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    inter = _intersection(a, b)
+    if not inter:
+        return False
+    union = _area(a) + _area(b) - inter
+    return inter / union >= IOU_THRESHOLD or inter / min(_area(a), _area(b)) >= CONTAINMENT_THRESHOLD
+
+
+def detect_products(detector, img: Image.Image, min_confidence: float = MIN_CONFIDENCE) -> List[Detection]:
+    """이미지에서 제품 후보 박스를 찾아 신뢰도 순으로 반환합니다. 겹치는 박스는 클래스와 관계없이 하나만 남깁니다."""
+    with _predict_lock:
+        results = detector.predict(img, imgsz=YOLO_IMAGE_SIZE, conf=min_confidence, device="cpu", verbose=False)
+        if not results:
+            return []
+        names = results[0].names
+        boxes = list(zip(results[0].boxes.xyxy.tolist(), results[0].boxes.cls.tolist(), results[0].boxes.conf.tolist()))
+    min_area = MIN_AREA_RATIO * img.width * img.height
+    candidates = []
+    for xyxy, cls, conf in boxes:
+        label = names[int(cls)]
+        box = tuple(int(round(v)) for v in xyxy)
+        if label in IGNORED_CLASSES or _area(box) < min_area:
+            continue
+        candidates.append(Detection(box=box, label=label, confidence=float(conf)))
+
+    kept: List[Detection] = []
+    for detection in sorted(candidates, key=lambda d: d.confidence, reverse=True):
+        if not any(_is_duplicate_box(detection.box, other.box) for other in kept):
+            kept.append(detection)
+    return kept
+
+
+def _padded(box: Tuple[int, int, int, int], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    pad_x = int((box[2] - box[0]) * CROP_PADDING)
+    pad_y = int((box[3] - box[1]) * CROP_PADDING)
+    return (max(0, box[0] - pad_x), max(0, box[1] - pad_y), min(size[0], box[2] + pad_x), min(size[1], box[3] + pad_y))
+
+
+def crop_products(detector, image_bytes: bytes, max_products: int = MAX_PRODUCTS) -> List[ProductCrop]:
+    """전처리된 이미지에서 제품을 탐지해 잘라낸 이미지 목록을 반환합니다.
+
+    제품이 하나도 탐지되지 않으면 전체 이미지를 하나의 제품으로 취급합니다.
+    겉모습이 거의 같은 crop(같은 제품 여러 개가 진열된 경우 등)은 한 번만 분석하도록 제거합니다.
+    """
+    img = decode_image(image_bytes)
+    detections = detect_products(detector, img) if detector else []
+    crops: List[ProductCrop] = []
+    hashes: List[int] = []
+    for detection in detections:
+        crop = img.crop(_padded(detection.box, img.size))
+        crop_hash = phash_from_image(crop)
+        if any(hamming_distance(crop_hash, other) <= CROP_HASH_DISTANCE for other in hashes):
+            continue
+        hashes.append(crop_hash)
+        crops.append(ProductCrop(image_bytes=encode_image(crop), label=detection.label,
+                                 confidence=detection.confidence, box=detection.box))
+        if len(crops) >= max_products:
+            break
+    if not crops:
+        crops.append(ProductCrop(image_bytes=image_bytes, label="전체 이미지", confidence=1.0, box=(0, 0, img.width, img.height),
+                                 whole_image=True))
+    return crops
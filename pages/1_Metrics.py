@@ -0,0 +1,83 @@
+# --- 관리자용 지표 페이지 ---
+# telemetry.py가 모은 단계별 지연 시간(p50/p95/p99)과 캐시/오류 카운터를 보여줍니다.
+# 같은 Streamlit 프로세스의 모든 세션이 남긴 기록입니다. 세션 ID와 기록/캐시 초기화 버튼이 있으므로
+# STOCKLENS_ADMIN_PASSWORD가 설정되어 있을 때만 열리며, 설정되지 않았으면 앱 사용자 누구에게도 보여주지 않습니다.
+import os
+import hmac
+
+import pandas as pd
+import streamlit as st
+
+from blob_store import get_blob_store
+from memory_cache import get_memory_cache, get_session_meter, process_rss_bytes
+from telemetry import get_telemetry
+from warmup import get_warmup
+
+MB = 1024 * 1024
+
+st.set_page_config(page_title="파이프라인 지표", layout="wide")
+st.title("📊 파이프라인 지표")
+
+ADMIN_PASSWORD = os.getenv("STOCKLENS_ADMIN_PASSWORD")
+if not ADMIN_PASSWORD:
+    st.info("관리자 페이지가 비활성화되어 있습니다. 서버에 STOCKLENS_ADMIN_PASSWORD를 설정하면 사용할 수 있습니다.")
+    st.stop()
+if not hmac.compare_digest(st.text_input("관리자 비밀번호", type="password").encode(), ADMIN_PASSWORD.encode()):
+    st.stop()
+
+telemetry = get_telemetry()
+snapshot = telemetry.snapshot()
+st.caption(f"가동 후 {snapshot['uptime_seconds'] / 60:.0f}분 · 백분위는 단계별 최근 {telemetry.window}건 기준")
+
+if snapshot["stages"]:
+    stages = pd.DataFrame(snapshot["stages"]).T.sort_index()
+    stages = stages.rename(columns={"count": "횟수", "mean_ms": "평균(ms)", "p50_ms": "p50(ms)", "p95_ms": "p95(ms)", "p99_ms": "p99(ms)"})
+    stages["횟수"] = stages["횟수"].astype(int)
+    st.subheader("단계별 소요 시간")
+    st.dataframe(stages.round(1), use_container_width=True)
+else:
+    st.info("아직 기록된 단계가 없습니다. 메인 페이지에서 이미지를 분석하면 채워집니다.")
+
+if snapshot["counters"]:
+    st.subheader("카운터 (캐시 hit/miss, 단계별 오류)")
+    st.dataframe(pd.DataFrame(snapshot["counters"]).fillna(""), use_container_width=True, hide_index=True)
+
+warmup = pd.DataFrame(get_warmup().status())
+st.subheader("워밍업 (클라이언트/모델 초기화)")
+st.dataframe(warmup.rename(columns={"task": "작업", "state": "상태", "trigger": "실행", "seconds": "소요(초)", "error": "오류"}).round(2),
+             use_container_width=True, hide_index=True)
+
+# 메모리 계정 : 메모리 캐시(memory_cache.py)별 사용량, 세션별 session_state 크기, 디스크로 내린 업로드 원본
+st.subheader("메모리 사용량")
+memory_cache = get_memory_cache()
+cache_stats = memory_cache.stats()
+blob_stats = get_blob_store().stats()
+rss = process_rss_bytes()
+st.caption((f"프로세스 RSS {rss / MB:.0f}MB · " if rss else "") +
+           f"메모리 캐시 {cache_stats['bytes'] / MB:.1f} / {cache_stats['max_bytes'] / MB:.0f}MB · "
+           f"업로드 원본(디스크) {blob_stats['files']}개, {blob_stats['bytes'] / MB:.1f}MB")
+if cache_stats["namespaces"]:
+    caches = pd.DataFrame(cache_stats["namespaces"]).T
+    caches["bytes"] = caches["bytes"] / MB
+    st.dataframe(caches.rename(columns={"entries": "항목 수", "bytes": "크기(MB)", "hits": "hit", "misses": "miss", "evictions": "제거"}).round(2),
+                 use_container_width=True)
+sessions = get_session_meter().stats()
+if sessions:
+    st.dataframe(pd.DataFrame([{
+        "세션": row["session"][:8],
+        "크기(KB)": round(row["bytes"] / 1024, 1),
+        "가장 큰 항목": ", ".join(f"{key} {size / 1024:.0f}KB" for key, size in sorted(row["keys"].items(), key=lambda kv: -kv[1])[:3]),
+        "마지막 실행(초 전)": round(row["idle_seconds"]),
+    } for row in sessions]), use_container_width=True, hide_index=True)
+
+with st.expander("Prometheus 텍스트 형식"):
+    st.code(telemetry.prometheus_text(), language="text")
+
+if st.button("🔄 새로 고침"):
+    st.rerun()
+if st.button("🗑️ 기록 초기화"):
+    telemetry.reset()
+    st.rerun()
+if st.button("🧹 메모리 캐시 비우기"):
+    memory_cache.clear()
+    st.rerun()
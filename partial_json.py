@@ -0,0 +1,118 @@
+# --- 스트리밍 JSON 파서 ---
+# Gemini 스트리밍 응답처럼 JSON 텍스트가 조각(chunk)으로 나뉘어 들어올 때,
+# 최상위 객체의 필드가 하나 완성되는 즉시 꺼내줍니다. (예: "제조사" 값이 끝나면 나머지를 기다리지 않고 바로 사용)
+# ```json 코드 블록 표시나 앞뒤 설명 문장은 무시하고, 마지막에 닫는 괄호가 없거나 쉼표가 남아도 완성된 필드는 살려둡니다.
+# 코드 블록 밖의 객체(예: 설명 문장 속 {예시})를 먼저 읽었더라도 뒤에 ```json 블록이 오면 그 블록의 객체를 사용합니다.
+# (analysis.parse_profile_response와 같은 우선순위) 닫는 괄호까지 읽었는지는 done으로 확인합니다.
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+FENCE = "```json"
+
+
+class StreamingJsonParser:
+    """청크 단위로 feed()하면 새로 완성된 최상위 (키, 값) 목록을 반환하는 관대한 JSON 파서."""
+
+    def __init__(self):
+        self.buffer = ""
+        self._restart(0)
+
+    def _restart(self, pos: int) -> None:
+        # buffer의 pos 위치부터 새 객체를 찾도록 상태를 초기화
+        self.fields: Dict[str, Any] = {}
+        self.done = False           # 최상위 객체의 닫는 괄호까지 읽었는지
+        self._pos = pos             # 다음에 읽을 buffer 위치
+        self._end = 0               # 읽은 객체의 닫는 괄호 다음 위치
+        self._fenced = False        # 읽고 있는 객체가 ```json 코드 블록 안에서 시작했는지
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = "key"         # 최상위에서 기대하는 토큰: key / colon / value / string_value / container / scalar / comma
+        self._token_start = 0
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            if self.done:
+                break
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_string(i, completed)
+                continue
+            if self._depth == 0:
+                if c == "{":            # 객체 시작 전의 ```json 표시나 설명 문장은 건너뜀
+                    self._depth = 1
+                    self._state = "key"
+                    fence = buffer.rfind("```", 0, i)
+                    self._fenced = fence >= 0 and buffer.startswith(FENCE, fence)
+                continue
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state in ("key", "value"):
+                    self._token_start = i
+                    if self._state == "value":
+                        self._state = "string_value"
+            elif c in "{[":
+                if self._depth == 1 and self._state == "value":
+                    self._token_start = i
+                    self._state = "container"
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._state == "container":
+                    self._emit(buffer[self._token_start:i + 1], completed)
+                elif self._depth == 0:
+                    if self._state == "scalar":
+                        self._emit(buffer[self._token_start:i], completed)
+                    self.done = True
+                    self._end = i + 1
+            elif self._depth == 1:
+                if c == ":" and self._state == "colon":
+                    self._state = "value"
+                elif c == ",":
+                    if self._state == "scalar":
+                        self._emit(buffer[self._token_start:i], completed)
+                    self._state = "key"
+                elif self._state == "value" and not c.isspace():
+                    self._token_start = i
+                    self._state = "scalar"
+        self._pos = len(buffer)
+        if self.done and not self._fenced:
+            fence = buffer.find(FENCE, self._end)
+            if fence >= 0:
+                self._restart(fence + len(FENCE))
+                completed += self.feed("")
+        return completed
+
+    def _close_string(self, end: int, completed: List[Tuple[str, Any]]) -> None:
+        text = self.buffer[self._token_start:end + 1]
+        if self._state == "key":
+            self._key = json.loads(text)
+            self._state = "colon"
+        elif self._state == "string_value":
+            self._emit(text, completed)
+
+    def _emit(self, text: str, completed: List[Tuple[str, Any]]) -> None:
+        try:
+            value = json.loads(text.strip())
+        except json.JSONDecodeError:
+            value = text.strip()    # 모델이 형식을 조금 어겨도(예: 따옴표 없는 값) 문자열로 보존
+        if self._key is not None:
+            self.fields[self._key] = value
+            completed.append((self._key, value))
+        self._key = None
+        self._state = "comma"
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """지금까지 완성된 필드로 만든 객체. 객체 시작을 찾지 못했으면 None."""
+        return dict(self.fields) if self.fields else None
@@ -0,0 +1,272 @@
+# --- 로컬 주가(OHLCV) 저장소 ---
+# fdr.DataReader로 받은 일봉을 종목별로 SQLite에 쌓아두고, 이후에는 '마지막으로 저장된 날짜 이후'만 추가로 받습니다.
+# 차트는 1M/1Y/5Y/max 어떤 기간이든 로컬 데이터로 그리며, 언제 다시 받을지는 프로세스 수명이 아니라
+# 아래의 명시적인 신선도(staleness) 규칙으로 결정합니다.
+#   1) 마지막 조회 후 PRICE_REFRESH_SECONDS(기본 15분)가 지나지 않았으면 네트워크 없이 로컬 데이터 사용
+#   2) 주말에는 금요일 이후에 한 번 받아둔 데이터가 있으면 그대로 사용 (새 거래일이 없음)
+#   3) 그 외에는 마지막 저장일부터(당일 미완성 봉을 덮어쓰기 위해 포함) 오늘까지만 추가로 받음
+# 휴장일(시장별 달력 차이)로 비어 있는 날짜는 '없는 데이터'로 취급하지 않으며, 빈 응답도 조회 시각만 갱신합니다.
+import os
+import time
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from rate_limit import RateLimiterGroup
+from result_cache import DATA_DIR
+from telemetry import get_telemetry
+
+PRICE_DB_PATH = os.getenv("STOCKLENS_PRICE_DB", os.path.join(DATA_DIR, "prices.sqlite3"))
+PRICE_REFRESH_SECONDS = int(os.getenv("STOCKLENS_PRICE_REFRESH", str(15 * 60)))
+MAX_HISTORY_START = date(1990, 1, 1)         # 'max' 기간 요청 시 받을 가장 이른 날짜
+PRICE_WORKERS = int(os.getenv("STOCKLENS_PRICE_WORKERS", "8"))               # 여러 종목 동시 조회 스레드 수
+PRICE_RATE_PER_SOURCE = float(os.getenv("STOCKLENS_PRICE_RATE", "5"))        # 데이터 원본별 초당 최대 요청 수
+
+# 차트 기간 → 시작일 계산에 쓸 일수 (None은 전체)
+RANGES: Dict[str, Optional[int]] = {"1M": 31, "1Y": 365, "5Y": 5 * 365 + 2, "max": None}
+DEFAULT_RANGE = "1Y"
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# 시장 → 비교 기준 지수 (fdr.DataReader 심볼)
+BENCHMARKS = {
+    "KRX": "KS11", "NASDAQ": "IXIC", "NYSE": "US500", "AMEX": "US500",
+    "TSE": "N225", "HKEX": "HSI", "SSE": "SSEC", "SZSE": "SSEC",
+}
+
+
+@dataclass
+class BatchResult:
+    prices: Dict[str, pd.DataFrame] = field(default_factory=dict)   # 성공한 종목의 일봉
+    errors: Dict[str, str] = field(default_factory=dict)            # 실패한 종목 → 오류 메시지
+    elapsed: float = 0.0
+
+
+def source_of(ticker: str) -> str:
+    """fdr.DataReader가 종목코드 형태에 따라 사용하는 데이터 원본을 구분합니다. 속도 제한은 원본 단위로 겁니다."""
+    if ticker.isdigit() and len(ticker) == 6:
+        return "krx"            # 한국 종목 (KRX/네이버)
+    if ticker in BENCHMARKS.values():
+        return "index"          # 지수
+    return "global"             # 해외 종목 (Yahoo 등)
+
+
+def range_start(range_key: str, today: Optional[date] = None) -> date:
+    """차트 기간 이름(1M/1Y/5Y/max)을 시작 날짜로 바꿉니다."""
+    if range_key not in RANGES:
+        raise ValueError(f"지원하지 않는 기간입니다: {range_key}")
+    days = RANGES[range_key]
+    today = today or date.today()
+    return MAX_HISTORY_START if days is None else today - timedelta(days=days)
+
+
+def lookback_start(start: date, bars: int) -> date:
+    """start보다 거래일 기준 bars개 앞선 날짜(주말과 공휴일을 감안해 넉넉히 잡음). 이동평균 계산용 앞부분에 사용합니다."""
+    return start - timedelta(days=bars * 7 // 5 + 14) if bars else start
+
+
+def _last_weekday(day: date) -> date:
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class PriceStore:
+    """종목별 일봉을 SQLite에 저장하고 필요한 구간만 증분으로 받아오는 저장소."""
+
+    def __init__(self, path: str = PRICE_DB_PATH, refresh_seconds: int = PRICE_REFRESH_SECONDS, reader=None,
+                 rate_per_source: float = PRICE_RATE_PER_SOURCE):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self._limiter = RateLimiterGroup(rate_per_source)
+        # reader(ticker, start, end) -> DataFrame. 기본은 fdr.DataReader (벤치마크/테스트에서는 가짜 reader 사용 가능)
+        self._reader = reader
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._prefetcher: Optional[ThreadPoolExecutor] = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL, day TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    PRIMARY KEY (ticker, day)
+                ) WITHOUT ROWID""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    ticker TEXT PRIMARY KEY,
+                    history_start TEXT NOT NULL,   -- 원본에서 받아본 가장 이른 시작일 (그 이전은 아직 요청한 적 없음)
+                    last_day TEXT,                 -- 저장된 마지막 거래일
+                    fetched_at REAL NOT NULL       -- 마지막으로 원본에서 최신 구간을 받은 시각
+                )""")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _read_source(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        if self._reader is None:
+            import FinanceDataReader as fdr
+            self._reader = fdr.DataReader
+        self._limiter.acquire(source_of(ticker))
+        with get_telemetry().span("price_fetch", ticker=ticker, source=source_of(ticker), days=(end - start).days) as span:
+            df = self._reader(ticker, start, end)
+            span["rows"] = 0 if df is None else len(df)
+        return df
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        # 같은 종목을 여러 세션이 동시에 요청해도 원본 요청은 한 번만 나가도록 종목별 잠금
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _meta(self, conn: sqlite3.Connection, ticker: str) -> Optional[tuple]:
+        return conn.execute("SELECT history_start, last_day, fetched_at FROM meta WHERE ticker = ?", (ticker,)).fetchone()
+
+    def is_fresh(self, fetched_at: float, last_day: Optional[str], now: Optional[datetime] = None) -> bool:
+        """모듈 상단의 신선도 규칙 1), 2)에 해당하면 True."""
+        now = now or datetime.now()
+        if now.timestamp() - fetched_at < self.refresh_seconds:
+            return True
+        if now.weekday() >= 5 and last_day:
+            friday = _last_weekday(now.date())
+            fetched_day = datetime.fromtimestamp(fetched_at).date()
+            return fetched_day > friday and date.fromisoformat(last_day) >= friday
+        return False
+
+    def _store(self, conn: sqlite3.Connection, ticker: str, df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        df = df.reindex(columns=OHLCV_COLUMNS)
+        rows = [
+            (ticker, pd.Timestamp(day).date().isoformat(), *[None if pd.isna(v) else float(v) for v in values])
+            for day, values in zip(df.index, df.itertuples(index=False, name=None))
+        ]
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def sync(self, ticker: str, start: date) -> bool:
+        """start 이후 데이터가 로컬에 최신 상태로 있도록 필요한 구간만 원본에서 받아옵니다.
+
+        네트워크 요청이 있었으면 True를 반환합니다. 원본 오류는 그대로 예외로 올라갑니다.
+        """
+        with self._ticker_lock(ticker):
+            with self._connect() as conn:
+                meta = self._meta(conn, ticker)
+            today = date.today()
+            if meta and date.fromisoformat(meta[0]) <= start and self.is_fresh(meta[2], meta[1]):
+                get_telemetry().incr("cache_total", cache="price", result="hit")
+                return False
+            get_telemetry().incr("cache_total", cache="price", result="miss")
+
+            fetched = tail_fetched = False
+            history_start = date.fromisoformat(meta[0]) if meta else start
+            last_day = meta[1] if meta else None
+            frames = []
+            if meta is None:
+                frames.append(self._read_source(ticker, start, today))
+                fetched = tail_fetched = True
+            else:
+                if start < history_start:
+                    # 더 긴 기간이 요청됨: 아직 받지 않은 앞부분만 추가로 받음
+                    frames.append(self._read_source(ticker, start, history_start))
+                    history_start = start
+                    fetched = True
+                if not self.is_fresh(meta[2], last_day):
+                    # 마지막 저장일부터 다시 받아 당일(장중) 봉을 최종 값으로 덮어씀
+                    delta_start = date.fromisoformat(last_day) if last_day else history_start
+                    frames.append(self._read_source(ticker, delta_start, today))
+                    fetched = tail_fetched = True
+
+            with self._connect() as conn:
+                for df in frames:
+                    self._store(conn, ticker, df)
+                stored_last = conn.execute("SELECT MAX(day) FROM bars WHERE ticker = ?", (ticker,)).fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (ticker, history_start, last_day, fetched_at) VALUES (?, ?, ?, ?)",
+                    (ticker, min(history_start, start).isoformat(), stored_last, time.time() if tail_fetched else meta[2]),
+                )
+            return fetched
+
+    def load(self, ticker: str, start: date, end: Optional[date] = None) -> pd.DataFrame:
+        """로컬에 저장된 일봉을 DataFrame(Date 인덱스, OHLCV 컬럼)으로 반환합니다. 네트워크를 사용하지 않습니다."""
+        end = end or date.today()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, open, high, low, close, volume FROM bars WHERE ticker = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=["Date", *OHLCV_COLUMNS])
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.set_index("Date")
+
+    def get_history(self, ticker: str, range_key: str = DEFAULT_RANGE, lookback_bars: int = 0) -> pd.DataFrame:
+        """기간 이름에 맞는 일봉을 반환합니다. 신선도 규칙을 만족하면 네트워크 요청 없이 로컬 데이터만 사용합니다.
+
+        lookback_bars를 주면 기간 시작일보다 그만큼의 거래일을 앞에 더 붙여 반환합니다. (이동평균선 계산용)
+        """
+        start = lookback_start(range_start(range_key), lookback_bars)
+        self.sync(ticker, start)
+        return self.load(ticker, start)
+
+    def prefetch(self, ticker: str, range_key: str = DEFAULT_RANGE, lookback_bars: int = 0) -> Future:
+        """get_history를 백그라운드에서 미리 실행합니다. 나중에 같은 종목을 요청하면 종목별 잠금 덕분에
+        진행 중인 요청을 기다렸다가 로컬 데이터를 읽으므로 원본 요청이 중복되지 않습니다."""
+        with self._locks_guard:
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(max_workers=PRICE_WORKERS, thread_name_prefix="price-prefetch")
+        return self._prefetcher.submit(self.get_history, ticker, range_key, lookback_bars)
+
+    def get_many(self, tickers: Iterable[str], range_key: str = DEFAULT_RANGE, max_workers: int = PRICE_WORKERS) -> BatchResult:
+        """여러 종목의 일봉을 스레드 풀에서 동시에 가져옵니다.
+
+        일부 종목이 실패해도 나머지 결과는 그대로 반환하며, 실패 원인은 errors에 담깁니다.
+        원본 요청은 원본별 토큰 버킷으로 속도가 제한되고, 로컬 데이터가 신선한 종목은 네트워크를 쓰지 않습니다.
+        """
+        unique = list(dict.fromkeys(t for t in tickers if t))
+        result = BatchResult()
+        if not unique:
+            return result
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique))), thread_name_prefix="price") as executor:
+            futures = {ticker: executor.submit(self.get_history, ticker, range_key) for ticker in unique}
+            for ticker, future in futures.items():
+                try:
+                    df = future.result()
+                except Exception as e:
+                    result.errors[ticker] = str(e) or type(e).__name__
+                    continue
+                if df.empty:
+                    result.errors[ticker] = "데이터 없음"
+                else:
+                    result.prices[ticker] = df
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+def normalize_closes(prices: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """종목별 종가를 각 종목의 첫 거래일 = 100 으로 환산해 한 표로 합칩니다. (시장별 휴장일 차이는 직전 값으로 채움)"""
+    closes = pd.DataFrame({ticker: df["Close"] for ticker, df in prices.items()}).sort_index().ffill()
+    return closes / closes.bfill().iloc[0] * 100
+
+
+_default_store: Optional[PriceStore] = None
+_default_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """프로세스 전체에서 공유하는 기본 저장소."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
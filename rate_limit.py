@@ -0,0 +1,54 @@
+# --- 토큰 버킷 방식 호출 속도 제한 ---
+# 외부 API(주가 데이터 원본 등)에 초당 요청 수 제한을 걸 때 사용합니다.
+# 버킷에는 최대 capacity개의 토큰이 있고 초당 rate개씩 채워지며, 요청 1건이 토큰 1개를 사용합니다.
+import time
+import threading
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """스레드 안전한 토큰 버킷. acquire()는 토큰이 생길 때까지 기다린 시간(초)을 반환합니다."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate는 0보다 커야 합니다: {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        # 토큰을 미리 차감하고(음수 허용) 기다려야 할 시간을 계산. 대기자들이 순서대로 줄을 서게 됨
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiterGroup:
+    """이름(원본/백엔드)별로 토큰 버킷을 하나씩 만들어 관리합니다."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, rates: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.rates = rates or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name: str) -> TokenBucket:
+        with self._lock:
+            if name not in self._buckets:
+                self._buckets[name] = TokenBucket(self.rates.get(name, self.rate), self.capacity)
+            return self._buckets[name]
+
+    def acquire(self, name: str, tokens: float = 1.0) -> float:
+        return self.bucket(name).acquire(tokens)
@@ -0,0 +1,170 @@
+# --- 이미지 분석 결과 영구 캐시 ---
+# Vision + Gemini 분석 결과를 SQLite 파일에 저장해두고, '비슷한 사진'이 다시 들어오면
+# 유료 API를 다시 호출하지 않고 저장된 결과를 바로 돌려줍니다.
+# - 키: 디코딩된 이미지의 지각 해시(dHash, 64bit). 재인코딩/약간의 각도 차이에도 값이 거의 같음
+# - 조회: 해밍 거리(다른 비트 수)가 max_distance 이하인 항목을 같은 이미지로 간주
+# - 만료: TTL(초) 경과 항목 삭제 + 전체 크기가 max_bytes를 넘으면 오래 안 쓴 항목부터 삭제(LRU)
+# - 통계: hit/miss 횟수를 DB에 함께 기록하므로 여러 컨테이너가 같은 볼륨을 쓰면 합산됨
+import os
+import io
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+DATA_DIR = os.getenv("STOCKLENS_DATA_DIR", ".stocklens_cache")
+DEFAULT_CACHE_PATH = os.getenv("STOCKLENS_CACHE_PATH", os.path.join(DATA_DIR, "results.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("STOCKLENS_CACHE_TTL", str(7 * 24 * 3600)))        # 기본 7일
+DEFAULT_MAX_BYTES = int(os.getenv("STOCKLENS_CACHE_MAX_MB", "256")) * 1024 * 1024       # 기본 256MB
+DEFAULT_MAX_DISTANCE = int(os.getenv("STOCKLENS_CACHE_MAX_DISTANCE", "6"))              # 64bit 중 6bit 이하 차이
+
+HASH_SIZE = 8                 # 8x8 = 64bit 해시
+BAND_COUNT = 8                # 64bit를 8bit씩 8개 구간으로 나눠 인덱싱
+BAND_BITS = 64 // BAND_COUNT
+
+
+def compute_phash(image_bytes: bytes) -> int:
+    """이미지를 디코딩한 뒤 dHash(차이 해시)를 계산해 64bit 정수로 반환합니다.
+
+    EXIF 회전을 먼저 적용하고 흑백 9x8로 줄인 뒤, 가로로 이웃한 픽셀의 밝기 대소를 비트로 기록합니다.
+    같은 제품을 다시 찍거나 JPEG로 재인코딩해도 대부분의 비트가 유지됩니다.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        return phash_from_image(ImageOps.exif_transpose(img))
+
+
+def phash_from_image(img: Image.Image) -> int:
+    """이미 디코딩(및 EXIF 회전 적용)된 이미지로부터 dHash를 계산합니다."""
+    small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (1 if pixels[offset + col] > pixels[offset + col + 1] else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """두 해시 사이에 서로 다른 비트의 개수."""
+    return bin(a ^ b).count("1")
+
+
+def _bands(phash: int) -> Tuple[int, ...]:
+    # 해밍 거리가 d 이하라면 (비둘기집 원리에 의해) d < BAND_COUNT 일 때 최소 한 구간은 완전히 일치합니다.
+    # 구간별 인덱스로 후보를 좁힌 뒤 실제 거리만 파이썬에서 계산합니다.
+    mask = (1 << BAND_BITS) - 1
+    return tuple((phash >> (BAND_BITS * i)) & mask for i in range(BAND_COUNT))
+
+
+class ResultCache:
+    """지각 해시를 키로 하는 SQLite 기반 분석 결과 캐시."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_distance: int = DEFAULT_MAX_DISTANCE):
+        if max_distance >= BAND_COUNT:
+            raise ValueError(f"max_distance는 {BAND_COUNT} 미만이어야 합니다: {max_distance}")
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            band_columns = ", ".join(f"b{i} INTEGER NOT NULL" for i in range(BAND_COUNT))
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    phash TEXT NOT NULL,
+                    {band_columns},
+                    payload TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            for i in range(BAND_COUNT):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_entries_b{i} ON entries (b{i})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany("INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [("hits",), ("misses",), ("evictions",)])
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 여러 프로세스/컨테이너가 같은 파일을 공유하므로, 잠금 대기 시간을 넉넉히 둡니다.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:          # 정상 종료 시 commit, 예외 시 rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, image_bytes: bytes) -> Optional[Dict]:
+        """비슷한 이미지의 결과가 있으면 반환하고, 없으면 None을 반환합니다."""
+        return self.get_by_hash(compute_phash(image_bytes))
+
+    def get_by_hash(self, phash: int) -> Optional[Dict]:
+        now = time.time()
+        bands = _bands(phash)
+        where = " OR ".join(f"b{i} = ?" for i in range(BAND_COUNT))
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, phash, payload FROM entries WHERE created_at >= ? AND ({where})",
+                (now - self.ttl_seconds, *bands),
+            ).fetchall()
+            best = None
+            for row_id, stored_hash, payload in rows:
+                distance = hamming_distance(phash, int(stored_hash, 16))
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, row_id, payload)
+            if best is None:
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE id = ?", (now, best[1]))
+            conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+        return json.loads(best[2])
+
+    def put(self, image_bytes: bytes, result: Dict) -> None:
+        """분석 결과를 저장하고 TTL/용량 제한에 맞춰 오래된 항목을 정리합니다."""
+        self.put_by_hash(compute_phash(image_bytes), result)
+
+    def put_by_hash(self, phash: int, result: Dict) -> None:
+        now = time.time()
+        payload = json.dumps(result, ensure_ascii=False)
+        size_bytes = len(payload.encode("utf-8"))
+        band_names = ", ".join(f"b{i}" for i in range(BAND_COUNT))
+        placeholders = ", ".join("?" for _ in range(BAND_COUNT))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO entries (phash, {band_names}, payload, size_bytes, created_at, last_access) "
+                f"VALUES (?, {placeholders}, ?, ?, ?, ?)",
+                (f"{phash:016x}", *_bands(phash), payload, size_bytes, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()[0]
+        removed = 0
+        if total > self.max_bytes:
+            # 가장 오래 사용되지 않은 항목부터 용량이 제한 아래로 내려갈 때까지 삭제
+            for row_id, size_bytes in conn.execute("SELECT id, size_bytes FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE id = ?", (row_id,))
+                total -= size_bytes
+                removed += 1
+        if expired or removed:
+            conn.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (expired + removed,))
+
+    def stats(self) -> Dict[str, int]:
+        """hit/miss/eviction 횟수와 현재 항목 수, 전체 크기(bytes)를 반환합니다."""
+        with self._connect() as conn:
+            result = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM entries").fetchone()
+        result.update(entries=count, size_bytes=total)
+        return result
@@ -0,0 +1,443 @@
+# --- 결과 화면 ---
+# main_app.py의 결과 페이지와, 그 페이지에서만 쓰는 분석/차트 함수들입니다.
+# 무거운 라이브러리(pandas, plotly, Google 클라이언트, torch)는 여기서만 임포트되므로 업로드 화면은 이것들 없이 뜨고,
+# main_app.py가 결과 페이지에 처음 들어갈 때 이 모듈을 불러옵니다. 모듈은 프로세스당 한 번만 실행되므로
+# 아래 함수 정의와 캐시 데코레이터도 상호작용(rerun)마다 다시 만들어지지 않습니다.
+# 클라이언트/모델은 warmup.py가 서버 시작 직후 백그라운드에서 만들어 둔 것을 가져오며, 아직 준비 중이면 필요한 곳에서 기다립니다.
+import os
+import time
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from blob_store import get_blob_store
+from image_preprocess import PreparedImage, make_thumbnail, prepare_image
+from memory_cache import get_memory_cache
+from object_detection import MAX_PRODUCTS, ProductCrop, crop_products
+from ticker_index import NO_TICKER
+from api_gateway import create_default_gateway
+from hint_compaction import compaction_stats
+from telemetry import get_telemetry, new_trace_id
+from analysis import VISION_META_KEY, VISION_MODE, content_key, request_gemini_profile, request_vision_annotations, stream_gemini_profile
+from price_store import BENCHMARKS, DEFAULT_RANGE, PRICE_REFRESH_SECONDS, RANGES
+from charts import MA_LOOKBACK_BARS, build_comparison_chart, build_price_chart
+from warmup import get_warmup
+
+CROP_THUMBNAIL_EDGE = 480    # 여러 제품일 때 탭에 표시하는 crop (width=240)의 2배
+
+# 1이면 Gemini 응답을 스트리밍으로 받아 완성된 필드부터 화면에 표시
+GEMINI_STREAMING = os.getenv("STOCKLENS_GEMINI_STREAM", "1") == "1"
+
+# 초기화 함수들은 필요한 시점에 호출합니다. 결과는 st.cache_resource가 재사용하며, 실패 메시지도 호출될 때마다 다시 표시됩니다.
+@st.cache_resource                      # 함수를 App이 켜질 때 딱 한번만 수행하고 결과물은 계속 재사용하도록 캐싱
+def initialize_vision_client():         # GCP의 Vision API 클라이언트 (warmup.py가 미리 만들어 둔 것을 사용)
+    try:
+        return get_warmup().get("vision_client")
+    except Exception as e:
+        st.error(f"Vision 클라이언트 초기화 오류: {e}")
+        return None
+
+@st.cache_resource
+def initialize_gemini_model():      # Gemini 모델
+    try:
+        return get_warmup().get("gemini_model")
+    except Exception as e:
+        st.error(f"Gemini 모델 초기화 오류: {e}")
+        return None
+
+@st.cache_resource
+def initialize_result_cache():     # 분석 결과 영구 캐시(SQLite) 초기화 함수. 볼륨을 공유하면 여러 컨테이너가 같은 캐시를 사용
+    try:
+        return get_warmup().get("result_cache")
+    except Exception as e:
+        st.warning(f"결과 캐시 초기화 오류 (캐시 없이 계속합니다): {e}")
+        return None
+
+@st.cache_resource
+def initialize_detector():          # YOLOv8 객체 탐지 모델 (CPU)
+    try:
+        return get_warmup().get("detector")
+    except Exception as e:
+        st.warning(f"객체 탐지 모델 초기화 오류 (전체 이미지를 하나의 제품으로 분석합니다): {e}")
+        return None
+
+@st.cache_resource
+def initialize_ticker_index():      # 오프라인 종목코드 인덱스. 오래된 시장 목록은 백그라운드에서 새로 받음
+    return get_warmup().get("ticker_index")
+
+@st.cache_resource
+def initialize_price_store():       # 종목별 일봉을 쌓아두는 로컬 주가 저장소 (SQLite)
+    return get_warmup().get("price_store")
+
+@st.cache_resource
+def initialize_api_gateway():       # Vision/Gemini 공용 게이트웨이 (요청 합치기, 속도/동시성 제한, 재시도). 모든 세션이 공유
+    return create_default_gateway()
+
+api_gateway = initialize_api_gateway()
+telemetry = get_telemetry()
+# st.cache_data 대신 쓰는 캐시. 다이제스트 키 + 전체 메모리 예산 안에서 LRU 제거 (memory_cache.py)
+memory_cache = get_memory_cache()
+
+
+# --- 핵심 기능 함수 ---
+@memory_cache.memoize("prepared")
+def prepare_uploaded_image(image_bytes: bytes) -> PreparedImage:
+    """업로드 원본을 한 번만 디코딩해 Vision/Gemini용으로 축소·재인코딩합니다. (image_preprocess.py)"""
+    with telemetry.span("preprocess", original_bytes=len(image_bytes)) as span:
+        prepared = prepare_image(image_bytes)
+        span.update(vision_bytes=len(prepared.vision_bytes), gemini_bytes=len(prepared.gemini_bytes))
+    return prepared
+
+@memory_cache.memoize("crops")
+def detect_product_crops(_detector, image_bytes: bytes) -> List[ProductCrop]:
+    """전처리된 이미지에서 제품을 탐지해 제품별 crop 목록을 반환합니다. (object_detection.py)"""
+    with telemetry.span("detect") as span:
+        crops = crop_products(_detector, image_bytes)
+        span["products"] = len(crops)
+    return crops
+
+@memory_cache.memoize("vision")
+def analyze_image_with_vision_api(_vision_client, image_bytes: bytes, mode: str = VISION_MODE) -> Dict:
+    """Vision API 분석 (analysis.py). 게이트웨이를 거쳐 같은 이미지의 동시 요청은 한 번만 호출됩니다.
+
+    mode가 "cascade"이면 싼 기능(로고/라벨)부터 요청하고 필요할 때만 웹/텍스트 탐지로 넘어갑니다.
+    """
+    if not _vision_client: return {}
+    return api_gateway.call("vision", content_key(image_bytes, mode), request_vision_annotations, _vision_client, image_bytes, mode)
+
+@memory_cache.memoize("gemini", cache_none=False)     # 실패(None)는 저장하지 않아 다음 분석에서 다시 시도
+def get_company_profile_with_gemini(_gemini_model, image_bytes: bytes, vision_results: Dict, mime_type: str = "image/jpeg") -> Optional[Dict]:
+    """Gemini를 호출하여 제품 및 제조사 프로필, 그리고 '글로벌 모회사'의 종목 코드까지 분석하여 JSON으로 반환합니다."""
+    if not _gemini_model: return None
+    try:
+        return api_gateway.call("gemini", content_key(image_bytes, vision_results, mime_type),
+                                request_gemini_profile, _gemini_model, image_bytes, vision_results, mime_type)
+    except Exception as e:
+        st.error(f"🔮 Gemini 프로필 분석 중 오류: {e}")
+        return None
+
+def stream_company_profile_with_gemini(_gemini_model, image_bytes: bytes, vision_results: Dict, mime_type: str = "image/jpeg",
+                                       on_field=None) -> Optional[Dict]:
+    """get_company_profile_with_gemini의 스트리밍 버전. 응답 조각을 받는 동안 최상위 필드가 완성될 때마다 on_field(키, 값)을 호출합니다.
+
+    같은 요청이 다른 세션에서 이미 진행 중이면 게이트웨이가 그 결과를 공유하며, 이때는 완성된 결과를 한 번에 받습니다.
+    """
+    if not _gemini_model: return None
+    try:
+        return api_gateway.call("gemini", content_key(image_bytes, vision_results, mime_type),
+                                stream_gemini_profile, _gemini_model, image_bytes, vision_results, mime_type, on_field)
+    except Exception as e:
+        st.error(f"🔮 Gemini 프로필 분석 중 오류: {e}")
+        return None
+
+# 데이터 신선도는 price_store.py의 규칙이 결정하므로, 그림 캐시도 같은 주기로만 유지
+# 캐시에는 JSON 문자열이 아닌 Figure를 보관: st.plotly_chart는 dict/JSON을 받으면 Figure로 다시 만들어 검증하므로
+# rerun마다 약 25ms가 들지만, Figure는 검증 없이 직렬화만 하므로 약 3ms (benchmarks/bench_charts.py)
+@memory_cache.memoize("chart", ttl=PRICE_REFRESH_SECONDS)
+def plot_stock_chart(ticker: str, range_key: str = DEFAULT_RANGE) -> Optional[object]:
+    """로컬 주가 저장소에서 기간에 맞는 일봉을 읽어 캔들스틱 + 거래량 차트를 만듭니다. 부족한 구간만 네트워크로 받아옵니다."""
+    try:
+        with telemetry.span("price_history", ticker=ticker, range=range_key):
+            df_stock = initialize_price_store().get_history(ticker, range_key, MA_LOOKBACK_BARS)
+        if df_stock.empty: return None
+        return build_price_chart(df_stock, ticker, range_key)
+    except Exception as e:
+        st.warning(f"📈 주가 정보를 불러오는 중 오류 발생: {e}")
+        return None
+
+@memory_cache.memoize("chart", ttl=PRICE_REFRESH_SECONDS)
+def plot_comparison_chart(tickers: Tuple[str, ...], range_key: str = DEFAULT_RANGE) -> Tuple[Optional[object], Dict[str, str], float]:
+    """여러 종목(및 기준 지수)의 주가를 동시에 불러와 시작일=100 기준 비교 차트를 만듭니다.
+
+    (차트, 실패한 종목별 오류, 조회 소요 시간)을 반환하며 일부 종목이 실패해도 나머지로 차트를 그립니다.
+    """
+    with telemetry.span("price_history", tickers=len(tickers), range=range_key) as span:
+        batch = initialize_price_store().get_many(tickers, range_key)
+        span["failed"] = len(batch.errors)
+    if not batch.prices: return None, batch.errors, batch.elapsed
+    return build_comparison_chart(batch.prices, range_key), batch.errors, batch.elapsed
+
+def validate_ticker(profile_info: Optional[Dict]) -> Optional[Dict]:
+    """Gemini가 추론한 종목코드를 로컬 상장 종목 인덱스로 검증하고, 회사명이 확실히 일치하는 종목이 있으면 보정합니다."""
+    return initialize_ticker_index().validate_profile(profile_info)
+
+def analyze_product(image_bytes: bytes, on_field=None, prepared: Optional[PreparedImage] = None) -> Dict:
+    """제품 이미지 한 장을 (결과 캐시 → Vision → Gemini) 순서로 분석하고, 단계별 소요 시간을 함께 반환합니다.
+
+    on_field가 주어지고 스트리밍 모드이면 Gemini 응답의 필드가 완성될 때마다 on_field(키, 값)을 호출합니다.
+    prepared가 주어지면(사진 전체를 제품 하나로 분석하는 경우) image_bytes를 다시 전처리하지 않고 그대로 사용합니다.
+    """
+    new_trace_id()      # 이 제품 분석에서 남기는 span 로그를 하나로 묶음
+    timings = {}
+    started = start = time.perf_counter()
+    if prepared is None:
+        prepared = prepare_uploaded_image(image_bytes)
+        timings["전처리"] = time.perf_counter() - start
+    # 영구 캐시 조회 : 같은(또는 거의 같은) 사진을 이전에 분석했다면 API 호출 없이 바로 결과를 사용
+    result_cache = initialize_result_cache()
+    cached = result_cache.get_by_hash(prepared.phash) if result_cache else None
+    telemetry.incr("cache_total", cache="result", result="hit" if cached else "miss")
+    if cached:
+        telemetry.observe("analyze", time.perf_counter() - started, cached=True)
+        return {"profile_info": validate_ticker(cached.get("profile_info")), "cached": True, "timings": timings,
+                "vision": cached.get("vision_results", {}).get(VISION_META_KEY)}
+
+    start = time.perf_counter()
+    # analyze_image_with_vision_api : Logo,label, OCR 등 Vision API 결과를 받아오기
+    vision_results = analyze_image_with_vision_api(initialize_vision_client(), prepared.vision_bytes)
+    timings["Vision"] = time.perf_counter() - start
+    start = time.perf_counter()
+    gemini_model = initialize_gemini_model()
+    # 첫 필드 도착 시간은 "Gemini" 구간의 일부이므로 timings(제품별 합계에 더해짐)가 아닌 별도 값으로 보관
+    first_field = {}
+    # get_company_profile_with_gemini : Gemini 모델을 통해 기업 프로필 생성
+    if GEMINI_STREAMING and on_field:
+        def notify(key, value):
+            first_field.setdefault("seconds", time.perf_counter() - start)
+            on_field(key, value)
+        profile_info = stream_company_profile_with_gemini(gemini_model, prepared.gemini_bytes, vision_results, prepared.mime_type, notify)
+    else:
+        profile_info = get_company_profile_with_gemini(gemini_model, prepared.gemini_bytes, vision_results, prepared.mime_type)
+    timings["Gemini"] = time.perf_counter() - start
+    # 실패한 결과(None)는 저장하지 않아야 다음 요청에서 다시 시도할 수 있음
+    if result_cache and profile_info:
+        result_cache.put_by_hash(prepared.phash, {"vision_results": vision_results, "profile_info": profile_info})
+    telemetry.observe("analyze", time.perf_counter() - started, cached=False, ok=bool(profile_info))
+    # 캐시에는 Gemini 원본 답을 저장하고, 검증은 인덱스가 갱신될 수 있으므로 매번 수행 (1ms 미만)
+    return {"profile_info": validate_ticker(profile_info), "cached": False, "timings": timings,
+            "first_field_seconds": first_field.get("seconds"),
+            "vision": vision_results.get(VISION_META_KEY), "hints": compaction_stats(vision_results)}
+
+def analyze_products_concurrently(crops: List[ProductCrop], on_field=None, whole_image: Optional[PreparedImage] = None) -> List[Dict]:
+    """제품 crop들을 스레드 풀에서 동시에 분석합니다. N개 제품도 대략 API 왕복 1회 시간에 끝납니다.
+
+    on_field(제품 번호, 키, 값)은 작업 스레드가 아니라 이 함수를 호출한 스레드(Streamlit 스크립트)에서 실행되므로
+    안에서 화면 요소를 갱신해도 안전합니다. 한 제품의 분석이 예외로 끝나도 나머지 결과는 유지되며,
+    그 제품은 profile_info=None과 error 메시지로 반환됩니다. whole_image는 사진 전체의 전처리 결과로, 전체 이미지 crop에 그대로 사용됩니다.
+    """
+    # 작업 스레드에서도 st.error / st.warning이 현재 세션에 연결되도록 ScriptRunContext를 넘겨줌
+    ctx = get_script_run_ctx()
+    events = queue.Queue()
+    def run(index: int, crop: ProductCrop) -> Dict:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        # 탐지된 제품이 없어 전체 이미지를 쓰는 경우에는 업로드 원본에서 만든 전처리 결과를 그대로 사용
+        # (전처리된 JPEG를 다시 줄이고 인코딩하면 Gemini가 2세대 JPEG를 받고 디코딩/인코딩도 두 번 일어남)
+        return analyze_product(crop.image_bytes, (lambda key, value: events.put((index, key, value))) if on_field else None,
+                               whole_image if crop.whole_image else None)
+    with ThreadPoolExecutor(max_workers=max(1, min(len(crops), MAX_PRODUCTS))) as executor:
+        futures = [executor.submit(run, i, crop) for i, crop in enumerate(crops)]
+        while True:
+            try:
+                index, key, value = events.get(timeout=0.05)
+            except queue.Empty:
+                if all(f.done() for f in futures) and events.empty(): break
+                continue
+            on_field(index, key, value)
+        return [_product_result(f) for f in futures]
+
+def _product_result(future) -> Dict:
+    # 재시도할 수 없는 Vision 오류 등은 그 제품만 실패로 표시하고, 나머지 제품의 결과는 그대로 보여줌
+    try:
+        return future.result()
+    except Exception as e:
+        return {"profile_info": None, "cached": False, "timings": {}, "error": f"{type(e).__name__}: {e}"}
+
+def render_partial_profile(placeholder, label: str, fields: Dict) -> None:
+    """스트리밍 중인 프로필에서 지금까지 도착한 필드만 표로 보여줍니다."""
+    rows = [(name, fields[key]) for key, name in [("제조사", "제조사 / 브랜드"), ("제품명", "제품명"), ("제조사_국가", "제조사 국가"), ("종목코드", "종목코드 (Ticker)")] if key in fields]
+    with placeholder.container():
+        st.caption(f"⏳ {label} — AI가 프로필을 작성하는 중입니다...")
+        if rows: st.table(pd.DataFrame(rows, columns=["항목", "내용"]).set_index("항목"))
+        if fields.get("company_description"): st.markdown(fields["company_description"])
+
+def describe_ticker_check(profile_info: Dict) -> str:
+    """종목코드 검증 결과를 표에 표시할 문장으로 바꿉니다."""
+    check = profile_info.get("종목코드_검증") or {}
+    status = check.get("status")
+    if status == "confirmed":
+        return f"✅ {check['market']} 상장 종목 확인 ({check['name']})"
+    if status == "corrected":
+        return f"🔁 {check['market']} {check['name']}(으)로 보정 (AI 추론: {profile_info.get('종목코드_원본', '-')})"
+    if status == "listed":
+        return f"⚠️ {check['market']}에 있는 코드이지만 회사명이 다릅니다 ({check['name']})"
+    if status == "not_found":
+        return "❌ 상장 종목 목록에 없음"
+    return "검증 안 됨 (종목 인덱스 준비 중)"
+
+def render_profile(profile_info: Dict, key: str = "product") -> None:
+    """제품 하나의 기업/제품 프로필과 주가 차트를 화면에 표시합니다."""
+    manufacturer = profile_info.get("제조사", "정보 없음")
+    product_name = profile_info.get("제품명", "정보 없음")
+    country = profile_info.get("제조사_국가", "정보 없음") # <-- [수정] 국가 변수 다시 추출
+    ticker = profile_info.get("종목코드", "정보 없음")
+    description = profile_info.get("company_description", "")
+    main_products = profile_info.get("main_products", [])
+    ticker_check = profile_info.get("종목코드_검증", {})
+
+    # --- [수정] UI에 국가 정보 표시 복원 ---
+    st.subheader("📋 기업 및 제품 정보")
+    info_df = pd.DataFrame({
+        "항목": ["제조사 / 브랜드", "제품명", "제조사 국가", "종목코드 (Ticker)", "종목코드 검증"],
+        "내용": [manufacturer, product_name, country, ticker, describe_ticker_check(profile_info)]
+    })
+    st.table(info_df.set_index("항목"))
+
+    st.markdown("---")
+    st.subheader("📝 기업 소개")
+    st.markdown(description)
+
+    st.markdown("---")
+    st.subheader("주요 생산 제품:")
+    for product in main_products:
+        st.markdown(f"**{product.get('category')}:** {product.get('description')}")
+
+    st.markdown("---")
+    st.subheader("💹 관련 주식 정보")
+    if ticker_check.get("status") == "not_found" and ticker != NO_TICKER:
+        # 상장 종목 인덱스에 없는 코드는 주가 요청을 보내봐야 실패하므로 바로 안내
+        st.info(f"'{ticker}'은(는) 지원하는 시장의 상장 종목 목록에서 찾을 수 없습니다.")
+    elif ticker and ticker != NO_TICKER:
+        range_key = st.radio("기간", list(RANGES), index=list(RANGES).index(DEFAULT_RANGE), horizontal=True, key=f"{key}_range")
+        with st.spinner(f"'{ticker}'의 주가 데이터를 불러오는 중..."):
+            stock_chart_fig = plot_stock_chart(ticker, range_key)
+
+        if stock_chart_fig:
+            st.plotly_chart(stock_chart_fig, use_container_width=True)
+        else:
+            st.warning(f"'{ticker}'의 주가 차트를 불러오는 데 실패했습니다.")
+    else:
+        st.info("분석된 기업의 상장 정보를 찾을 수 없거나, 지원하지 않는 시장의 종목입니다.")
+
+def render_comparison(products: List[Dict]) -> None:
+    """분석된 모든 제품의 종목(모회사/자회사 등)과 기준 지수를 한 차트에서 비교합니다."""
+    tickers, markets = [], []
+    for product in products:
+        profile_info = product["profile_info"]
+        ticker = profile_info.get("종목코드", NO_TICKER)
+        check = profile_info.get("종목코드_검증") or {}
+        if ticker and ticker != NO_TICKER and check.get("status") != "not_found" and ticker not in tickers:
+            tickers.append(ticker)
+            if check.get("market"): markets.append(check["market"])
+    if not tickers:
+        return
+
+    st.markdown("---")
+    st.subheader("🔀 관련 종목 비교")
+    extra = st.text_input("함께 비교할 종목코드 (쉼표로 구분, 예: 국내 자회사)", key="compare_extra")
+    extra_tickers = [t.strip().upper() for t in extra.split(",") if t.strip()]
+    selected = st.multiselect("비교할 종목", list(dict.fromkeys(tickers + extra_tickers)), default=tickers + extra_tickers, key="compare_tickers")
+    benchmark_options = list(dict.fromkeys([BENCHMARKS[m] for m in markets if m in BENCHMARKS] + list(BENCHMARKS.values())))
+    benchmark = st.selectbox("기준 지수", ["없음"] + benchmark_options, index=1, key="compare_benchmark")
+    range_key = st.radio("기간", list(RANGES), index=list(RANGES).index(DEFAULT_RANGE), horizontal=True, key="compare_range")
+    if benchmark != "없음" and benchmark not in selected: selected = selected + [benchmark]
+    if len(selected) < 2:
+        st.info("비교하려면 종목을 2개 이상 선택하거나 기준 지수를 선택하세요.")
+        return
+
+    with st.spinner(f"{len(selected)}개 종목의 주가 데이터를 동시에 불러오는 중..."):
+        fig, errors, elapsed = plot_comparison_chart(tuple(selected), range_key)
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"{len(selected) - len(errors)}개 종목 조회 {elapsed:.2f}초")
+    if errors:
+        st.warning("일부 종목을 불러오지 못했습니다: " + ", ".join(f"{t} ({e})" for t, e in errors.items()))
+
+
+def render_results_page() -> None:
+    """결과 페이지 : 제품 탐지 → 제품별 분석(스트리밍) → 프로필/주가 차트/비교 차트 → 단계별 소요 시간."""
+    if st.button("⬅️ 다른 이미지 분석하기"):
+        st.session_state.page = 'upload'
+        st.session_state.image_digest = None
+        st.session_state.thumbnail = None
+        st.session_state.products = None
+        st.session_state.timings = None
+        st.rerun()
+
+    st.title("🧠 AI 종합 분석 결과")
+    st.markdown("---")
+    st.image(st.session_state.thumbnail, use_container_width=True)
+    st.markdown("---")
+
+    if st.session_state.products is None:
+        # spinner : 사용자가 기다리는 동안 로딩 중임을 표시
+        with st.spinner('AI가 기업 프로필을 분석 중입니다...'):
+            timings = {}
+            start = time.perf_counter()
+            # 전처리 : 디스크 저장소의 원본을 한 번만 디코딩해서 Vision/Gemini에 보낼 작은 이미지를 만듦
+            original = get_blob_store().get(st.session_state.image_digest)
+            if original is None:
+                st.error("원본 사진이 보관 기간이 지나 정리되었습니다. 사진을 다시 올려주세요.")
+                return
+            prepared = prepare_uploaded_image(original)
+            timings["전처리"] = time.perf_counter() - start
+            start = time.perf_counter()
+            # 객체 탐지 : 사진 속 제품을 각각 잘라냄 (탐지 실패 시 전체 이미지 1개)
+            crops = detect_product_crops(initialize_detector(), prepared.vision_bytes)
+            timings["객체 탐지"] = time.perf_counter() - start
+            start = time.perf_counter()
+            # 스트리밍 : 필드가 도착하는 대로 표를 채우고, 종목코드가 나오면 주가 데이터를 미리 받기 시작
+            placeholders = [st.empty() for _ in crops]
+            partial = [{} for _ in crops]
+            def on_field(index: int, key: str, value) -> None:
+                timings.setdefault("첫 정보 표시", time.perf_counter() - start)
+                partial[index][key] = value
+                if key == "종목코드":
+                    checked = validate_ticker(partial[index])
+                    if checked["종목코드"] != NO_TICKER and checked["종목코드_검증"]["status"] != "not_found":
+                        initialize_price_store().prefetch(checked["종목코드"], DEFAULT_RANGE, MA_LOOKBACK_BARS)
+                render_partial_profile(placeholders[index], f"{index + 1}. {crops[index].label}", partial[index])
+            analyses = analyze_products_concurrently(crops, on_field, prepared)
+            for placeholder in placeholders: placeholder.empty()
+            timings["제품 분석 (병렬, 실제 경과 시간)"] = time.perf_counter() - start
+            timings["제품 분석 (제품별 합계)"] = sum(sum(a["timings"].values()) for a in analyses)
+        st.session_state.products = [
+            {"label": crop.label, "crop": make_thumbnail(crop.image_bytes, CROP_THUMBNAIL_EDGE), **analysis} for crop, analysis in zip(crops, analyses)
+        ]
+        st.session_state.timings = timings
+
+    for i, product in enumerate(st.session_state.products):
+        if product.get("error"):
+            st.warning(f"{i + 1}. {product['label']} 분석 중 오류가 발생했습니다: {product['error']}")
+    products = [p for p in st.session_state.products if p["profile_info"]]
+    if len(products) == 1:
+        render_profile(products[0]["profile_info"], key="product_0")
+    elif products:
+        st.success(f"사진에서 {len(products)}개의 제품을 찾았습니다.")
+        tabs = st.tabs([f"{i + 1}. {p['profile_info'].get('제품명', p['label'])}" for i, p in enumerate(products)])
+        for i, (tab, product) in enumerate(zip(tabs, products)):
+            with tab:
+                st.image(product["crop"], width=240)
+                render_profile(product["profile_info"], key=f"product_{i}")
+    else:
+        st.error("이미지에서 기업 및 제품 프로필을 생성하는 데 실패했습니다.")
+    render_comparison(products)
+
+    if st.session_state.timings:
+        with st.expander("⏱️ 단계별 소요 시간"):
+            st.table(pd.DataFrame({
+                "단계": list(st.session_state.timings.keys()),
+                "시간(초)": [round(v, 2) for v in st.session_state.timings.values()],
+            }).set_index("단계"))
+            for i, product in enumerate(st.session_state.products):
+                detail = ", ".join(f"{k} {v:.2f}s" for k, v in product["timings"].items())
+                if product.get("first_field_seconds") is not None:     # Gemini 구간 중 첫 필드가 도착하기까지
+                    detail += f" (Gemini 첫 필드 {product['first_field_seconds']:.2f}s)"
+                vision_meta = product.get("vision")
+                if vision_meta:     # 어떤 Vision 단계가 답했는지와 이미지당 예상 비용
+                    detail += f" / Vision {vision_meta['tier']} 단계 ({len(vision_meta['features'])}개 기능, ${vision_meta['cost_usd']:.4f})"
+                hints = product.get("hints")
+                if hints:           # Gemini 프롬프트에 들어간 Vision 힌트 크기 (압축 전 → 후, 추정 토큰 수)
+                    detail += f" / 힌트 {hints['tokens_before']} → {hints['tokens_after']} 토큰"
+                st.caption(f"{i + 1}. {product['label']}{' (캐시)' if product['cached'] else ''}: {detail}")
+            # 게이트웨이 상태 : 모든 세션이 공유하는 Vision/Gemini 호출 대기열 길이와 대기 시간 (쿼터 산정용)
+            gateway_stats = api_gateway.stats()
+            st.table(pd.DataFrame({
+                name: {"대기 중": s["queued"], "실행 중": s["running"], "합쳐진 요청": s["coalesced"], "재시도": s["retries"],
+                       "실패": s["failures"], "평균 대기(초)": round(s["wait_avg"], 3), "최대 대기(초)": round(s["wait_max"], 3)}
+                for name, s in gateway_stats.items()
+            }))
@@ -0,0 +1,198 @@
+# --- 단계별 지연 시간 추적 / 지표 ---
+# 분석 파이프라인의 각 단계(전처리, Vision 기능 호출, Gemini, JSON 파싱, 주가 조회, 차트 생성)를 span으로 기록합니다.
+# - span: 소요 시간과 속성(요청/응답 크기 등)을 JSON 로그 한 줄로 남기고, 단계별 최근 N개로 p50/p95/p99를 계산
+# - 카운터: 캐시 hit/miss, 단계별 오류 수 등
+# - 내보내기: JSON 로그(STOCKLENS_TRACE_LOG), Prometheus 텍스트 형식(STOCKLENS_METRICS_PORT의 /metrics),
+#   관리자 페이지(pages/1_Metrics.py)
+# Streamlit에 의존하지 않으며 프로세스 전체에서 get_telemetry() 하나를 공유합니다.
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TRACE_LOG = os.getenv("STOCKLENS_TRACE_LOG", "")           # 비어 있으면 로그를 남기지 않음, "-"이면 stderr, 그 외에는 파일 경로
+METRICS_PORT = int(os.getenv("STOCKLENS_METRICS_PORT", "0"))  # 0이면 Prometheus 엔드포인트를 열지 않음
+METRICS_WINDOW = int(os.getenv("STOCKLENS_METRICS_WINDOW", "2048"))   # 백분위 계산에 쓰는 단계별 최근 기록 수
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 현재 스레드에서 진행 중인 분석 요청의 trace id (analyze_product 같은 요청 단위 함수에서 설정)
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("stocklens_trace_id", default=None)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def new_trace_id() -> str:
+    """현재 컨텍스트에 새 trace id를 설정하고 반환합니다. 이후 이 스레드의 span 로그에 함께 기록됩니다."""
+    trace_id = uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    # nearest-rank 방식
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+class Telemetry:
+    """단계별 소요 시간과 카운터를 모으는 스레드 안전한 수집기."""
+
+    def __init__(self, window: int = METRICS_WINDOW, logger: Optional[logging.Logger] = None):
+        self.window = window
+        self.logger = logger
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._recent: Dict[str, deque] = {}
+        self._totals: Dict[str, List[float]] = {}      # 단계 → [횟수, 합계(초)]
+        self._counters: Dict[LabelKey, float] = {}
+
+    @contextmanager
+    def span(self, stage: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """with 블록의 소요 시간을 stage로 기록합니다. 블록 안에서 yield된 dict에 속성(응답 크기 등)을 추가할 수 있습니다.
+
+        예외가 나면 errors_total{stage}를 올리고 예외는 그대로 다시 던집니다.
+        """
+        start = time.perf_counter()
+        status, error = "ok", None
+        try:
+            yield attrs
+        except BaseException as e:
+            status, error = "error", type(e).__name__
+            self.incr("errors_total", stage=stage, error=error)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, status=status, error=error, **attrs)
+
+    def observe(self, stage: str, seconds: float, **attrs: Any) -> None:
+        """이미 측정한 소요 시간을 기록합니다. (여러 조각에 나뉜 시간을 합쳐서 남길 때 사용)"""
+        with self._lock:
+            if stage not in self._recent:
+                self._recent[stage] = deque(maxlen=self.window)
+                self._totals[stage] = [0, 0.0]
+            self._recent[stage].append(seconds)
+            self._totals[stage][0] += 1
+            self._totals[stage][1] += seconds
+        if self.logger is not None and self.logger.isEnabledFor(logging.INFO):
+            record = {"ts": round(time.time(), 3), "trace_id": _trace_id.get(), "stage": stage,
+                      "duration_ms": round(seconds * 1000, 2)}
+            record.update({key: value for key, value in attrs.items() if value is not None})
+            self.logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def incr(self, name: str, amount: float = 1, **labels: str) -> None:
+        """카운터를 올립니다. 예: incr("cache_total", cache="result", result="hit")"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """단계별 횟수/평균/p50/p95/p99(ms)와 카운터 값."""
+        with self._lock:
+            recent = {stage: sorted(values) for stage, values in self._recent.items()}
+            totals = {stage: list(total) for stage, total in self._totals.items()}
+            counters = dict(self._counters)
+        stages = {}
+        for stage, values in recent.items():
+            count, total = totals[stage]
+            row = {"count": count, "mean_ms": total / count * 1000 if count else 0.0}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}_ms"] = _quantile(values, q) * 1000 if values else 0.0
+            stages[stage] = row
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "stages": stages,
+            "counters": [{"name": name, **dict(labels), "value": value} for (name, labels), value in sorted(counters.items())],
+        }
+
+    def prometheus_text(self) -> str:
+        """Prometheus 텍스트 형식(summary + counter)."""
+        with self._lock:
+            recent = {stage: sorted(values) for stage, values in self._recent.items()}
+            totals = {stage: list(total) for stage, total in self._totals.items()}
+            counters = dict(self._counters)
+        lines = ["# HELP stocklens_stage_seconds Pipeline stage latency (quantiles over the most recent observations).",
+                 "# TYPE stocklens_stage_seconds summary"]
+        for stage in sorted(recent):
+            for q in QUANTILES:
+                if recent[stage]:
+                    lines.append(f'stocklens_stage_seconds{{stage="{stage}",quantile="{q}"}} {_quantile(recent[stage], q):.6f}')
+            lines.append(f'stocklens_stage_seconds_sum{{stage="{stage}"}} {totals[stage][1]:.6f}')
+            lines.append(f'stocklens_stage_seconds_count{{stage="{stage}"}} {totals[stage][0]}')
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE stocklens_{name} counter")
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f"stocklens_{name}{{{_label_text(labels)}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self._totals.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+def _create_logger(target: str) -> Optional[logging.Logger]:
+    if not target:
+        return None
+    logger = logging.getLogger("stocklens.trace")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr) if target == "-" else logging.FileHandler(target, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))     # 한 줄에 JSON 객체 하나
+        logger.addHandler(handler)
+    return logger
+
+
+_default_telemetry: Optional[Telemetry] = None
+_default_lock = threading.Lock()
+_server_started = False
+
+
+def get_telemetry() -> Telemetry:
+    """프로세스 전체에서 공유하는 기본 수집기."""
+    global _default_telemetry
+    with _default_lock:
+        if _default_telemetry is None:
+            _default_telemetry = Telemetry(logger=_create_logger(TRACE_LOG))
+        return _default_telemetry
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "0.0.0.0") -> bool:
+    """/metrics 경로로 Prometheus 텍스트를 내보내는 HTTP 서버를 백그라운드 스레드에서 한 번만 시작합니다."""
+    global _server_started
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_telemetry().prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):      # 요청마다 stderr에 접근 로그를 남기지 않음
+            pass
+
+    with _default_lock:
+        if _server_started or port <= 0:
+            return False
+        server = ThreadingHTTPServer((host, port), Handler)     # 포트가 사용 중이면 OSError
+        _server_started = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return True
@@ -0,0 +1,154 @@
+# api_gateway.BackendGateway 테스트 (가짜 함수만 사용, 네트워크/쿼터 없음)
+# 실행: python -m pytest -q
+import time
+import threading
+
+import pytest
+
+import api_gateway
+from api_gateway import ApiGateway, BackendGateway
+
+
+class ResourceExhausted(Exception):
+    """google.api_core.exceptions.ResourceExhausted 대역 (게이트웨이는 클래스 이름으로 재시도 여부를 판단)."""
+
+
+def _gateway(**kwargs) -> BackendGateway:
+    options = {"rate": 1000.0, "max_concurrency": 8, "base_delay": 0.01, "max_delay": 0.05}
+    options.update(kwargs)
+    return BackendGateway("fake", **options)
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "조건을 기다리다 시간 초과"
+        time.sleep(0.005)
+
+
+def _start(target, count: int):
+    # target(i)를 스레드 count개에서 동시에 실행. 결과는 ("ok", 값) 또는 ("error", 예외)
+    results, threads = [None] * count, []
+    def run(i):
+        try:
+            results[i] = ("ok", target(i))
+        except Exception as e:
+            results[i] = ("error", e)
+    for i in range(count):
+        thread = threading.Thread(target=run, args=(i,))
+        thread.start()
+        threads.append(thread)
+    return results, threads
+
+
+def test_identical_keys_share_one_call():
+    gateway, release, calls = _gateway(), threading.Event(), []
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {"labels": ["soap"]}
+    results, threads = _start(lambda i: gateway.call("same-image", fetch), 5)
+    _wait_until(lambda: gateway.stats()["calls"] == 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert all(result == ("ok", {"labels": ["soap"]}) for result in results)
+    stats = gateway.stats()
+    assert (stats["coalesced"], stats["attempts"], stats["in_flight"]) == (4, 1, 0)
+
+
+def test_followers_receive_leader_exception():
+    gateway, release = _gateway(), threading.Event()
+    def fetch():
+        release.wait(2)
+        raise ValueError("invalid image")
+    results, threads = _start(lambda i: gateway.call("same-image", fetch), 4)
+    _wait_until(lambda: gateway.stats()["calls"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert [status for status, _ in results] == ["error"] * 4
+    assert all(isinstance(error, ValueError) and str(error) == "invalid image" for _, error in results)
+    assert gateway.stats()["attempts"] == 1
+    # 실패한 키는 진행 중 목록에서 빠지므로 다음 요청은 새로 호출함
+    assert gateway.call("same-image", lambda: "retry ok") == "retry ok"
+
+
+def test_retryable_errors_back_off_and_retry(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(api_gateway.random, "uniform", lambda low, high: bounds.append(high) or 0.0)
+    gateway, attempts = _gateway(max_retries=3), []
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ResourceExhausted("429 quota")
+        return "ok"
+    assert gateway.call("key", flaky) == "ok"
+    # full jitter 상한이 base_delay * 2^attempt로 늘어나고 max_delay에서 멈춤
+    assert bounds == [0.02, 0.04]
+    stats = gateway.stats()
+    assert (stats["attempts"], stats["retries"], stats["failures"]) == (3, 2, 0)
+
+
+def test_retries_stop_at_max_retries(monkeypatch):
+    monkeypatch.setattr(api_gateway.random, "uniform", lambda low, high: 0.0)
+    gateway = _gateway(max_retries=2)
+    def always_busy():
+        raise ResourceExhausted("429 quota")
+    with pytest.raises(ResourceExhausted):
+        gateway.call("key", always_busy)
+    stats = gateway.stats()
+    assert (stats["attempts"], stats["retries"], stats["failures"]) == (3, 2, 1)
+
+
+def test_non_retryable_errors_are_not_retried():
+    gateway, attempts = _gateway(), []
+    def denied():
+        attempts.append(1)
+        raise PermissionError("403")
+    with pytest.raises(PermissionError):
+        gateway.call("key", denied)
+    assert len(attempts) == 1
+    stats = gateway.stats()
+    assert (stats["retries"], stats["failures"]) == (0, 1)
+
+
+def test_concurrency_limit_is_respected():
+    gateway, lock = _gateway(max_concurrency=2), threading.Lock()
+    running, peak = [0], [0]
+    def work(i):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.03)
+        with lock:
+            running[0] -= 1
+        return i
+    results, threads = _start(lambda i: gateway.call(f"image-{i}", work, i), 6)
+    for thread in threads:
+        thread.join()
+    assert sorted(value for _, value in results) == list(range(6))
+    assert peak[0] == 2
+
+
+def test_stats_report_queue_running_and_wait():
+    gateway, release = ApiGateway({"vision": _gateway(max_concurrency=1)}), threading.Event()
+    def slow(value):
+        release.wait(2)
+        return value
+    first, first_threads = _start(lambda i: gateway.call("vision", "a", slow, "a"), 1)
+    _wait_until(lambda: gateway.stats()["vision"]["running"] == 1)
+    second, second_threads = _start(lambda i: gateway.call("vision", "b", slow, "b"), 1)
+    _wait_until(lambda: gateway.stats()["vision"]["queued"] == 1)
+    stats = gateway.stats()["vision"]
+    assert (stats["running"], stats["queued"], stats["in_flight"]) == (1, 1, 2)
+    time.sleep(0.02)
+    release.set()
+    for thread in first_threads + second_threads:
+        thread.join()
+    assert (first[0], second[0]) == (("ok", "a"), ("ok", "b"))
+    stats = gateway.stats()["vision"]
+    assert (stats["running"], stats["queued"], stats["in_flight"]) == (0, 0, 0)
+    assert stats["wait_max"] >= 0.02            # 두 번째 요청은 동시성 자리가 날 때까지 기다림
+    assert 0 < stats["wait_avg"] <= stats["wait_max"]
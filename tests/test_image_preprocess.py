@@ -0,0 +1,45 @@
+# image_preprocess.decode_image의 투명 PNG 처리 테스트 (메모리에서 만든 작은 이미지 사용)
+# 실행: python -m pytest -q
+import io
+
+import pytest
+from PIL import Image
+
+from image_preprocess import decode_image, prepare_image
+
+
+def _png(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _half_transparent(mode: str) -> Image.Image:
+    # 왼쪽 절반은 불투명한 빨강(LA는 검정), 오른쪽 절반은 색이 검정인 완전 투명
+    img = Image.new("RGBA", (8, 4), (0, 0, 0, 0))
+    img.paste((255, 0, 0, 255) if mode != "LA" else (0, 0, 0, 255), (0, 0, 4, 4))
+    return img.convert(mode)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA"])
+def test_transparent_pixels_become_white(mode):
+    img = decode_image(_png(_half_transparent(mode)))
+    assert img.mode == "RGB"
+    assert img.getpixel((6, 2)) == (255, 255, 255)
+    assert img.getpixel((1, 2)) == ((255, 0, 0) if mode == "RGBA" else (0, 0, 0))
+
+
+def test_palette_transparency_becomes_white():
+    img = Image.new("P", (8, 4), 1)
+    img.putpalette([255, 0, 0, 0, 0, 0] + [0] * 762)
+    img.paste(0, (0, 0, 4, 4))
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", transparency=1)
+    decoded = decode_image(buffer.getvalue())
+    assert (decoded.getpixel((1, 2)), decoded.getpixel((6, 2))) == ((255, 0, 0), (255, 255, 255))
+
+
+def test_prepared_image_has_white_background():
+    prepared = prepare_image(_png(_half_transparent("RGBA")), image_format="JPEG", quality=95)
+    with Image.open(io.BytesIO(prepared.gemini_bytes)) as img:
+        assert min(img.convert("RGB").getpixel((7, 2))) > 240
@@ -0,0 +1,59 @@
+# partial_json.StreamingJsonParser와 analysis.stream_gemini_profile의 응답 해석 테스트 (가짜 스트리밍 응답 사용)
+# 실행: python -m pytest -q
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from analysis import stream_gemini_profile
+from partial_json import StreamingJsonParser
+
+PROFILE = {"제조사": "Lion Corporation", "종목코드": "4912", "main_products": [{"category": "생활용품", "description": "{괄호}"}]}
+
+
+def _feed(text: str, size: int = 3) -> StreamingJsonParser:
+    parser = StreamingJsonParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(PROFILE, ensure_ascii=False),
+    "```json\n" + json.dumps(PROFILE, ensure_ascii=False) + "\n```",
+    # 코드 블록 밖의 설명 속 {예시}보다 ```json 블록을 우선
+    "Sure! format {like this}: ```json\n" + json.dumps(PROFILE, ensure_ascii=False) + "\n```",
+    'Example {"제조사": "X"} then ```json\n' + json.dumps(PROFILE, ensure_ascii=False) + "\n```",
+])
+def test_parser_reads_profile(text):
+    parser = _feed(text)
+    assert parser.done
+    assert parser.result() == PROFILE
+
+
+def test_parser_reports_truncated_object():
+    parser = _feed('```json\n{"제조사": "Lion Corporation", "제품명": "A", "종목코드": "49')
+    assert not parser.done
+    assert parser.result() == {"제조사": "Lion Corporation", "제품명": "A"}
+
+
+class _FakeModel:
+    def __init__(self, text: str):
+        self.text = text
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        return [SimpleNamespace(text=self.text[i:i + 7]) for i in range(0, len(self.text), 7)]
+
+
+def test_stream_profile_fails_on_truncated_response():
+    # 끊긴 응답의 일부 필드를 성공으로 돌려주면 결과 캐시에 저장되므로 비스트리밍 경로처럼 오류여야 함
+    truncated = "```json\n" + json.dumps(PROFILE, ensure_ascii=False)[:40]
+    fields = []
+    with pytest.raises(json.JSONDecodeError):
+        stream_gemini_profile(_FakeModel(truncated), b"image", {}, on_field=lambda key, value: fields.append(key))
+    assert fields                   # 화면에는 도착한 필드가 먼저 표시됨
+
+
+def test_stream_profile_returns_complete_response():
+    text = "```json\n" + json.dumps(PROFILE, ensure_ascii=False) + "\n```"
+    assert stream_gemini_profile(_FakeModel(text), b"image", {}) == PROFILE
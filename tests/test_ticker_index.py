@@ -0,0 +1,98 @@
+# ticker_index.TickerIndex 검증/보정 규칙 테스트 (작은 가짜 시장 스냅샷 사용, 네트워크 없음)
+# 실행: python -m pytest -q
+import gzip
+import json
+import sys
+import time
+
+import pytest
+
+from ticker_index import NO_TICKER, TickerIndex
+
+SNAPSHOTS = {
+    "KRX": [["005930", "삼성전자"], ["005380", "현대차"], ["051910", "LG화학"]],
+    "NASDAQ": [["AAPL", "Apple Inc."], ["APLE", "Apple Hospitality REIT Inc."]],
+    "NYSE": [["LEV", "Lion Electric Co"], ["LION", "Lionsgate Studios Corp"], ["GEL", "Genesis Energy LP"],
+             ["TM", "Toyota Motor Corp"], ["PG", "Procter & Gamble Company"]],
+    "TSE": [["4912", "Lion Corp"], ["7203", "Toyota Motor Corp"]],
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    for market, rows in SNAPSHOTS.items():
+        with gzip.open(tmp_path / f"{market}.json.gz", "wt", encoding="utf-8") as f:
+            json.dump({"market": market, "built_at": time.time(), "rows": rows}, f, ensure_ascii=False)
+    # 설정된 시장 = 스냅샷이 있는 시장 (인덱스가 완전히 준비된 상태)
+    return TickerIndex(index_dir=str(tmp_path), markets=list(SNAPSHOTS))
+
+
+@pytest.mark.parametrize("company, ticker, status, code", [
+    # 정확히 같은 이름이 있으면 포함 관계일 뿐인 다른 회사보다 우선
+    ("Lion Corporation", NO_TICKER, "corrected", "4912"),
+    ("Lion Corporation", "LION", "corrected", "4912"),
+    ("Apple", NO_TICKER, "corrected", "AAPL"),
+    ("Apple", "APLE", "corrected", "AAPL"),
+    ("Apple", "AAPL", "confirmed", "AAPL"),
+    # 이름 일부만 겹치는 종목으로는 보정하지 않음
+    ("Genesis", NO_TICKER, "not_found", NO_TICKER),
+    ("Genesis", "GNS", "not_found", "GNS"),
+    # 코드가 주어졌으면 포함 관계도 확인으로 인정
+    ("Toyota", "7203", "confirmed", "7203"),
+    ("Procter & Gamble", "PG", "confirmed", "PG"),
+    # 교차 상장은 시장 순서상 앞선 종목
+    ("Toyota Motor", NO_TICKER, "corrected", "TM"),
+])
+def test_resolve_latin_names(index, company, ticker, status, code):
+    match = index.resolve(company, ticker)
+    assert (match.status, match.code) == (status, code)
+
+
+@pytest.mark.parametrize("company, ticker", [
+    ("Samsung Electronics", "005930"),
+    ("Samsung Electronics", "005930.KS"),
+    ("Hyundai Motor Company", "5380"),
+    ("LG Chem", "051910"),
+    ("삼성전자", "005930"),
+])
+def test_krx_codes_confirmed_for_non_comparable_names(index, company, ticker):
+    # 한글 종목명과 영문 제조사명은 비교할 수 없으므로 코드가 목록에 있으면 '회사명이 다름'으로 낮추지 않음
+    match = index.resolve(company, ticker)
+    assert match.status == "confirmed"
+    assert match.market == "KRX"
+
+
+def test_wrong_name_on_listed_code_is_flagged(index):
+    match = index.resolve("Procter & Gamble", "GEL")
+    assert (match.status, match.code) == ("corrected", "PG")
+    assert index.resolve("Unknown Widgets", "GEL").status == "listed"
+
+
+def test_validate_profile_keeps_original_code(index):
+    validated = index.validate_profile({"제조사": "Apple", "종목코드": "APLE"})
+    assert validated["종목코드"] == "AAPL"
+    assert validated["종목코드_원본"] == "APLE"
+    assert validated["종목코드_검증"]["status"] == "corrected"
+
+
+def test_partial_index_does_not_reject_codes(tmp_path):
+    # 첫 새로 고침 중이거나 일부 시장 목록을 받지 못한 경우: 그 시장의 코드는 'not_found'가 아니라 'unverified'
+    with gzip.open(tmp_path / "KRX.json.gz", "wt", encoding="utf-8") as f:
+        json.dump({"market": "KRX", "built_at": time.time(), "rows": SNAPSHOTS["KRX"]}, f, ensure_ascii=False)
+    index = TickerIndex(index_dir=str(tmp_path))
+    assert index.resolve("Apple Inc.", "AAPL").status == "unverified"
+    assert index.resolve("Lion Corporation", "4912").status == "unverified"
+    assert index.resolve("Samsung Electronics", "005930").status == "confirmed"
+    # 코드 형태로 보아 이미 받은 시장(KRX)의 코드인데 목록에 없으면 그대로 not_found
+    assert TickerIndex(index_dir=str(tmp_path), markets=["KRX"]).resolve("Unknown", "999999").status == "not_found"
+
+
+def test_refresh_without_finance_data_reader(index, monkeypatch):
+    # 라이브러리를 불러오지 못해도 백그라운드 스레드에 예외를 올리지 않고 기존 스냅샷을 유지
+    monkeypatch.setitem(sys.modules, "FinanceDataReader", None)
+    assert index.refresh() == {}
+    assert index.resolve("Apple", "AAPL").status == "confirmed"
+
+
+def test_empty_index_is_unverified(tmp_path):
+    assert TickerIndex(index_dir=str(tmp_path)).resolve("Apple", "AAPL").status == "unverified"
@@ -0,0 +1,324 @@
+# --- 오프라인 종목코드 인덱스 ---
+# FinanceDataReader의 상장 종목 목록(fdr.StockListing)을 시장별로 미리 받아 압축 파일로 저장해두고,
+# 제조사 이름 → 종목코드를 추가 LLM 호출이나 네트워크 요청 없이 로컬에서 검증/보정합니다.
+# - 저장: STOCKLENS_DATA_DIR/tickers/<시장>.json.gz (시장별 스냅샷, 오래된 시장만 다시 받음)
+# - 조회: 이름을 정규화한 뒤 3-gram 역색인으로 후보를 좁히고 thefuzz로 최종 점수 계산
+#   보정 점수는 token_sort_ratio (token_set_ratio는 한쪽 이름이 다른 쪽에 포함되기만 해도 100이라 'Apple' → 'Apple Hospitality REIT'처럼 오보정됨)
+#   정규화한 이름이 완전히 같은 종목을 먼저 고르고, 2위(다른 회사)와 점수 차이가 MATCH_MARGIN 이상일 때만 보정
+# - 종목코드 형태로 추정한 시장의 스냅샷이 아직 없으면(첫 새로 고침 중, 목록 받기 실패) 'not_found' 대신 'unverified'
+# - 한글 종목명(KRX 등)과 영문 제조사명처럼 문자 체계가 달라 이름을 비교할 수 없으면, 코드가 목록에 있는 것으로 확인 처리
+# - 로딩: 첫 조회 시점에 디스크에서 읽고, 새로 고침은 백그라운드 스레드에서 시장 단위로 수행
+import os
+import re
+import gzip
+import json
+import time
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from thefuzz import fuzz
+
+from result_cache import DATA_DIR
+
+INDEX_DIR = os.getenv("STOCKLENS_TICKER_DIR", os.path.join(DATA_DIR, "tickers"))
+MARKETS = ["KRX", "NASDAQ", "NYSE", "AMEX", "TSE", "HKEX", "SSE", "SZSE"]   # 프롬프트에서 지정한 시장과 동일
+MAX_AGE_SECONDS = int(os.getenv("STOCKLENS_TICKER_MAX_AGE", str(7 * 24 * 3600)))  # 시장별 스냅샷 유효 기간
+CANDIDATE_LIMIT = 40          # 3-gram 후보 중 fuzzy 점수를 계산할 최대 개수
+MATCH_THRESHOLD = 88          # 이름만으로 종목코드를 '보정'할 최소 점수
+UNLISTED_MATCH_THRESHOLD = 97 # Gemini가 종목코드를 모른다고 답했을 때 보정할 최소 점수
+MATCH_MARGIN = 5              # 보정 시 1위가 다른 회사인 2위보다 앞서야 하는 최소 점수 차이
+CONFIRM_THRESHOLD = 70        # Gemini가 준 종목코드의 회사명이 이 점수 이상이면 '확인'
+STOP_GRAM_RATIO = 0.05        # 전체 종목의 5% 이상에 등장하는 3-gram은 변별력이 없어 후보 계산에서 제외
+
+NO_TICKER = "정보 없음"
+
+# 회사명 비교 시 의미 없는 법인 형태 표기
+_CORPORATE_SUFFIXES = re.compile(
+    r"\b(incorporated|inc|corporation|corp|company|co|ltd|limited|holdings?|group|plc|sa|ag|nv|se|kk|llc|class [a-z])\b"
+    r"|주식회사|\(주\)|㈜|홀딩스|株式会社"
+)
+_NON_WORD = re.compile(r"[^\w]+")
+# Gemini가 '005930.KS', 'NYSE: PG', '4912.T' 처럼 거래소 표기를 붙여 답하는 경우
+_TICKER_PREFIX = re.compile(r"^\s*[A-Za-z]+\s*:\s*")
+_TICKER_SUFFIX = re.compile(r"\.(KS|KQ|T|HK|SS|SZ|US)$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TickerMatch:
+    code: str
+    name: str
+    market: str
+    score: int          # 0~100, 회사명 유사도
+    status: str         # confirmed(확인) / corrected(보정) / listed(코드만 존재) / not_found(없음) / unverified(인덱스 없음)
+
+
+def normalize_name(name: str) -> str:
+    """회사명을 비교하기 좋게 소문자화하고 법인 형태 표기와 기호를 제거합니다."""
+    name = _CORPORATE_SUFFIXES.sub(" ", name.lower())
+    return " ".join(_NON_WORD.sub(" ", name).split())
+
+
+def is_latin_name(normalized: str) -> bool:
+    """이름의 글자가 모두 로마자이면 True. 한글/한자가 섞인 이름과 로마자 이름은 유사도를 비교할 수 없습니다."""
+    return all(ch.isascii() for ch in normalized if ch.isalpha())
+
+
+def normalize_ticker(ticker: str) -> str:
+    """거래소 접두/접미 표기를 떼고 대문자로 통일합니다."""
+    return _TICKER_SUFFIX.sub("", _TICKER_PREFIX.sub("", ticker.strip())).upper()
+
+
+def markets_for_code(ticker: str) -> List[str]:
+    """종목코드 형태로 상장되어 있을 수 있는 시장을 추정합니다. (6자리 숫자: 한국/중국, 그 외 숫자: 일본/홍콩, 영문: 미국)"""
+    code = normalize_ticker(ticker)
+    if code.isdigit():
+        return ["KRX", "SSE", "SZSE"] if len(code) == 6 else ["TSE", "HKEX"]
+    if code and code.replace(".", "").replace("-", "").isalpha():
+        return ["NASDAQ", "NYSE", "AMEX"]
+    return list(MARKETS)
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _listing_rows(listing) -> List[Tuple[str, str]]:
+    # 시장마다 컬럼 이름이 다름 (KRX: Code, 해외: Symbol)
+    code_column = "Code" if "Code" in listing.columns else "Symbol"
+    rows = listing[[code_column, "Name"]].dropna().astype(str)
+    return [(code.strip(), name.strip()) for code, name in rows.itertuples(index=False) if code.strip() and name.strip()]
+
+
+class TickerIndex:
+    """시장별 상장 종목 스냅샷을 읽어 이름/코드 조회를 제공하는 인덱스."""
+
+    def __init__(self, index_dir: str = INDEX_DIR, markets: Optional[List[str]] = None, max_age_seconds: int = MAX_AGE_SECONDS):
+        self.index_dir = index_dir
+        self.markets = markets or MARKETS
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False
+        self._snapshots: Dict[str, Dict] = {}
+        # (종목 목록[(code, name, market, 정규화된 이름)], 코드→번호, 3-gram→번호) 를 하나의 튜플로 보관해 한 번에 교체
+        self._tables: Tuple[List[Tuple[str, str, str, str]], Dict[str, List[int]], Dict[str, List[int]]] = ([], {}, {})
+
+    # --- 저장/로딩 ---
+    def _path(self, market: str) -> str:
+        return os.path.join(self.index_dir, f"{market}.json.gz")
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for market in self.markets:
+                try:
+                    with gzip.open(self._path(market), "rt", encoding="utf-8") as f:
+                        self._snapshots[market] = json.load(f)
+                except FileNotFoundError:
+                    continue
+            self._rebuild()
+            self._loaded = True
+
+    def _rebuild(self) -> None:
+        # 스냅샷들로부터 조회용 자료구조를 새로 만들어 한 번에 교체 (조회 중인 스레드는 이전 구조를 계속 사용)
+        entries, by_code, grams = [], {}, {}
+        for market, snapshot in self._snapshots.items():
+            for code, name in snapshot["rows"]:
+                index = len(entries)
+                normalized = normalize_name(name)
+                entries.append((code, name, market, normalized))
+                by_code.setdefault(code.upper(), []).append(index)
+                for gram in _trigrams(normalized):
+                    grams.setdefault(gram, []).append(index)
+        stop_limit = max(50, int(len(entries) * STOP_GRAM_RATIO))
+        self._tables = (entries, by_code, {gram: ids for gram, ids in grams.items() if len(ids) <= stop_limit})
+
+    def stale_markets(self) -> List[str]:
+        """스냅샷이 없거나 유효 기간이 지난 시장 목록."""
+        self._load()
+        now = time.time()
+        return [m for m in self.markets if now - self._snapshots.get(m, {}).get("built_at", 0) > self.max_age_seconds]
+
+    def refresh(self, markets: Optional[List[str]] = None) -> Dict[str, int]:
+        """지정한(기본: 오래된) 시장만 fdr.StockListing으로 다시 받아 저장합니다. 시장별 종목 수를 반환합니다."""
+        try:
+            import FinanceDataReader as fdr
+        except Exception:
+            return {}           # 라이브러리가 없거나 깨졌으면 기존 스냅샷만 사용 (없는 시장의 코드는 'unverified'로 처리됨)
+        self._load()
+        os.makedirs(self.index_dir, exist_ok=True)
+        counts = {}
+        for market in (markets if markets is not None else self.stale_markets()):
+            try:
+                rows = _listing_rows(fdr.StockListing(market))
+            except Exception:
+                continue        # 한 시장이 실패해도 나머지 시장과 기존 스냅샷은 유지
+            snapshot = {"market": market, "built_at": time.time(), "rows": rows}
+            tmp_path = self._path(market) + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self._path(market))
+            with self._lock:
+                self._snapshots[market] = snapshot
+                self._rebuild()
+            counts[market] = len(rows)
+        return counts
+
+    def refresh_in_background(self) -> None:
+        """오래된 시장이 있으면 백그라운드 스레드에서 새로 고칩니다. 이미 진행 중이면 아무것도 하지 않습니다."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, name="ticker-index-refresh", daemon=True).start()
+
+    # --- 조회 ---
+    def __len__(self) -> int:
+        self._load()
+        return len(self._tables[0])
+
+    def has_markets(self, markets: List[str]) -> bool:
+        """설정된 시장 중 주어진 시장들의 스냅샷이 모두 로딩되어 있으면 True."""
+        self._load()
+        return all(market in self._snapshots for market in markets if market in self.markets)
+
+    def lookup_code(self, ticker: str) -> List[Tuple[str, str, str]]:
+        """종목코드가 존재하면 (code, name, market) 목록을 반환합니다. 숫자 코드는 앞자리 0 차이를 허용합니다."""
+        self._load()
+        entries, by_code, _ = self._tables
+        code = normalize_ticker(ticker)
+        ids = by_code.get(code, [])
+        if not ids and code.isdigit():
+            for candidate in (code.lstrip("0"), code.zfill(4), code.zfill(5), code.zfill(6)):
+                ids = by_code.get(candidate, [])
+                if ids:
+                    break
+        return [entries[i][:3] for i in ids]
+
+    def _search(self, query: str, limit: int) -> List[Tuple[int, str, str, str, str]]:
+        # (score, code, name, market, 정규화된 이름) 목록. 정규화한 이름이 같은 종목을 먼저, 그 다음 점수, 시장 순서
+        entries, _, grams = self._tables
+        counts = Counter()
+        for gram in _trigrams(query):
+            counts.update(grams.get(gram, ()))
+        scored = []
+        for index, _ in counts.most_common(CANDIDATE_LIMIT):
+            code, name, market, normalized = entries[index]
+            scored.append((fuzz.token_sort_ratio(query, normalized), code, name, market, normalized))
+        order = {market: rank for rank, market in enumerate(self.markets)}
+        scored.sort(key=lambda row: (row[4] != query, -row[0], order.get(row[3], len(order))))
+        return scored[:limit]
+
+    def search(self, company_name: str, limit: int = 5) -> List[Tuple[str, str, str, int]]:
+        """회사명과 비슷한 종목을 (code, name, market, score) 형태로 점수 높은 순서대로 반환합니다."""
+        self._load()
+        query = normalize_name(company_name)
+        if not query:
+            return []
+        return [(code, name, market, score) for score, code, name, market, _ in self._search(query, limit)]
+
+    def best_match(self, company_name: str, threshold: int = MATCH_THRESHOLD) -> Optional[TickerMatch]:
+        """회사명이 확실히 일치하는 종목 하나를 반환합니다.
+
+        정규화한 이름이 같은 종목이 있으면 그 종목을, 없으면 threshold 이상이면서 다른 회사인 2위보다 MATCH_MARGIN 이상 앞선 종목을 고릅니다.
+        같은 이름으로 여러 시장에 상장된 경우(교차 상장)는 시장 순서(MARKETS)상 앞선 종목을 사용합니다.
+        """
+        self._load()
+        query = normalize_name(company_name)
+        if not query:
+            return None
+        matches = self._search(query, CANDIDATE_LIMIT)
+        if not matches:
+            return None
+        score, code, name, market, normalized = matches[0]
+        if normalized != query:
+            runner_up = next((row[0] for row in matches[1:] if row[4] != normalized), 0)
+            if score < threshold or score - runner_up < MATCH_MARGIN:
+                return None
+        return TickerMatch(code=code, name=name, market=market, score=score, status="corrected")
+
+    def resolve(self, company_name: str, ticker: Optional[str]) -> TickerMatch:
+        """Gemini가 추론한 (제조사, 종목코드)를 인덱스로 검증하고, 필요하면 회사명으로 종목코드를 보정합니다."""
+        if not len(self):
+            return TickerMatch(code=ticker or NO_TICKER, name=company_name, market="", score=0, status="unverified")
+        query = normalize_name(company_name)
+        has_ticker = bool(ticker) and ticker != NO_TICKER
+        # Gemini가 '비상장'이라고 답한 경우에는 더 엄격한 기준으로만 보정 (비슷한 이름의 다른 상장사 방지)
+        best = self.best_match(company_name, MATCH_THRESHOLD if has_ticker else UNLISTED_MATCH_THRESHOLD)
+        listed_best = None
+        if has_ticker:
+            listed = self.lookup_code(ticker)
+            if not listed and not self.has_markets(markets_for_code(ticker)):
+                # 코드가 있을 시장의 목록을 아직 받지 못함 → 없는 코드로 단정하지 않음 (차트/비교/미리 받기를 계속 시도)
+                return TickerMatch(code=ticker, name=company_name, market="", score=0, status="unverified")
+            scored = []
+            for code, name, market in listed:
+                normalized = normalize_name(name)
+                if is_latin_name(query) != is_latin_name(normalized):
+                    # 이름을 비교할 수 없음 (예: 'Samsung Electronics' ↔ '삼성전자') → 코드가 목록에 있으면 확인으로 처리
+                    score, comparable = 0, False
+                else:
+                    # 코드가 따로 주어졌으므로 확인에는 포함 관계도 인정 (예: 'Toyota' ↔ 'Toyota Motor')
+                    score, comparable = fuzz.token_set_ratio(query, normalized), True
+                scored.append((comparable and normalized == query, score, not comparable, code, name, market))
+            if scored:
+                exact, score, incomparable, code, name, market = max(scored)
+                # 이름이 정확히 같은 다른 종목이 있으면, 포함 관계로만 맞은 코드보다 그 종목을 우선
+                preferred = (best is not None and best.code != code and normalize_name(best.name) == query
+                             and not exact and not incomparable)
+                if (exact or incomparable or score >= CONFIRM_THRESHOLD) and not preferred:
+                    return TickerMatch(code=code, name=name, market=market, score=score, status="confirmed")
+                listed_best = TickerMatch(code=code, name=name, market=market, score=score, status="listed")
+        if best is not None and (listed_best is None or best.code != listed_best.code):
+            return best
+        # 회사명으로 찾지 못했다면 Gemini 답을 그대로 두되, 상장 목록에 있는 코드인지 여부를 표시
+        if listed_best:
+            return listed_best
+        return TickerMatch(code=ticker or NO_TICKER, name=company_name, market="", score=0, status="not_found")
+
+    def validate_profile(self, profile_info: Optional[Dict]) -> Optional[Dict]:
+        """Gemini 프로필의 (제조사, 종목코드)를 검증해 '종목코드_검증'을 붙이고, 회사명이 확실히 일치하는 종목이 있으면 종목코드를 보정합니다."""
+        if not profile_info:
+            return profile_info
+        ticker = str(profile_info.get("종목코드") or NO_TICKER)
+        match = self.resolve(profile_info.get("제조사", ""), ticker)
+        validated = {**profile_info, "종목코드_검증": asdict(match)}
+        if match.status == "corrected" and match.code != ticker:
+            validated["종목코드"] = match.code
+            validated["종목코드_원본"] = ticker
+        return validated
+
+
+_default_index: Optional[TickerIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_ticker_index() -> TickerIndex:
+    """프로세스 전체에서 공유하는 기본 인덱스. 실제 파일 로딩은 첫 조회 때 일어납니다."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = TickerIndex()
+        return _default_index
+
+
+if __name__ == "__main__":
+    # 사용법: python ticker_index.py [--all] [시장 ...]
+    #   인자가 없으면 오래된 시장만, --all 이면 모든 시장을 새로 받습니다. (Docker 빌드나 cron에서 미리 실행)
+    import sys
+    args = [a for a in sys.argv[1:] if a != "--all"]
+    index = get_ticker_index()
+    targets = args or (index.markets if "--all" in sys.argv else None)
+    print(index.refresh(targets))
+    print(f"총 {len(index)}개 종목")
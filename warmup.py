@@ -0,0 +1,160 @@
+# --- 백그라운드 워밍업 ---
+# 무거운 클라이언트/모델(Vision, Gemini, YOLO, 주가 저장소 등)을 서버 프로세스가 뜬 직후 백그라운드 스레드에서 미리 만들어 둡니다.
+# 사용자가 업로드 화면을 보는 동안 준비가 끝나므로, 새로 뜬 컨테이너의 첫 분석도 초기화를 기다리지 않습니다.
+# - 각 작업은 프로세스당 한 번만 실행되며, 워밍업이 끝나기 전에 필요해지면 get()이 그 자리에서 만들거나 끝날 때까지 기다림
+# - 실패도 결과로 기억해 get()이 같은 오류를 다시 올림 (st.cache_resource에 None을 저장하던 기존 동작과 같음)
+# - 작업별 소요 시간은 telemetry의 "init.<이름>" 단계로 기록되어 관리자 페이지(pages/1_Metrics.py)에서 볼 수 있음
+# Streamlit에 의존하지 않으며, 화면 오류 표시는 main_app.py / results_view.py가 담당합니다.
+import os
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from telemetry import get_telemetry
+
+WARMUP_ENABLED = os.getenv("STOCKLENS_WARMUP", "1") == "1"
+WARMUP_WORKERS = int(os.getenv("STOCKLENS_WARMUP_WORKERS", "2"))
+
+
+@dataclass
+class _Task:
+    factory: Callable[[], Any]
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    state: str = "pending"          # pending / running / ready / failed
+    value: Any = None
+    error: Optional[BaseException] = None
+    seconds: float = 0.0
+    trigger: str = ""               # "warmup"(백그라운드) 또는 "demand"(화면에서 먼저 필요해짐)
+
+
+class Warmup:
+    """이름별 초기화 작업을 한 번씩만 실행하고 결과를 보관합니다."""
+
+    def __init__(self, workers: int = WARMUP_WORKERS):
+        self.workers = max(1, workers)
+        self._tasks: Dict[str, _Task] = {}
+        self._started = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """작업을 등록합니다. 등록 순서가 백그라운드 실행 순서(먼저 필요한 것부터)입니다."""
+        with self._lock:
+            self._tasks[name] = _Task(factory)
+
+    def start(self) -> "Warmup":
+        """등록된 작업을 데몬 스레드에서 실행하기 시작합니다. 여러 번 호출해도 한 번만 시작합니다."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+            pending = deque(self._tasks)
+
+        def worker() -> None:
+            while True:
+                try:
+                    name = pending.popleft()
+                except IndexError:
+                    return
+                self._run(name, "warmup")
+
+        # 데몬 스레드 : 가중치 다운로드 등이 길어져도 서버 종료를 막지 않음
+        for i in range(min(self.workers, len(pending))):
+            threading.Thread(target=worker, name=f"warmup-{i}", daemon=True).start()
+        return self
+
+    def get(self, name: str) -> Any:
+        """작업 결과를 반환합니다. 아직 실행 전이면 지금 실행하고, 실행 중이면 끝날 때까지 기다립니다."""
+        task = self._run(name, "demand")
+        if task.error is not None:
+            raise task.error
+        return task.value
+
+    def _run(self, name: str, trigger: str) -> _Task:
+        task = self._tasks[name]
+        with task.lock:
+            if task.state in ("ready", "failed"):
+                return task
+            task.state, task.trigger = "running", trigger
+            start = time.perf_counter()
+            try:
+                task.value, task.state = task.factory(), "ready"
+            except Exception as e:
+                task.error, task.state = e, "failed"
+            task.seconds = time.perf_counter() - start
+        get_telemetry().observe(f"init.{name}", task.seconds, trigger=trigger, ok=task.error is None)
+        return task
+
+    def status(self) -> List[Dict[str, Any]]:
+        """작업별 상태 (관리자 페이지 / 시작 벤치마크용)."""
+        return [{"task": name, "state": task.state, "trigger": task.trigger, "seconds": task.seconds,
+                 "error": f"{type(task.error).__name__}: {task.error}" if task.error else None}
+                for name, task in list(self._tasks.items())]
+
+
+# 기본 작업들 : 무거운 모듈은 각 작업 안에서 임포트 (이 모듈을 불러오는 것만으로는 아무것도 로딩하지 않음)
+def _detector():
+    from object_detection import load_detector
+    return load_detector()
+
+
+def _vision_client():
+    from analysis import create_vision_client
+    return create_vision_client()
+
+
+def _gemini_model():
+    from analysis import create_gemini_model
+    return create_gemini_model()
+
+
+def _result_cache():
+    from result_cache import ResultCache
+    return ResultCache()
+
+
+def _ticker_index():
+    from ticker_index import get_ticker_index
+    index = get_ticker_index()
+    len(index)                  # 디스크의 종목 목록을 지금 읽어 둠
+    index.refresh_in_background()
+    return index
+
+
+def _charts():
+    # pandas/plotly 임포트를 미리 끝내 두어 첫 결과 화면에서 임포트 시간이 들지 않게 함
+    import charts
+    return charts
+
+
+def _price_store():
+    from price_store import get_price_store
+    return get_price_store()
+
+
+# 등록 순서 = 실행 순서. YOLO(torch)가 가장 오래 걸리고 결과 화면에서 가장 먼저 필요함
+DEFAULT_TASKS: Dict[str, Callable[[], Any]] = {
+    "detector": _detector,
+    "vision_client": _vision_client,
+    "gemini_model": _gemini_model,
+    "result_cache": _result_cache,
+    "ticker_index": _ticker_index,
+    "charts": _charts,
+    "price_store": _price_store,
+}
+
+
+_default_warmup: Optional[Warmup] = None
+_default_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    """프로세스 전체에서 공유하는 기본 워밍업 (기본 작업이 등록된 상태, 시작은 start()로)."""
+    global _default_warmup
+    with _default_lock:
+        if _default_warmup is None:
+            _default_warmup = Warmup()
+            for name, factory in DEFAULT_TASKS.items():
+                _default_warmup.register(name, factory)
+        return _default_warmup